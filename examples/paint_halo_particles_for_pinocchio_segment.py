@@ -62,10 +62,19 @@ from __future__ import annotations
 
 import argparse
 import csv
+import dataclasses
 import glob
+import hashlib
+import json
+import multiprocessing
+import os
 import re
-from contextlib import contextmanager
-from dataclasses import dataclass
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
 from time import perf_counter
 from typing import Any
@@ -80,59 +89,238 @@ from geppetto import (
     paint_lightcone_particle_count_map,
     paint_lightcone_particle_count_map_sparse,
 )
+from geppetto import __version__ as geppetto_version
 from geppetto.catalog import LightconeHaloCatalog, LightconeSparseStencil
 from geppetto.io import (
     PinocchioMassMap,
     PinocchioRunMetadata,
+    StencilBucketPolicy,
+    StencilBuildDiagnostics,
     build_lightcone_sparse_stencil_bruteforce,
+    build_lightcone_sparse_stencil_healpix,
     healpix_pixel_area_sr,
     healpix_pixel_unit_vectors,
+    iter_pinocchio_lightcone_chunks,
+    nfw_adaptive_support_radius_mpc_h,
+    nfw_support_radius_mpc_h,
+    pad_lightcone_sparse_stencil,
     read_pinocchio_hubble_table,
     read_pinocchio_lightcone_catalog,
     read_pinocchio_lightcone_light_catalog,
     read_pinocchio_mass_map_fits,
     read_pinocchio_mass_sheets,
     read_pinocchio_parameter_file,
+    sort_lightcone_sparse_stencil_by_pixel,
+    stack_lightcone_sparse_stencil_by_segment,
+)
+from geppetto.profiles import (
+    NFWHaloParameters,
+    nfw_halo_parameters,
+    nfw_projected_enclosed_mass_from_halo_parameters,
+    nfw_projected_surface_density_from_halo_parameters,
 )
-from geppetto.profiles import nfw_projected_surface_density, nfw_scale_radius_and_density
 
 # Kept as a module attribute for regression tests proving the default sparse
 # calibration path never calls the dense validation builder.
 _BRUTE_FORCE_STENCIL_BUILDER_REGRESSION_SENTINEL = build_lightcone_sparse_stencil_bruteforce
 _SEGMENT_RE = re.compile(r"seg(\d+)")
+_SEGMENT_WORKER_STATE: dict[str, Any] = {}
+_CONCENTRATION_DERIVATIVE_NAMES = ("amplitude", "mass_slope", "redshift_slope")
+# Arguments that only choose inputs, outputs, caches, or parallelism; the input
+# files themselves are fingerprinted by content.
+_FINGERPRINT_EXCLUDED_ARGS = frozenset(
+    {
+        "params",
+        "sheets",
+        "mass_map",
+        "sheet_index",
+        "output",
+        "mass_map_glob",
+        "output_dir",
+        "output_fits",
+        "plc_catalog",
+        "hubble_table",
+        "catalog_format",
+        "jax_cache_dir",
+        "stencil_cache_dir",
+        "stencil_workers",
+        "workers",
+        "prefetch_depth",
+        "resume",
+    }
+)
+_FINGERPRINT_COLUMNS = (
+    "mass_map_sha256",
+    "catalog_sha256",
+    "parameters_sha256",
+    "code_version",
+    "segment_fingerprint",
+)
+
+
+class CompiledKernelCache:
+    """Ahead-of-time compiled executables of the module-level jitted kernels.
+
+    A call whose array shapes, dtypes, pytree structure (including the static
+    stencil ``n_pix``) and static arguments were seen before reuses a compiled
+    executable and counts as a hit; any other call is a miss that lowers and
+    compiles a new executable. With the persistent compilation cache enabled,
+    misses are served from disk on repeated runs.
+    """
+
+    def __init__(self) -> None:
+        self._executables: dict[Any, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def compiled(self, name: str, jitted: Any, *args: Any, profile: bool = False, **static: Any):
+        """Return the compiled executable of ``jitted`` for ``args``.
+
+        The executable is called with the dynamic ``args`` only; ``static``
+        keyword arguments are baked in at compile time.
+        """
+
+        leaves, treedef = jax.tree_util.tree_flatten(args)
+        signature = (
+            name,
+            treedef,
+            tuple(
+                (
+                    tuple(np.shape(leaf)),
+                    jnp.result_type(leaf).name,
+                    bool(getattr(leaf, "weak_type", isinstance(leaf, (int, float, complex)))),
+                )
+                for leaf in leaves
+            ),
+            tuple(sorted(static.items())),
+        )
+        executable = self._executables.get(signature)
+        if executable is not None:
+            self.hits += 1
+            return executable
+        self.misses += 1
+        with timed_stage(f"{name} compile", profile):
+            executable = jitted.lower(*args, **static).compile()
+        self._executables[signature] = executable
+        return executable
+
+
+COMPILED_KERNELS = CompiledKernelCache()
+
+
+@partial(
+    jax.jit,
+    static_argnames=("particle_mass_msun_h", "pixel_area_sr", "cosmology", "profile_params"),
+)
+def _paint_sparse_particle_counts(
+    stencil: LightconeSparseStencil,
+    catalog: LightconeHaloCatalog,
+    concentration_params: ConcentrationParams,
+    *,
+    particle_mass_msun_h: float,
+    pixel_area_sr: float,
+    cosmology: Any,
+    profile_params: NFWProfileParams,
+):
+    return paint_lightcone_particle_count_map_sparse(
+        stencil,
+        catalog,
+        particle_mass_msun_h=particle_mass_msun_h,
+        pixel_area_sr=pixel_area_sr,
+        cosmology=cosmology,
+        concentration_params=concentration_params,
+        profile_params=profile_params,
+    )
+
+
+@partial(
+    jax.jit,
+    static_argnames=("particle_mass_msun_h", "pixel_area_sr", "cosmology", "profile_params"),
+)
+def _concentration_map_jvps(
+    stencil: LightconeSparseStencil,
+    catalog: LightconeHaloCatalog,
+    theta,
+    mass_pivot,
+    *,
+    particle_mass_msun_h: float,
+    pixel_area_sr: float,
+    cosmology: Any,
+    profile_params: NFWProfileParams,
+):
+    def paint_map_from_theta(theta):
+        concentration_params = ConcentrationParams(
+            amplitude=theta[0],
+            mass_slope=theta[1],
+            redshift_slope=theta[2],
+            mass_pivot=mass_pivot,
+        )
+        return paint_lightcone_particle_count_map_sparse(
+            stencil,
+            catalog,
+            particle_mass_msun_h=particle_mass_msun_h,
+            pixel_area_sr=pixel_area_sr,
+            cosmology=cosmology,
+            concentration_params=concentration_params,
+            profile_params=profile_params,
+        )
+
+    basis = jnp.eye(theta.shape[0], dtype=theta.dtype)
+    return jax.vmap(
+        lambda direction: jax.jvp(
+            paint_map_from_theta,
+            (theta,),
+            (direction,),
+        )[1]
+    )(basis)
+
+
+def sparse_kernel_static_args(
+    particle_mass_msun_h: float,
+    pixel_area_sr: float,
+    metadata: PinocchioRunMetadata,
+    profile_params: NFWProfileParams,
+) -> dict[str, Any]:
+    """Return the compile-time keyword arguments of the jitted sparse kernels."""
+
+    return {
+        "particle_mass_msun_h": float(particle_mass_msun_h),
+        "pixel_area_sr": float(pixel_area_sr),
+        "cosmology": metadata.cosmology,
+        "profile_params": profile_params,
+    }
 
 
-@dataclass
-class StencilBuildDiagnostics:
-    """Host-side counters for HEALPix sparse-stencil construction."""
+def concentration_jvp_inputs(
+    catalog: LightconeHaloCatalog,
+    concentration_amplitude: float,
+    concentration_mass_slope: float,
+    concentration_redshift_slope: float,
+    concentration_mass_pivot: float,
+):
+    """Return the differentiated ``theta`` vector and the fixed mass pivot."""
 
-    n_halos: int = 0
-    n_halos_with_query_pixels: int = 0
-    n_halos_with_inside_pixels: int = 0
-    n_halos_with_kept_pairs: int = 0
-    n_query_pixels_total: int = 0
-    n_inside_domain_total: int = 0
-    n_kept_pairs_total: int = 0
-    query_mode: str = "inclusive"
-    elapsed_seconds: float = 0.0
+    theta = jnp.asarray(
+        [
+            concentration_amplitude,
+            concentration_mass_slope,
+            concentration_redshift_slope,
+        ],
+        dtype=catalog.mass.dtype,
+    )
+    return theta, jnp.asarray(concentration_mass_pivot, dtype=theta.dtype)
 
-    @property
-    def inside_over_query(self) -> float:
-        if self.n_query_pixels_total == 0:
-            return 0.0
-        return self.n_inside_domain_total / self.n_query_pixels_total
 
-    @property
-    def kept_over_query(self) -> float:
-        if self.n_query_pixels_total == 0:
-            return 0.0
-        return self.n_kept_pairs_total / self.n_query_pixels_total
+def bucketed_sparse_problem(
+    stencil: LightconeSparseStencil,
+    catalog: LightconeHaloCatalog,
+    bucket_policy: StencilBucketPolicy | None,
+) -> tuple[LightconeSparseStencil, LightconeHaloCatalog]:
+    """Pad the stencil and catalogue to shape buckets, or return them unchanged."""
 
-    @property
-    def kept_over_inside(self) -> float:
-        if self.n_inside_domain_total == 0:
-            return 0.0
-        return self.n_kept_pairs_total / self.n_inside_domain_total
+    if bucket_policy is None:
+        return stencil, catalog
+    return pad_lightcone_sparse_stencil(stencil, catalog, bucket_policy)
 
 
 @contextmanager
@@ -151,6 +339,27 @@ def timed_stage(name: str, enabled: bool = True):
         print(f"[profile] {name:<40s} {dt:9.4f} s")
 
 
+def enable_persistent_compilation_cache(cache_dir: Path) -> None:
+    """Enable JAX's on-disk XLA compilation cache in ``cache_dir``.
+
+    Must run before the first compilation. The size and compile-time thresholds
+    are lowered so the short sparse-painter compilations are cached too; the
+    threshold options are skipped on JAX versions that do not define them.
+    """
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    jax.config.update("jax_compilation_cache_dir", str(cache_dir))
+    for option, value in (
+        ("jax_persistent_cache_min_compile_time_secs", 0.0),
+        ("jax_persistent_cache_min_entry_size_bytes", -1),
+    ):
+        try:
+            jax.config.update(option, value)
+        except AttributeError:
+            pass
+
+
 def parse_args() -> argparse.Namespace:
     """Parse command-line arguments."""
 
@@ -270,6 +479,28 @@ def parse_args() -> argparse.Namespace:
         default=10.0,
         help=argparse.SUPPRESS,
     )
+    parser.add_argument(
+        "--nfw-rmax-policy",
+        choices=("fixed", "adaptive"),
+        default="fixed",
+        help=(
+            "Sparse-stencil support radius: 'fixed' keeps --nfw-taper-radius-factor taper "
+            "widths beyond R_delta; 'adaptive' solves per halo for the smallest radius "
+            "losing at most --nfw-rmax-mass-tolerance of the painted mass."
+        ),
+    )
+    parser.add_argument(
+        "--nfw-rmax-mass-tolerance",
+        type=float,
+        default=1.0e-3,
+        help="Fractional painted-mass loss allowed by --nfw-rmax-policy adaptive.",
+    )
+    parser.add_argument(
+        "--nfw-projected-kernel",
+        choices=("analytic", "table"),
+        default="analytic",
+        help=argparse.SUPPRESS,
+    )
     parser.add_argument(
         "--nfw-dense-demo",
         action="store_true",
@@ -282,10 +513,96 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--stencil-query-mode",
-        choices=("inclusive", "center"),
-        default="inclusive",
+        choices=("ring", "inclusive", "center"),
+        default="ring",
         help=argparse.SUPPRESS,
     )
+    parser.add_argument(
+        "--stencil-workers",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes for the ring-range sparse-stencil builder; halo shards "
+            "are built in parallel from shared-memory catalogue arrays."
+        ),
+    )
+    parser.add_argument(
+        "--stencil-cache-dir",
+        type=Path,
+        help=(
+            "Directory of cached ring-range sparse stencils keyed by a hash of the halo "
+            "geometry, support radii, and compact pixels; reused across c-M sweeps."
+        ),
+    )
+    parser.add_argument(
+        "--stencil-layout",
+        choices=("halo", "pixel"),
+        default="halo",
+        help=(
+            "Sparse-stencil pair order. 'pixel' sorts pairs by pixel with CSR offsets so "
+            "the painters use a sorted segment sum instead of an unsorted scatter-add."
+        ),
+    )
+    parser.add_argument(
+        "--stencil-bucket-growth",
+        type=float,
+        help=(
+            "Pad sparse stencils and halo catalogues to geometric shape buckets with this "
+            "growth factor (e.g. 2) so jitted painters and JVPs are reused across segments."
+        ),
+    )
+    parser.add_argument(
+        "--stencil-subpixel-threshold",
+        type=float,
+        help=(
+            "Deposit haloes whose angular support radius is below this many pixel sizes "
+            "directly into their containing pixel instead of expanding them into halo-pixel "
+            "pairs. Requires the HEALPix ring stencil builder."
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Skip segments whose manifest fingerprint (mass map, PLC catalogue, "
+            "parameters, code version) matches and whose NPZ output exists."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Worker processes for the all-segments workflow; segments run in parallel "
+            "on a shared-memory copy of the PLC catalogue."
+        ),
+    )
+    parser.add_argument(
+        "--prefetch-depth",
+        type=int,
+        default=0,
+        help=(
+            "Read up to this many segment mass maps ahead and write finished segment "
+            "outputs on background threads while the current segment paints (0 = serial)."
+        ),
+    )
+    parser.add_argument(
+        "--global-stencil",
+        action="store_true",
+        help=(
+            "In all-segments mode, build one ring stencil over the union pixel domain of "
+            "every segment, key each pair by its halo's segment, and paint the whole "
+            "(n_segment, n_pix) map stack in one jitted call."
+        ),
+    )
+    parser.add_argument(
+        "--jax-cache-dir",
+        type=Path,
+        help=(
+            "Directory for JAX's persistent XLA compilation cache, so repeated runs load "
+            "the sparse painter and JVP executables instead of recompiling them."
+        ),
+    )
     parser.add_argument(
         "--stencil-diagnostics",
         action="store_true",
@@ -318,15 +635,44 @@ def validate_segment_workflow_args(args: argparse.Namespace) -> str:
             "(--mass-map, --sheet-index, --output) or all-segments inputs "
             "(--mass-map-glob, --output-dir), not both."
         )
+    if args.prefetch_depth < 0:
+        raise ValueError("--prefetch-depth must be non-negative")
+    if args.workers < 1:
+        raise ValueError("--workers must be positive")
     if args.output_fits is not None and any(all_segment_args):
         raise ValueError("--output-fits is only supported in single-segment mode")
+    all_segments = all(all_segment_args) and not any(single_segment_args)
+    if not all_segments:
+        if args.global_stencil:
+            raise ValueError("--global-stencil is only supported in all-segments mode")
+        if args.workers > 1:
+            raise ValueError("--workers is only supported in all-segments mode")
+        if args.resume:
+            raise ValueError("--resume is only supported in all-segments mode")
     if all(single_segment_args) and not any(all_segment_args):
         return "single"
-    if all(all_segment_args) and not any(single_segment_args):
+    if all_segments:
         if args.stencil_compare_query_modes:
             raise ValueError(
                 "--stencil-compare-query-modes is currently supported only in single-segment mode"
             )
+        if args.global_stencil and (
+            args.nfw_dense_demo or args.mode in ("derivatives", "derivatives-profile")
+        ):
+            raise ValueError(
+                "--global-stencil supports only sparse 'paint' and 'profile' modes"
+            )
+        if args.global_stencil and (
+            args.stencil_diagnostics or args.stencil_query_mode != "ring"
+        ):
+            raise ValueError(
+                "--global-stencil supports only the ring stencil query mode "
+                "without --stencil-diagnostics"
+            )
+        if args.workers > 1 and (args.global_stencil or args.prefetch_depth > 0):
+            raise ValueError(
+                "--workers cannot be combined with --global-stencil or --prefetch-depth"
+            )
         return "all"
     raise ValueError(
         "Provide either --mass-map, --sheet-index, --output "
@@ -375,14 +721,20 @@ def segment_output_paths(output_dir: Path, segment_index: int) -> dict[str, Path
 
 
 def load_lightcone_catalog(args: argparse.Namespace) -> LightconeHaloCatalog:
-    """Load a full or light PINOCCHIO PLC catalogue as a GEPPETTO catalogue."""
+    """Load a full or light PINOCCHIO PLC catalogue as a GEPPETTO catalogue.
+
+    Only the columns needed for painting are decoded: angles, mass, the
+    selected redshift, and (for full PLCs) Cartesian positions for distances.
+    """
 
+    columns = ["masses_msun_h", "theta_deg", "phi_deg", f"{args.redshift_mode}_redshift"]
     if args.light_plc:
         if args.hubble_table is None:
             raise ValueError("--hubble-table is required when --light-plc is used")
         raw = read_pinocchio_lightcone_light_catalog(
             args.plc_catalog,
             format=args.catalog_format,
+            columns=columns,
         )
         distance_interpolator = read_pinocchio_hubble_table(args.hubble_table)
         return raw.to_lightcone_catalog(
@@ -390,10 +742,49 @@ def load_lightcone_catalog(args: argparse.Namespace) -> LightconeHaloCatalog:
             redshift=args.redshift_mode,
         )
 
-    raw = read_pinocchio_lightcone_catalog(args.plc_catalog, format=args.catalog_format)
+    raw = read_pinocchio_lightcone_catalog(
+        args.plc_catalog,
+        format=args.catalog_format,
+        columns=[*columns, "positions_mpc_h"],
+    )
     return raw.to_lightcone_catalog(redshift=args.redshift_mode)
 
 
+def iter_segment_lightcone_chunks(
+    args: argparse.Namespace,
+    bounds: dict[str, float],
+    inclusive_upper: bool,
+    chunk_haloes: int,
+) -> Iterator[LightconeHaloCatalog]:
+    """Stream the segment-selected haloes of a full PLC in bounded-memory chunks.
+
+    Redshift bounds are pushed down to the reader as a closed ``z_range``; the
+    exact segment selection, including ``inclusive_upper``, is applied per chunk.
+    """
+
+    if args.light_plc:
+        raise ValueError("streamed PLC chunks require a full PLC catalogue")
+    z_range = (bounds["z_lo"], bounds["z_hi"]) if args.bounds == "z" else None
+    raw_chunks = iter_pinocchio_lightcone_chunks(
+        args.plc_catalog,
+        chunk_haloes=chunk_haloes,
+        columns=[
+            "masses_msun_h",
+            "theta_deg",
+            "phi_deg",
+            "positions_mpc_h",
+            f"{args.redshift_mode}_redshift",
+        ],
+        z_range=z_range if args.redshift_mode == "true" else None,
+        format=args.catalog_format,
+    )
+    for raw in raw_chunks:
+        chunk = raw.to_lightcone_catalog(redshift=args.redshift_mode)
+        mask = select_segment_mask(chunk, bounds, args.bounds, inclusive_upper)
+        if np.any(mask):
+            yield selected_lightcone_catalog(chunk, mask)
+
+
 def segment_bounds(sheets: Any, sheet_index: int) -> dict[str, float]:
     """Return sorted redshift, scale-factor, and distance bounds for one sheet."""
 
@@ -516,8 +907,7 @@ def halo_rows_in_mass_map(
         return empty_rows, empty_inside
 
     halo_pix = hp.vec2pix(mass_map.nside, uv[:, 0], uv[:, 1], uv[:, 2], nest=False)
-    pixel_to_row = {int(pixel): row for row, pixel in enumerate(np.asarray(mass_map.pixel))}
-    rows = np.array([pixel_to_row.get(int(pixel), -1) for pixel in halo_pix], dtype=np.int64)
+    rows = mass_map.pixel_index.rows(halo_pix)
     inside_pixel_domain = rows >= 0
     return rows, inside_pixel_domain
 
@@ -577,25 +967,36 @@ def nfw_stencil_rmax_mpc_h(
     concentration_params: ConcentrationParams,
     profile_params: NFWProfileParams,
     taper_radius_factor: float,
+    *,
+    rmax_policy: str = "fixed",
+    mass_loss_tolerance: float = 1.0e-3,
 ) -> np.ndarray:
-    """Return fixed sparse-stencil NFW support radii in comoving ``Mpc/h``."""
+    """Return sparse-stencil NFW support radii in comoving ``Mpc/h``.
 
-    if taper_radius_factor < 0.0:
-        raise ValueError("taper_radius_factor must be non-negative")
+    ``rmax_policy="fixed"`` uses ``taper_radius_factor`` taper widths beyond
+    ``R_delta`` for every halo; ``"adaptive"`` uses the per-halo radius that
+    loses at most ``mass_loss_tolerance`` of the tapered projected mass.
+    """
 
-    r_delta, _, _, _ = nfw_scale_radius_and_density(
+    if rmax_policy == "adaptive":
+        return nfw_adaptive_support_radius_mpc_h(
+            catalog.mass,
+            catalog.redshift,
+            metadata.cosmology,
+            concentration_params,
+            profile_params,
+            mass_loss_tolerance=mass_loss_tolerance,
+        )
+    if rmax_policy != "fixed":
+        raise ValueError(f"Unknown rmax_policy {rmax_policy!r}")
+    return nfw_support_radius_mpc_h(
         catalog.mass,
         catalog.redshift,
         metadata.cosmology,
         concentration_params,
         profile_params,
+        taper_radius_factor=taper_radius_factor,
     )
-    r_delta_np = np.asarray(r_delta, dtype=np.float64)
-    if not profile_params.smooth_truncation:
-        return r_delta_np
-
-    width = float(profile_params.truncation_width_fraction) * r_delta_np
-    return r_delta_np + float(taper_radius_factor) * width
 
 
 def _compression_factor(dense_pair_count: int, sparse_pair_count: int) -> float:
@@ -620,6 +1021,10 @@ def build_lightcone_sparse_stencil_for_mass_map_local(
     ``mass_map.pixel``, not global HEALPix pixel numbers. Geometry is fixed
     outside JAX; the differentiable sparse painter receives only the retained
     local halo-pixel pairs.
+
+    This per-halo ``healpy.query_disc`` loop is kept as the audit reference for
+    the ``inclusive`` and ``center`` query modes. The default ``ring`` mode uses
+    the vectorized :func:`geppetto.io.build_lightcone_sparse_stencil_healpix`.
     """
 
     if query_mode not in ("inclusive", "center"):
@@ -633,9 +1038,8 @@ def build_lightcone_sparse_stencil_for_mass_map_local(
     validate_mass_map(mass_map)
     validate_catalog_for_binning(catalog)
 
-    pixels = np.asarray(mass_map.pixel, dtype=np.int64)
-    n_pix = int(pixels.shape[0])
-    pixel_to_row = {int(pixel): row for row, pixel in enumerate(pixels)}
+    pixel_index = mass_map.pixel_index
+    n_pix = pixel_index.n_pix
 
     halo_unit_vectors = np.asarray(catalog.unit_vector)
     if not np.issubdtype(halo_unit_vectors.dtype, np.floating):
@@ -679,10 +1083,7 @@ def build_lightcone_sparse_stencil_for_mass_map_local(
             continue
         diagnostics.n_halos_with_query_pixels += 1
 
-        rows = np.array(
-            [pixel_to_row.get(int(pixel), -1) for pixel in queried_pixels],
-            dtype=np.int64,
-        )
+        rows = pixel_index.rows(queried_pixels)
         inside_domain = rows >= 0
         n_inside = int(np.count_nonzero(inside_domain))
         diagnostics.n_inside_domain_total += n_inside
@@ -731,7 +1132,9 @@ def build_lightcone_sparse_stencil_for_mass_map_local(
     return stencil
 
 
-def stencil_diagnostics_to_dict(diag: StencilBuildDiagnostics) -> dict[str, float | int | str]:
+def stencil_diagnostics_to_dict(
+    diag: StencilBuildDiagnostics,
+) -> dict[str, float | int | str | np.ndarray]:
     """Return NPZ-safe scalar diagnostics for a stencil build."""
 
     return {
@@ -743,6 +1146,14 @@ def stencil_diagnostics_to_dict(diag: StencilBuildDiagnostics) -> dict[str, floa
         "stencil_kept_over_query": float(diag.kept_over_query),
         "stencil_kept_over_inside": float(diag.kept_over_inside),
         "stencil_build_seconds": float(diag.elapsed_seconds),
+        "stencil_cache_hit": bool(diag.cache_hit),
+        "stencil_subpixel_halos": int(diag.n_subpixel_halos),
+        "stencil_subpixel_deposits": int(diag.n_subpixel_deposits),
+        "stencil_subpixel_pairs_avoided": int(diag.n_subpixel_pairs_avoided),
+        "stencil_subpixel_query_pixels_avoided": int(diag.n_subpixel_query_pixels_avoided),
+        "stencil_worker_seconds": np.asarray(diag.worker_elapsed_seconds, dtype=np.float64),
+        "stencil_worker_n_halos": np.asarray(diag.worker_n_halos, dtype=np.int64),
+        "stencil_worker_load_imbalance": float(diag.worker_load_imbalance),
     }
 
 
@@ -762,6 +1173,17 @@ def print_stencil_diagnostics(diag: StencilBuildDiagnostics) -> None:
     print(f"  Kept/query fraction: {diag.kept_over_query:.6g}")
     print(f"  Kept/inside fraction: {diag.kept_over_inside:.6g}")
     print(f"  Stencil build time [s]: {diag.elapsed_seconds:.6g}")
+    if diag.cache_hit:
+        print("  Stencil loaded from cache: query counters were not recomputed")
+    if diag.n_subpixel_halos or diag.n_subpixel_deposits:
+        print(f"  Sub-pixel halos: {diag.n_subpixel_halos}")
+        print(f"  Sub-pixel point deposits: {diag.n_subpixel_deposits}")
+        print(f"  Halo-pixel pairs avoided: {diag.n_subpixel_pairs_avoided}")
+        print(f"  Queried pixels avoided: {diag.n_subpixel_query_pixels_avoided}")
+    if len(diag.worker_elapsed_seconds) > 1:
+        worker_seconds = ", ".join(f"{seconds:.3g}" for seconds in diag.worker_elapsed_seconds)
+        print(f"  Worker shard times [s]: {worker_seconds}")
+        print(f"  Worker load imbalance (max/mean): {diag.worker_load_imbalance:.6g}")
 
 
 def print_stencil_query_mode_comparison(
@@ -865,6 +1287,63 @@ def compare_stencil_query_modes(
     return maps["inclusive"], stencils["inclusive"], comparison
 
 
+def compare_stencil_rmax_policies(
+    mass_map: PinocchioMassMap,
+    selected_catalog: LightconeHaloCatalog,
+    fixed_rmax_mpc_h: np.ndarray,
+    adaptive_rmax_mpc_h: np.ndarray,
+    metadata: PinocchioRunMetadata,
+    particle_mass_msun_h: float,
+    pixel_area_sr: float,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams,
+    *,
+    profile: bool = False,
+) -> dict[str, float | int]:
+    """Compare pair counts and painted totals of fixed and adaptive support radii."""
+
+    comparison: dict[str, float | int] = {}
+    for policy, rmax in (("fixed", fixed_rmax_mpc_h), ("adaptive", adaptive_rmax_mpc_h)):
+        with timed_stage(f"NFW ring sparse stencil ({policy} rmax)", profile):
+            stencil = build_lightcone_sparse_stencil_healpix(mass_map, selected_catalog, rmax)
+        total = nfw_sparse_total_particle_count(
+            stencil,
+            selected_catalog,
+            particle_mass_msun_h,
+            pixel_area_sr,
+            metadata.cosmology,
+            concentration_params,
+            profile_params,
+        )
+        comparison[f"rmax_{policy}_pairs_total"] = int(stencil.size)
+        comparison[f"rmax_{policy}_sum_particle_counts"] = float(total)
+        comparison[f"rmax_{policy}_mean_mpc_h"] = float(np.mean(rmax)) if rmax.size else 0.0
+
+    fixed_sum = comparison["rmax_fixed_sum_particle_counts"]
+    comparison["rmax_adaptive_over_fixed_pairs"] = _compression_factor(
+        comparison["rmax_adaptive_pairs_total"], comparison["rmax_fixed_pairs_total"]
+    )
+    comparison["rmax_relative_sum_difference"] = abs(
+        comparison["rmax_adaptive_sum_particle_counts"] - fixed_sum
+    ) / max(abs(fixed_sum), 1.0)
+    return comparison
+
+
+def print_stencil_rmax_policy_comparison(comparison: dict[str, float | int]) -> None:
+    """Print a fixed-vs-adaptive support-radius comparison report."""
+
+    print("Stencil rmax policy comparison:")
+    for policy in ("fixed", "adaptive"):
+        print(f"  {policy} mean rmax [Mpc/h]: {comparison[f'rmax_{policy}_mean_mpc_h']:.6g}")
+        print(f"  {policy} kept pairs: {comparison[f'rmax_{policy}_pairs_total']}")
+        print(
+            f"  {policy} painted particle counts: "
+            f"{comparison[f'rmax_{policy}_sum_particle_counts']:.12g}"
+        )
+    print(f"  adaptive/fixed pairs: {comparison['rmax_adaptive_over_fixed_pairs']:.6g}")
+    print(f"  relative painted-count difference: {comparison['rmax_relative_sum_difference']:.6g}")
+
+
 def nfw_sparse_total_particle_count(
     stencil: LightconeSparseStencil,
     catalog: LightconeHaloCatalog,
@@ -878,7 +1357,8 @@ def nfw_sparse_total_particle_count(
 
     The stencil contains fixed halo-pixel geometry with ``r_perp`` in comoving
     ``Mpc/h``. Halo masses are ``Msun/h`` and radial distances are comoving
-    ``Mpc/h``. The returned scalar is ``sum(Sigma * chi**2 * pixel_area_sr)``
+    ``Mpc/h``. The returned scalar is ``sum(Sigma * chi**2 * pixel_area_sr)``,
+    plus the projected ``r_delta`` mass of any sub-pixel point deposits,
     divided by ``particle_mass_msun_h``. It is differentiable with respect to
     halo/profile quantities and profile/concentration parameters, while the
     retained sparse pair set remains fixed.
@@ -890,18 +1370,20 @@ def nfw_sparse_total_particle_count(
         raise ValueError("pixel_area_sr must be positive")
 
     halo_id = jnp.asarray(stencil.halo_id, dtype=jnp.int32)
-    mass = catalog.mass[halo_id]
-    redshift = catalog.redshift[halo_id]
-    chi = catalog.chi[halo_id]
-    sigma = nfw_projected_surface_density(
-        stencil.r_perp,
-        mass,
-        redshift,
-        cosmology,
-        concentration_params,
-        profile_params,
+    halo = nfw_halo_parameters(
+        catalog.mass, catalog.redshift, cosmology, concentration_params, profile_params
     )
-    return jnp.sum(sigma * (chi**2) * pixel_area_sr / particle_mass_msun_h)
+    pair_halo = NFWHaloParameters(*(field[halo_id] for field in halo))
+    sigma = nfw_projected_surface_density_from_halo_parameters(
+        stencil.r_perp, pair_halo, profile_params
+    )
+    chi = catalog.chi[halo_id]
+    total = jnp.sum(sigma * (chi**2) * pixel_area_sr)
+    if stencil.has_point_deposits:
+        point_halo_id = jnp.asarray(stencil.point_halo_id, dtype=jnp.int32)
+        point_halo = NFWHaloParameters(*(field[point_halo_id] for field in halo))
+        total = total + jnp.sum(nfw_projected_enclosed_mass_from_halo_parameters(point_halo))
+    return total / particle_mass_msun_h
 
 
 def nfw_concentration_map_derivatives(
@@ -916,12 +1398,16 @@ def nfw_concentration_map_derivatives(
     concentration_mass_pivot: float,
     truncation_width_fraction: float,
     profile: bool = False,
+    projected_kernel: str = "analytic",
+    bucket_policy: StencilBucketPolicy | None = None,
 ) -> dict[str, float | str | np.ndarray]:
     """Return compact-map JVP derivatives with respect to concentration parameters.
 
     The sparse stencil geometry and retained pair set are fixed. Derivatives are
     taken only with respect to concentration amplitude, mass slope, and redshift
-    slope; ``mass_pivot`` remains fixed.
+    slope; ``mass_pivot`` remains fixed. With ``bucket_policy`` the stencil and
+    catalogue are padded to shape buckets so the jitted JVP executable is reused
+    across segments; padded pixels are sliced off the returned maps.
     """
 
     if particle_mass_msun_h <= 0.0:
@@ -930,44 +1416,34 @@ def nfw_concentration_map_derivatives(
         raise ValueError("concentration_mass_pivot must be positive")
 
     pixel_area_sr = healpix_pixel_area_sr(mass_map.nside)
-    theta = jnp.asarray(
-        [
-            concentration_amplitude,
-            concentration_mass_slope,
-            concentration_redshift_slope,
-        ],
-        dtype=selected_catalog.mass.dtype,
+    theta, mass_pivot = concentration_jvp_inputs(
+        selected_catalog,
+        concentration_amplitude,
+        concentration_mass_slope,
+        concentration_redshift_slope,
+        concentration_mass_pivot,
+    )
+    profile_params = NFWProfileParams(
+        truncation_width_fraction=truncation_width_fraction,
+        projected_kernel=projected_kernel,
+    )
+    padded_stencil, padded_catalog = bucketed_sparse_problem(
+        stencil, selected_catalog, bucket_policy
+    )
+    static = sparse_kernel_static_args(particle_mass_msun_h, pixel_area_sr, metadata, profile_params)
+
+    jvps = COMPILED_KERNELS.compiled(
+        "NFW map concentration JVPs",
+        _concentration_map_jvps,
+        padded_stencil,
+        padded_catalog,
+        theta,
+        mass_pivot,
+        profile=profile,
+        **static,
     )
-
-    def paint_map_from_theta(theta):
-        concentration_params = ConcentrationParams(
-            amplitude=theta[0],
-            mass_slope=theta[1],
-            redshift_slope=theta[2],
-            mass_pivot=concentration_mass_pivot,
-        )
-        profile_params = NFWProfileParams(
-            truncation_width_fraction=truncation_width_fraction,
-        )
-        return paint_lightcone_particle_count_map_sparse(
-            stencil,
-            selected_catalog,
-            particle_mass_msun_h=particle_mass_msun_h,
-            pixel_area_sr=pixel_area_sr,
-            cosmology=metadata.cosmology,
-            concentration_params=concentration_params,
-            profile_params=profile_params,
-        )
-
-    basis = jnp.eye(theta.shape[0], dtype=theta.dtype)
     with timed_stage("NFW map concentration JVPs", profile):
-        dmaps = jax.vmap(
-            lambda direction: jax.jvp(
-                paint_map_from_theta,
-                (theta,),
-                (direction,),
-            )[1]
-        )(basis)
+        dmaps = jvps(padded_stencil, padded_catalog, theta, mass_pivot)[:, : stencil.n_pix]
         dmaps.block_until_ready()
 
     d_amp = dmaps[0]
@@ -993,6 +1469,166 @@ def nfw_concentration_map_derivatives(
     }
 
 
+def nfw_settings_diagnostics(
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams,
+    *,
+    bucket_policy: StencilBucketPolicy | None,
+    rmax_policy: str,
+    rmax_mass_tolerance: float,
+    stencil_subpixel_threshold: float | None,
+) -> dict[str, float | int | str]:
+    """Return the NPZ diagnostics recording NFW and stencil settings."""
+
+    return {
+        "nfw_concentration_amplitude": float(concentration_params.amplitude),
+        "nfw_concentration_mass_slope": float(concentration_params.mass_slope),
+        "nfw_concentration_redshift_slope": float(concentration_params.redshift_slope),
+        "nfw_concentration_mass_pivot": float(concentration_params.mass_pivot),
+        "nfw_truncation_width_fraction": float(profile_params.truncation_width_fraction),
+        "nfw_projected_kernel": profile_params.projected_kernel,
+        "nfw_stencil_bucket_growth": 0.0 if bucket_policy is None else bucket_policy.growth,
+        "nfw_rmax_policy": rmax_policy,
+        "nfw_rmax_mass_tolerance": float(rmax_mass_tolerance),
+        "nfw_stencil_subpixel_threshold": (
+            0.0 if stencil_subpixel_threshold is None else float(stencil_subpixel_threshold)
+        ),
+        "nfw_jit_cache_hits": COMPILED_KERNELS.hits,
+        "nfw_jit_cache_misses": COMPILED_KERNELS.misses,
+    }
+
+
+def accumulate_lightcone_particle_count_map(
+    chunks: Iterable[LightconeHaloCatalog],
+    mass_map: PinocchioMassMap,
+    metadata: PinocchioRunMetadata,
+    particle_mass_msun_h: float,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams,
+    *,
+    taper_radius_factor: float = 10.0,
+    rmax_policy: str = "fixed",
+    rmax_mass_tolerance: float = 1.0e-3,
+    subpixel_threshold: float | None = None,
+    bucket_policy: StencilBucketPolicy | None = None,
+    compute_map_derivatives: bool = False,
+    accumulator_path: Path | None = None,
+    profile: bool = False,
+) -> dict[str, float | int | str | np.ndarray]:
+    """Paint a compact NFW particle-count map out of core from halo chunks.
+
+    Each chunk gets its own ring stencil on the compact ``mass_map`` domain,
+    which is painted with the jitted sparse kernel and added into a persistent
+    ``float64`` accumulator. Only one chunk's halo-pixel pairs exist at a time.
+    With ``compute_map_derivatives`` the concentration JVP maps of
+    :func:`nfw_concentration_map_derivatives` are accumulated the same way. The
+    painted map is linear in the haloes, so the sums equal a single-shot paint.
+
+    ``bucket_policy`` (default ``StencilBucketPolicy()``) pads every chunk to
+    shape buckets so the compiled executables are reused across chunks. With
+    ``accumulator_path`` the accumulator is a ``.npy`` memory map of shape
+    ``(n_map, n_pix)``: row 0 is the particle-count map and rows 1-3 the
+    amplitude, mass-slope and redshift-slope derivatives.
+    """
+
+    if particle_mass_msun_h <= 0.0:
+        raise ValueError("particle_mass_msun_h must be positive")
+    validate_mass_map(mass_map)
+    if bucket_policy is None:
+        bucket_policy = StencilBucketPolicy()
+    pixel_area_sr = healpix_pixel_area_sr(mass_map.nside)
+    n_pix = int(np.asarray(mass_map.pixel).shape[0])
+    n_map = 4 if compute_map_derivatives else 1
+    if accumulator_path is None:
+        accumulator = np.zeros((n_map, n_pix), dtype=np.float64)
+    else:
+        accumulator = np.lib.format.open_memmap(
+            accumulator_path, mode="w+", dtype=np.float64, shape=(n_map, n_pix)
+        )
+        accumulator[...] = 0.0
+    static = sparse_kernel_static_args(
+        particle_mass_msun_h, pixel_area_sr, metadata, profile_params
+    )
+    n_chunk = 0
+    n_halo = 0
+    n_pair = 0
+    n_point = 0
+    for chunk in chunks:
+        validate_catalog_for_binning(chunk)
+        if chunk.size == 0:
+            continue
+        n_chunk += 1
+        n_halo += chunk.size
+        with timed_stage("NFW chunk rmax", profile):
+            rmax = nfw_stencil_rmax_mpc_h(
+                chunk,
+                metadata,
+                concentration_params,
+                profile_params,
+                taper_radius_factor,
+                rmax_policy=rmax_policy,
+                mass_loss_tolerance=rmax_mass_tolerance,
+            )
+        with timed_stage("NFW chunk sparse stencil", profile):
+            stencil = build_lightcone_sparse_stencil_healpix(
+                mass_map, chunk, rmax, subpixel_threshold=subpixel_threshold
+            )
+        n_pair += int(stencil.size)
+        n_point += int(stencil.n_point) if stencil.has_point_deposits else 0
+        padded_stencil, padded_catalog = bucketed_sparse_problem(stencil, chunk, bucket_policy)
+        paint = COMPILED_KERNELS.compiled(
+            "NFW particle map",
+            _paint_sparse_particle_counts,
+            padded_stencil,
+            padded_catalog,
+            concentration_params,
+            profile=profile,
+            **static,
+        )
+        with timed_stage("NFW chunk particle map", profile):
+            counts = paint(padded_stencil, padded_catalog, concentration_params)[:n_pix]
+            accumulator[0] += np.asarray(counts, dtype=np.float64)
+        if compute_map_derivatives:
+            derivatives = nfw_concentration_map_derivatives(
+                stencil,
+                chunk,
+                mass_map,
+                metadata,
+                particle_mass_msun_h,
+                float(concentration_params.amplitude),
+                float(concentration_params.mass_slope),
+                float(concentration_params.redshift_slope),
+                float(concentration_params.mass_pivot),
+                float(profile_params.truncation_width_fraction),
+                profile=profile,
+                projected_kernel=profile_params.projected_kernel,
+                bucket_policy=bucket_policy,
+            )
+            for row, name in enumerate(_CONCENTRATION_DERIVATIVE_NAMES, start=1):
+                accumulator[row] += derivatives[f"d_nfw_particle_counts_d_concentration_{name}"]
+    if isinstance(accumulator, np.memmap):
+        accumulator.flush()
+
+    result: dict[str, float | int | str | np.ndarray] = {
+        "nfw_paint_mode": "sparse-chunked",
+        "nfw_particle_counts": accumulator[0],
+        "nfw_sum_particle_counts": float(np.sum(accumulator[0])),
+        "nfw_chunk_count": n_chunk,
+        "nfw_selected_halo_count": n_halo,
+        "nfw_compact_pixel_count": n_pix,
+        "nfw_sparse_pair_count": n_pair,
+        "nfw_point_deposit_count": n_point,
+        "nfw_map_derivatives": "concentration" if compute_map_derivatives else "none",
+    }
+    if compute_map_derivatives:
+        for row, name in enumerate(_CONCENTRATION_DERIVATIVE_NAMES, start=1):
+            result[f"d_nfw_particle_counts_d_concentration_{name}"] = accumulator[row]
+            result[f"sum_d_nfw_particle_counts_d_concentration_{name}"] = float(
+                np.sum(accumulator[row])
+            )
+    return result
+
+
 def run_nfw_calibration_pipeline(
     catalog: LightconeHaloCatalog,
     mask: np.ndarray,
@@ -1006,12 +1642,20 @@ def run_nfw_calibration_pipeline(
     concentration_redshift_slope: float = -0.47,
     concentration_mass_pivot: float = 2.0e12,
     truncation_width_fraction: float = 0.05,
+    projected_kernel: str = "analytic",
     chunk_size: int | None = 1024,
     taper_radius_factor: float = 10.0,
+    rmax_policy: str = "fixed",
+    rmax_mass_tolerance: float = 1.0e-3,
     dense_demo: bool = False,
     compute_map_derivatives: bool = False,
     profile: bool = False,
     stencil_query_mode: str = "inclusive",
+    stencil_workers: int = 1,
+    stencil_cache_dir: Path | None = None,
+    stencil_layout: str = "halo",
+    stencil_bucket_growth: float | None = None,
+    stencil_subpixel_threshold: float | None = None,
     stencil_diagnostics: bool = False,
     stencil_compare_query_modes: bool = False,
 ) -> dict[str, bool | float | int | str | np.ndarray]:
@@ -1035,8 +1679,13 @@ def run_nfw_calibration_pipeline(
         raise ValueError("map-level concentration derivatives are only supported for sparse mode")
     if dense_demo and (stencil_diagnostics or stencil_compare_query_modes):
         raise ValueError("stencil diagnostics are only supported for sparse mode")
+    if stencil_subpixel_threshold is not None and stencil_query_mode != "ring":
+        raise ValueError("stencil_subpixel_threshold requires stencil_query_mode='ring'")
     if chunk_size is not None and chunk_size <= 0:
         chunk_size = None
+    bucket_policy = None
+    if stencil_bucket_growth is not None and not dense_demo:
+        bucket_policy = StencilBucketPolicy(growth=stencil_bucket_growth)
 
     with timed_stage("NFW selected catalogue", profile):
         selected_catalog = selected_lightcone_catalog(catalog, mask)
@@ -1053,11 +1702,13 @@ def run_nfw_calibration_pipeline(
         mass_pivot=concentration_mass_pivot,
     )
     profile_params = NFWProfileParams(
-        truncation_width_fraction=truncation_width_fraction
+        truncation_width_fraction=truncation_width_fraction,
+        projected_kernel=projected_kernel,
     )
     stencil = None
     stencil_diag = None
     comparison_diagnostics: dict[str, bool | float | int | str] = {}
+    rmax_comparison: dict[str, float | int] = {}
     nfw_particle_counts = None
     sparse_pair_count = dense_pair_count
     if not dense_demo:
@@ -1068,6 +1719,27 @@ def run_nfw_calibration_pipeline(
                 concentration_params,
                 profile_params,
                 taper_radius_factor,
+                rmax_policy=rmax_policy,
+                mass_loss_tolerance=rmax_mass_tolerance,
+            )
+        if rmax_policy == "adaptive" and stencil_diagnostics:
+            rmax_comparison = compare_stencil_rmax_policies(
+                mass_map,
+                selected_catalog,
+                nfw_stencil_rmax_mpc_h(
+                    selected_catalog,
+                    metadata,
+                    concentration_params,
+                    profile_params,
+                    taper_radius_factor,
+                ),
+                rmax,
+                metadata,
+                particle_mass_msun_h,
+                pixel_area_sr,
+                concentration_params,
+                profile_params,
+                profile=profile,
             )
         if stencil_compare_query_modes:
             nfw_particle_counts, stencil, comparison_diagnostics = compare_stencil_query_modes(
@@ -1083,22 +1755,38 @@ def run_nfw_calibration_pipeline(
             )
         else:
             with timed_stage("NFW local sparse stencil", profile):
-                stencil_result = build_lightcone_sparse_stencil_for_mass_map_local(
-                    mass_map,
-                    selected_catalog,
-                    rmax,
-                    query_mode=stencil_query_mode,
-                    collect_diagnostics=stencil_diagnostics,
-                )
+                if stencil_query_mode == "ring":
+                    stencil_result = build_lightcone_sparse_stencil_healpix(
+                        mass_map,
+                        selected_catalog,
+                        rmax,
+                        n_workers=stencil_workers,
+                        collect_diagnostics=stencil_diagnostics,
+                        cache_dir=stencil_cache_dir,
+                        subpixel_threshold=stencil_subpixel_threshold,
+                    )
+                else:
+                    stencil_result = build_lightcone_sparse_stencil_for_mass_map_local(
+                        mass_map,
+                        selected_catalog,
+                        rmax,
+                        query_mode=stencil_query_mode,
+                        collect_diagnostics=stencil_diagnostics,
+                    )
             if stencil_diagnostics:
                 stencil, stencil_diag = stencil_result
             else:
                 stencil = stencil_result
+        if stencil_layout == "pixel":
+            with timed_stage("NFW stencil pixel sort", profile):
+                stencil = sort_lightcone_sparse_stencil_by_pixel(stencil)
         sparse_pair_count = int(stencil.size)
         print("NFW sparse stencil:")
         print(f"  Selected halos: {n_halo}")
         print(f"  Compact pixels: {n_pix}")
         print(f"  Sparse halo-pixel pairs: {sparse_pair_count}")
+        if stencil.has_point_deposits:
+            print(f"  Sub-pixel point deposits: {stencil.n_point}")
         print(f"  Dense pair count: {dense_pair_count}")
         print(
             "  Sparse compression factor: "
@@ -1108,6 +1796,8 @@ def run_nfw_calibration_pipeline(
             print_stencil_diagnostics(stencil_diag)
         if comparison_diagnostics:
             print_stencil_query_mode_comparison(comparison_diagnostics)
+        if rmax_comparison:
+            print_stencil_rmax_policy_comparison(rmax_comparison)
     else:
         with timed_stage("NFW dense pixel vectors", profile):
             pixel_unit_vectors = jnp.asarray(
@@ -1129,17 +1819,46 @@ def run_nfw_calibration_pipeline(
             )
             nfw_particle_counts.block_until_ready()
     elif nfw_particle_counts is None:
-        with timed_stage("NFW particle map", profile):
-            assert stencil is not None
-            nfw_particle_counts = paint_lightcone_particle_count_map_sparse(
-                stencil,
+        assert stencil is not None
+        padded_stencil, padded_catalog = bucketed_sparse_problem(
+            stencil, selected_catalog, bucket_policy
+        )
+        static = sparse_kernel_static_args(
+            particle_mass_msun_h, pixel_area_sr, metadata, profile_params
+        )
+        # Pre-warm every executable this segment needs before running any of
+        # them, so compile time is reported apart from execution time.
+        paint = COMPILED_KERNELS.compiled(
+            "NFW particle map",
+            _paint_sparse_particle_counts,
+            padded_stencil,
+            padded_catalog,
+            concentration_params,
+            profile=profile,
+            **static,
+        )
+        if compute_map_derivatives:
+            theta, mass_pivot = concentration_jvp_inputs(
                 selected_catalog,
-                particle_mass_msun_h=particle_mass_msun_h,
-                pixel_area_sr=pixel_area_sr,
-                cosmology=metadata.cosmology,
-                concentration_params=concentration_params,
-                profile_params=profile_params,
+                concentration_amplitude,
+                concentration_mass_slope,
+                concentration_redshift_slope,
+                concentration_mass_pivot,
+            )
+            COMPILED_KERNELS.compiled(
+                "NFW map concentration JVPs",
+                _concentration_map_jvps,
+                padded_stencil,
+                padded_catalog,
+                theta,
+                mass_pivot,
+                profile=profile,
+                **static,
             )
+        with timed_stage("NFW particle map", profile):
+            nfw_particle_counts = paint(padded_stencil, padded_catalog, concentration_params)[
+                : stencil.n_pix
+            ]
             nfw_particle_counts.block_until_ready()
     else:
         nfw_particle_counts.block_until_ready()
@@ -1166,6 +1885,13 @@ def run_nfw_calibration_pipeline(
             concentration_mass_pivot=concentration_mass_pivot,
             truncation_width_fraction=truncation_width_fraction,
             profile=profile,
+            projected_kernel=projected_kernel,
+            bucket_policy=bucket_policy,
+        )
+    if not dense_demo:
+        print(
+            "NFW JIT compile cache: "
+            f"{COMPILED_KERNELS.hits} hits, {COMPILED_KERNELS.misses} misses (process total)"
         )
 
     diagnostics: dict[str, bool | float | int | str | np.ndarray] = {
@@ -1181,11 +1907,14 @@ def run_nfw_calibration_pipeline(
             dense_pair_count, sparse_pair_count
         ),
         "nfw_sum_particle_counts": float(total_counts),
-        "nfw_concentration_amplitude": float(concentration_amplitude),
-        "nfw_concentration_mass_slope": float(concentration_mass_slope),
-        "nfw_concentration_redshift_slope": float(concentration_redshift_slope),
-        "nfw_concentration_mass_pivot": float(concentration_mass_pivot),
-        "nfw_truncation_width_fraction": float(truncation_width_fraction),
+        **nfw_settings_diagnostics(
+            concentration_params,
+            profile_params,
+            bucket_policy=bucket_policy,
+            rmax_policy=rmax_policy,
+            rmax_mass_tolerance=rmax_mass_tolerance,
+            stencil_subpixel_threshold=stencil_subpixel_threshold,
+        ),
     }
     if stencil_diag is not None:
         diagnostics.update(stencil_diagnostics_to_dict(stencil_diag))
@@ -1218,6 +1947,7 @@ def run_nfw_calibration_pipeline(
                     ),
                 }
             )
+    diagnostics.update(rmax_comparison)
     diagnostics.update(map_derivative_diagnostics)
     return diagnostics
 
@@ -1470,13 +2200,118 @@ def write_manifest(path: Path, rows: list[dict[str, object]]) -> None:
     columns = list(base_columns)
     if any(any(column in row for column in derivative_columns) for row in rows):
         columns.extend(derivative_columns)
+    if any("segment_fingerprint" in row for row in rows):
+        columns.extend(_FINGERPRINT_COLUMNS)
 
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="") as handle:
+    # Write a sibling file and rename it so a killed run never leaves a torn manifest.
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("w", newline="") as handle:
         writer = csv.DictWriter(handle, fieldnames=columns)
         writer.writeheader()
         for row in rows:
             writer.writerow({column: row.get(column, "") for column in columns})
+    os.replace(tmp, path)
+
+
+def read_manifest(path: Path) -> dict[int, dict[str, str]]:
+    """Return existing manifest rows keyed by segment index, or ``{}`` if absent."""
+
+    if not path.is_file():
+        return {}
+    with path.open(newline="") as handle:
+        return {int(row["segment_index"]): row for row in csv.DictReader(handle)}
+
+
+def file_sha256(path: Path, chunk_bytes: int = 1 << 20) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        while chunk := handle.read(chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def lightcone_catalog_sha256(catalog: LightconeHaloCatalog) -> str:
+    """Return a SHA-256 digest of the loaded catalogue columns."""
+
+    digest = hashlib.sha256(b"geppetto.lightcone_catalog.v1")
+    for field in LightconeHaloCatalog._fields:
+        array = np.ascontiguousarray(np.asarray(getattr(catalog, field)))
+        digest.update(f"{field}:{array.dtype.str}:{array.shape!r}".encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def run_parameters_sha256(args: argparse.Namespace, metadata: PinocchioRunMetadata) -> str:
+    """Return a SHA-256 digest of every argument and run setting affecting outputs."""
+
+    settings = {
+        key: repr(value)
+        for key, value in sorted(vars(args).items())
+        if key not in _FINGERPRINT_EXCLUDED_ARGS
+    }
+    settings["particle_mass_msun_h"] = repr(float(metadata.particle_mass_msun_h))
+    settings["cosmology"] = repr(metadata.cosmology)
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def code_version() -> str:
+    """Return the GEPPETTO version tagged with a digest of this script."""
+
+    return f"{geppetto_version}+{file_sha256(Path(__file__))[:12]}"
+
+
+def segment_fingerprints(
+    segments: list[tuple[int, Path]],
+    inclusive_values: list[bool],
+    *,
+    catalog: LightconeHaloCatalog,
+    sheets: Any,
+    metadata: PinocchioRunMetadata,
+    args: argparse.Namespace,
+) -> list[dict[str, str]]:
+    """Return the manifest fingerprint columns of each segment.
+
+    ``segment_fingerprint`` combines the mass-map file hash, catalogue hash,
+    parameter hash, code version, and the segment's sheet bounds, so it changes
+    exactly when that segment's outputs would.
+    """
+
+    shared = {
+        "catalog_sha256": lightcone_catalog_sha256(catalog),
+        "parameters_sha256": run_parameters_sha256(args, metadata),
+        "code_version": code_version(),
+    }
+    fingerprints = []
+    for (segment_index, mass_map_path), inclusive_upper in zip(
+        segments, inclusive_values, strict=True
+    ):
+        fingerprint = {"mass_map_sha256": file_sha256(mass_map_path), **shared}
+        bounds = segment_bounds(sheets, segment_index)
+        key = json.dumps(
+            {**fingerprint, "bounds": bounds, "inclusive_upper": bool(inclusive_upper)},
+            sort_keys=True,
+        )
+        fingerprint["segment_fingerprint"] = hashlib.sha256(key.encode()).hexdigest()
+        fingerprints.append(fingerprint)
+    return fingerprints
+
+
+def segment_outputs_current(
+    row: dict[str, str] | None,
+    fingerprint: dict[str, str],
+    output_npz: Path,
+) -> bool:
+    """Return whether a manifest row records current outputs for a segment."""
+
+    return (
+        row is not None
+        and row.get("segment_fingerprint") == fingerprint["segment_fingerprint"]
+        and row.get("output_npz") == str(output_npz)
+        and output_npz.is_file()
+    )
 
 
 def _range_text(lo: float, hi: float, inclusive_upper: bool) -> str:
@@ -1559,6 +2394,278 @@ def print_nfw_calibration_summary(
         )
 
 
+def union_mass_map_domain(mass_maps: list[PinocchioMassMap]) -> PinocchioMassMap:
+    """Return a mass map whose compact pixels are the union of ``mass_maps``.
+
+    If every segment shares the first map's pixels, that map is returned so its
+    header-range pixel index is reused.
+    """
+
+    first = mass_maps[0]
+    for mass_map in mass_maps[1:]:
+        if mass_map.nside != first.nside or mass_map.ordering != first.ordering:
+            raise ValueError("all segment mass maps must share NSIDE and ORDERING")
+    if all(np.array_equal(mass_map.pixel, first.pixel) for mass_map in mass_maps[1:]):
+        return first
+    pixel = np.unique(np.concatenate([np.asarray(m.pixel, dtype=np.int64) for m in mass_maps]))
+    return dataclasses.replace(
+        first,
+        pixel=pixel,
+        temperature=np.zeros(pixel.shape, dtype=np.float64),
+        first_pixel=None,
+        last_pixel=None,
+    )
+
+
+def paint_segment_stack(
+    catalog: LightconeHaloCatalog,
+    segments: list[tuple[int, Path]],
+    inclusive_values: list[bool],
+    sheets: Any,
+    metadata: PinocchioRunMetadata,
+    particle_mass_msun_h: float,
+    args: argparse.Namespace,
+    *,
+    profile: bool = False,
+) -> list[tuple[PinocchioMassMap, dict[str, bool | float | int | str | np.ndarray]]]:
+    """Paint every segment's NFW map from one stencil over the union pixel domain.
+
+    Each segment's selected haloes are concatenated into one catalogue (a halo
+    selected by several segments appears once per segment), a single ring
+    stencil is built over the union of the segment pixel domains, and its pairs
+    are keyed by segment with
+    :func:`geppetto.io.stack_lightcone_sparse_stencil_by_segment`. One jitted
+    sparse paint then yields the ``(n_segment, n_pix)`` map stack, from which
+    each segment's compact pixels are gathered. Returns the mass map and NFW
+    diagnostics of every segment, in ``segments`` order.
+    """
+
+    if particle_mass_msun_h <= 0.0:
+        raise ValueError("particle_mass_msun_h must be positive")
+    mass_maps = []
+    halo_rows = []
+    for _, mass_map_path in segments:
+        with timed_stage("read mass map", profile):
+            mass_maps.append(read_validated_mass_map(mass_map_path))
+    for (segment_index, _), inclusive_upper in zip(segments, inclusive_values, strict=True):
+        mask = select_segment_mask(
+            catalog,
+            segment_bounds(sheets, segment_index),
+            mode=args.bounds,
+            inclusive_upper=inclusive_upper,
+        )
+        halo_rows.append(np.flatnonzero(mask))
+
+    n_segment = len(segments)
+    domain = union_mass_map_domain(mass_maps)
+    n_pix = len(domain)
+    halo_counts = np.array([rows.size for rows in halo_rows], dtype=np.int64)
+    halo_segment = np.repeat(np.arange(n_segment, dtype=np.int64), halo_counts)
+    take = np.concatenate(halo_rows)
+    with timed_stage("NFW selected catalogue", profile):
+        selected_catalog = LightconeHaloCatalog(
+            unit_vector=jnp.asarray(np.asarray(catalog.unit_vector)[take]),
+            chi=jnp.asarray(np.asarray(catalog.chi)[take]),
+            mass=jnp.asarray(np.asarray(catalog.mass)[take]),
+            redshift=jnp.asarray(np.asarray(catalog.redshift)[take]),
+        )
+    pixel_area_sr = healpix_pixel_area_sr(domain.nside)
+    concentration_params = ConcentrationParams(
+        amplitude=args.concentration_amplitude,
+        mass_slope=args.concentration_mass_slope,
+        redshift_slope=args.concentration_redshift_slope,
+        mass_pivot=args.concentration_mass_pivot,
+    )
+    profile_params = NFWProfileParams(
+        truncation_width_fraction=args.truncation_width_fraction,
+        projected_kernel=args.nfw_projected_kernel,
+    )
+    bucket_policy = None
+    if args.stencil_bucket_growth is not None:
+        bucket_policy = StencilBucketPolicy(growth=args.stencil_bucket_growth)
+
+    with timed_stage("NFW rmax", profile):
+        rmax = nfw_stencil_rmax_mpc_h(
+            selected_catalog,
+            metadata,
+            concentration_params,
+            profile_params,
+            args.nfw_taper_radius_factor,
+            rmax_policy=args.nfw_rmax_policy,
+            mass_loss_tolerance=args.nfw_rmax_mass_tolerance,
+        )
+    with timed_stage("NFW global sparse stencil", profile):
+        stencil = build_lightcone_sparse_stencil_healpix(
+            domain,
+            selected_catalog,
+            rmax,
+            n_workers=args.stencil_workers,
+            cache_dir=args.stencil_cache_dir,
+            subpixel_threshold=args.stencil_subpixel_threshold,
+        )
+        stacked = stack_lightcone_sparse_stencil_by_segment(stencil, halo_segment, n_segment)
+        if args.stencil_layout == "pixel":
+            stacked = sort_lightcone_sparse_stencil_by_pixel(stacked)
+    pair_counts = np.bincount(
+        halo_segment[np.asarray(stencil.halo_id)], minlength=n_segment
+    )
+    print("NFW global sparse stencil:")
+    print(f"  Segments: {n_segment}")
+    print(f"  Union compact pixels: {n_pix}")
+    print(f"  Segment-tagged halos: {int(halo_segment.size)}")
+    print(f"  Sparse halo-pixel pairs: {stencil.size}")
+
+    padded_stencil, padded_catalog = bucketed_sparse_problem(
+        stacked, selected_catalog, bucket_policy
+    )
+    paint = COMPILED_KERNELS.compiled(
+        "NFW segment-stack map",
+        _paint_sparse_particle_counts,
+        padded_stencil,
+        padded_catalog,
+        concentration_params,
+        profile=profile,
+        **sparse_kernel_static_args(
+            particle_mass_msun_h, pixel_area_sr, metadata, profile_params
+        ),
+    )
+    with timed_stage("NFW segment-stack map", profile):
+        flat_counts = paint(padded_stencil, padded_catalog, concentration_params)[: stacked.n_pix]
+        stack = np.asarray(flat_counts).reshape(n_segment, n_pix)
+
+    settings = nfw_settings_diagnostics(
+        concentration_params,
+        profile_params,
+        bucket_policy=bucket_policy,
+        rmax_policy=args.nfw_rmax_policy,
+        rmax_mass_tolerance=args.nfw_rmax_mass_tolerance,
+        stencil_subpixel_threshold=args.stencil_subpixel_threshold,
+    )
+    results = []
+    for slot, mass_map in enumerate(mass_maps):
+        counts = stack[slot, domain.pixel_index.rows(mass_map.pixel)]
+        dense_pair_count = int(halo_counts[slot]) * len(mass_map)
+        sparse_pair_count = int(pair_counts[slot])
+        results.append(
+            (
+                mass_map,
+                {
+                    "pipeline_mode": args.mode,
+                    "particle_mass_msun_h": float(particle_mass_msun_h),
+                    "nfw_particle_counts": counts,
+                    "nfw_paint_mode": "sparse-global",
+                    "nfw_selected_halo_count": int(halo_counts[slot]),
+                    "nfw_compact_pixel_count": len(mass_map),
+                    "nfw_sparse_pair_count": sparse_pair_count,
+                    "nfw_dense_pair_count": dense_pair_count,
+                    "nfw_sparse_compression_factor": _compression_factor(
+                        dense_pair_count, sparse_pair_count
+                    ),
+                    "nfw_sum_particle_counts": float(np.sum(counts)),
+                    "nfw_global_segment_count": n_segment,
+                    "nfw_global_union_pixel_count": n_pix,
+                    "nfw_global_pair_count": stencil.size,
+                    **settings,
+                    "nfw_map_derivatives": "none",
+                },
+            )
+        )
+    return results
+
+
+def read_validated_mass_map(path: Path) -> PinocchioMassMap:
+    """Read and validate one segment mass map."""
+
+    mass_map = read_pinocchio_mass_map_fits(path)
+    validate_mass_map(mass_map)
+    return mass_map
+
+
+def write_segment_outputs(
+    output_npz: Path,
+    output_fits: Path | None,
+    out: np.ndarray,
+    mass_map: PinocchioMassMap,
+    bounds: dict[str, float],
+    metadata: PinocchioRunMetadata,
+    diagnostics: dict[str, float | int | np.ndarray],
+    nfw_diagnostics: dict[str, bool | float | int | str | np.ndarray],
+    profile: bool = False,
+) -> None:
+    """Write the NPZ and optional NFW FITS outputs of one segment."""
+
+    with timed_stage("save NPZ", profile):
+        save_npz(output_npz, out, mass_map, bounds, metadata, diagnostics, nfw_diagnostics)
+    if output_fits is not None:
+        with timed_stage("write NFW FITS", profile):
+            write_nfw_painted_fits(
+                output_fits,
+                np.asarray(nfw_diagnostics["nfw_particle_counts"]),
+                mass_map,
+                bounds,
+                nfw_diagnostics,
+            )
+
+
+class SegmentIOPipeline:
+    """Overlap segment mass-map reads and output writes with painting.
+
+    One reader thread keeps up to ``depth`` mass maps read ahead of the segment
+    being painted, and one writer thread saves finished segments with at most
+    ``depth`` writes outstanding, so at most ``2 * depth + 1`` segments are held
+    in memory. NumPy, FITS and ``np.savez`` release the GIL during I/O, so the
+    main thread keeps dispatching JAX work meanwhile. Exceptions from either
+    thread are re-raised in the main thread when the result is collected.
+    """
+
+    def __init__(self, mass_map_paths: list[Path], depth: int) -> None:
+        if depth <= 0:
+            raise ValueError("depth must be positive")
+        self._paths = list(mass_map_paths)
+        self._depth = int(depth)
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-write")
+        self._reads: dict[int, Future] = {}
+        self._writes: deque[Future] = deque()
+        self._next_read = 0
+
+    def mass_map(self, position: int) -> PinocchioMassMap:
+        """Return the mass map of segment ``position`` and prefetch the next ones."""
+
+        self._next_read = max(self._next_read, position)
+        stop = min(len(self._paths), position + self._depth + 1)
+        while self._next_read < stop:
+            self._reads[self._next_read] = self._reader.submit(
+                read_validated_mass_map, self._paths[self._next_read]
+            )
+            self._next_read += 1
+        return self._reads.pop(position).result()
+
+    def submit_write(self, fn: Any, *args: Any) -> None:
+        """Queue ``fn(*args)`` on the writer, waiting while ``depth`` writes are pending."""
+
+        while len(self._writes) >= self._depth:
+            self._writes.popleft().result()
+        self._writes.append(self._writer.submit(fn, *args))
+
+    def drain(self) -> None:
+        """Wait for every queued write, re-raising the first failure."""
+
+        while self._writes:
+            self._writes.popleft().result()
+
+    def __enter__(self) -> SegmentIOPipeline:
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, traceback: Any) -> None:
+        try:
+            if exc_type is None:
+                self.drain()
+        finally:
+            self._reader.shutdown(wait=True, cancel_futures=True)
+            self._writer.shutdown(wait=True, cancel_futures=exc_type is not None)
+
+
 def run_calibration_for_segment(
     *,
     segment_index: int,
@@ -1573,16 +2680,25 @@ def run_calibration_for_segment(
     profile: bool,
     compute_map_derivatives: bool,
     inclusive_upper: bool,
+    mass_map: PinocchioMassMap | None = None,
+    nfw_diagnostics: dict[str, bool | float | int | str | np.ndarray] | None = None,
+    io_pipeline: SegmentIOPipeline | None = None,
 ) -> dict[str, object]:
-    """Run the complete NFW calibration pipeline for one mass-map segment."""
+    """Run the complete NFW calibration pipeline for one mass-map segment.
+
+    ``mass_map`` and ``nfw_diagnostics`` may be supplied from
+    :func:`paint_segment_stack`, in which case the map is not re-read and the
+    NFW pipeline is not run again for this segment. With ``io_pipeline`` the
+    NPZ/FITS outputs are written on its background writer thread.
+    """
 
     print(f"Processing segment {segment_index}: {mass_map_path}")
     with timed_stage("segment bounds", profile):
         bounds = segment_bounds(sheets, segment_index)
 
-    with timed_stage("read mass map", profile):
-        mass_map = read_pinocchio_mass_map_fits(mass_map_path)
-        validate_mass_map(mass_map)
+    if mass_map is None:
+        with timed_stage("read mass map", profile):
+            mass_map = read_validated_mass_map(mass_map_path)
 
     with timed_stage("select segment mask", profile):
         mask = select_segment_mask(
@@ -1619,46 +2735,60 @@ def run_calibration_for_segment(
             particle_mass,
             inside_pixel_domain,
         )
-    with timed_stage(nfw_stage_label(args.mode), profile):
-        nfw_diagnostics = run_nfw_calibration_pipeline(
-            catalog,
-            mask,
-            mass_map,
-            metadata,
-            particle_mass,
-            pipeline_mode=args.mode,
-            concentration_amplitude=args.concentration_amplitude,
-            concentration_mass_slope=args.concentration_mass_slope,
-            concentration_redshift_slope=args.concentration_redshift_slope,
-            concentration_mass_pivot=args.concentration_mass_pivot,
-            truncation_width_fraction=args.truncation_width_fraction,
-            chunk_size=args.nfw_chunk_size,
-            taper_radius_factor=args.nfw_taper_radius_factor,
-            dense_demo=args.nfw_dense_demo,
-            compute_map_derivatives=compute_map_derivatives,
-            profile=profile,
-            stencil_query_mode=args.stencil_query_mode,
-            stencil_diagnostics=args.stencil_diagnostics,
-            stencil_compare_query_modes=args.stencil_compare_query_modes,
-        )
-
-    with timed_stage("save NPZ", profile):
-        save_npz(output_npz, out, mass_map, bounds, metadata, diagnostics, nfw_diagnostics)
-    if output_fits is not None:
-        with timed_stage("write NFW FITS", profile):
-            write_nfw_painted_fits(
-                output_fits,
-                np.asarray(nfw_diagnostics["nfw_particle_counts"]),
+    if nfw_diagnostics is None:
+        with timed_stage(nfw_stage_label(args.mode), profile):
+            nfw_diagnostics = run_nfw_calibration_pipeline(
+                catalog,
+                mask,
                 mass_map,
-                bounds,
-                nfw_diagnostics,
+                metadata,
+                particle_mass,
+                pipeline_mode=args.mode,
+                concentration_amplitude=args.concentration_amplitude,
+                concentration_mass_slope=args.concentration_mass_slope,
+                concentration_redshift_slope=args.concentration_redshift_slope,
+                concentration_mass_pivot=args.concentration_mass_pivot,
+                truncation_width_fraction=args.truncation_width_fraction,
+                projected_kernel=args.nfw_projected_kernel,
+                chunk_size=args.nfw_chunk_size,
+                taper_radius_factor=args.nfw_taper_radius_factor,
+                rmax_policy=args.nfw_rmax_policy,
+                rmax_mass_tolerance=args.nfw_rmax_mass_tolerance,
+                dense_demo=args.nfw_dense_demo,
+                compute_map_derivatives=compute_map_derivatives,
+                profile=profile,
+                stencil_query_mode=args.stencil_query_mode,
+                stencil_workers=args.stencil_workers,
+                stencil_cache_dir=args.stencil_cache_dir,
+                stencil_layout=args.stencil_layout,
+                stencil_bucket_growth=args.stencil_bucket_growth,
+                stencil_subpixel_threshold=args.stencil_subpixel_threshold,
+                stencil_diagnostics=args.stencil_diagnostics,
+                stencil_compare_query_modes=args.stencil_compare_query_modes,
             )
 
+    write_args = (
+        output_npz,
+        output_fits,
+        out,
+        mass_map,
+        bounds,
+        metadata,
+        diagnostics,
+        nfw_diagnostics,
+        profile,
+    )
+    if io_pipeline is None:
+        write_segment_outputs(*write_args)
+    else:
+        io_pipeline.submit_write(write_segment_outputs, *write_args)
+
     print_output_summary(diagnostics, out, mass_map)
     print_nfw_calibration_summary(nfw_diagnostics)
-    print(f"Wrote NPZ: {output_npz}")
+    written = "Wrote" if io_pipeline is None else "Queued"
+    print(f"{written} NPZ: {output_npz}")
     if output_fits is not None:
-        print(f"Wrote NFW FITS: {output_fits}")
+        print(f"{written} NFW FITS: {output_fits}")
 
     row: dict[str, object] = {
         "segment_index": int(segment_index),
@@ -1688,6 +2818,135 @@ def run_calibration_for_segment(
     return row
 
 
+def share_lightcone_catalog(
+    catalog: LightconeHaloCatalog,
+) -> tuple[list[SharedMemory], dict[str, tuple[str, tuple[int, ...], str]]]:
+    """Copy catalogue columns into shared memory for segment worker processes.
+
+    Returns the owning handles, which the caller must close and unlink, and the
+    ``{field: (name, shape, dtype)}`` specs passed to
+    :func:`attach_lightcone_catalog`.
+    """
+
+    handles: list[SharedMemory] = []
+    specs = {}
+    try:
+        for field in LightconeHaloCatalog._fields:
+            array = np.ascontiguousarray(np.asarray(getattr(catalog, field)))
+            handle = SharedMemory(create=True, size=max(array.nbytes, 1))
+            handles.append(handle)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=handle.buf)[...] = array
+            specs[field] = (handle.name, array.shape, array.dtype.str)
+    except BaseException:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
+        raise
+    return handles, specs
+
+
+def attach_lightcone_catalog(
+    specs: dict[str, tuple[str, tuple[int, ...], str]],
+) -> tuple[list[SharedMemory], LightconeHaloCatalog]:
+    """Return a read-only catalogue viewing shared-memory columns.
+
+    The returned handles must stay open while the catalogue is in use.
+    """
+
+    handles = [SharedMemory(name=name) for name, _, _ in specs.values()]
+    columns = {}
+    for (field, (_, shape, dtype)), handle in zip(specs.items(), handles, strict=True):
+        column = np.ndarray(shape, dtype=np.dtype(dtype), buffer=handle.buf)
+        column.flags.writeable = False
+        columns[field] = column
+    return handles, LightconeHaloCatalog(**columns)
+
+
+def segment_worker_cpu_sets(n_workers: int) -> list[tuple[int, ...]]:
+    """Split the CPUs available to this process into one set per segment worker."""
+
+    if hasattr(os, "sched_getaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+    else:
+        cpus = list(range(os.cpu_count() or 1))
+    return [tuple(int(cpu) for cpu in chunk) for chunk in np.array_split(cpus, n_workers)]
+
+
+def _init_segment_worker(
+    cpu_sets: Any,
+    catalog_specs: dict[str, tuple[str, tuple[int, ...], str]],
+    context: dict[str, Any],
+) -> None:
+    """Process-pool initializer pinning CPUs and attaching the shared catalogue."""
+
+    cpus = cpu_sets.get()
+    # XLA sizes its CPU thread pool from the affinity mask when the backend starts,
+    # so pinning before the first computation bounds each worker's threads.
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if len(cpus) <= 1:
+        os.environ["XLA_FLAGS"] = " ".join(
+            [os.environ.get("XLA_FLAGS", ""), "--xla_cpu_multi_thread_eigen=false"]
+        ).strip()
+    if context["args"].jax_cache_dir is not None:
+        enable_persistent_compilation_cache(context["args"].jax_cache_dir)
+    handles, catalog = attach_lightcone_catalog(catalog_specs)
+    _SEGMENT_WORKER_STATE.update(handles=handles, catalog=catalog, context=context)
+
+
+def _run_segment_in_worker(task: dict[str, Any]) -> dict[str, object]:
+    """Process-pool entry point running one segment on the shared catalogue."""
+
+    return run_calibration_for_segment(
+        catalog=_SEGMENT_WORKER_STATE["catalog"],
+        **_SEGMENT_WORKER_STATE["context"],
+        **task,
+    )
+
+
+def run_segments_in_workers(
+    tasks: list[dict[str, Any]],
+    *,
+    n_workers: int,
+    catalog: LightconeHaloCatalog,
+    context: dict[str, Any],
+    on_row: Any = None,
+) -> list[dict[str, object]]:
+    """Run independent segment calibrations in a process pool.
+
+    The catalogue columns are copied once into shared memory and viewed
+    read-only by every worker, and each worker is pinned to a disjoint CPU set
+    so the per-process XLA thread pools do not oversubscribe the machine. Rows
+    are returned in task order, independent of completion order; ``on_row`` is
+    called with each task index and row as soon as that segment finishes.
+    """
+
+    n_workers = min(n_workers, len(tasks))
+    # ``spawn`` avoids forking a process that may already hold JAX threads.
+    mp_context = multiprocessing.get_context("spawn")
+    cpu_sets = mp_context.Queue()
+    for cpus in segment_worker_cpu_sets(n_workers):
+        cpu_sets.put(cpus)
+    handles, specs = share_lightcone_catalog(catalog)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp_context,
+            initializer=_init_segment_worker,
+            initargs=(cpu_sets, specs, context),
+        ) as pool:
+            futures = [pool.submit(_run_segment_in_worker, task) for task in tasks]
+            if on_row is not None:
+                positions = {future: position for position, future in enumerate(futures)}
+                for future in as_completed(futures):
+                    on_row(positions[future], future.result())
+            return [future.result() for future in futures]
+    finally:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
+
+
 def run_segment_workflow(
     args: argparse.Namespace,
     *,
@@ -1719,36 +2978,121 @@ def run_segment_workflow(
     else:
         raise ValueError("workflow must be 'single' or 'all'")
 
-    manifest_rows = []
-    for (segment_index, mass_map_path), (output_npz, output_fits), inclusive_upper in zip(
-        segments,
-        output_specs,
-        inclusive_values,
-        strict=True,
-    ):
-        manifest_rows.append(
-            run_calibration_for_segment(
-                segment_index=segment_index,
-                mass_map_path=mass_map_path,
-                output_npz=output_npz,
-                output_fits=output_fits,
+    manifest_path = None
+    fingerprints: list[dict[str, str]] = [{} for _ in segments]
+    manifest: dict[int, dict[str, object]] = {}
+    if workflow == "all":
+        manifest_path = Path(args.output_dir) / "painted_nfw_manifest.csv"
+        with timed_stage("fingerprint segment inputs", profile):
+            fingerprints = segment_fingerprints(
+                segments,
+                inclusive_values,
                 catalog=catalog,
                 sheets=sheets,
                 metadata=metadata,
-                particle_mass=particle_mass,
                 args=args,
+            )
+        if args.resume:
+            previous = read_manifest(manifest_path)
+            stale = []
+            for position, ((segment_index, _), (output_npz, _)) in enumerate(
+                zip(segments, output_specs, strict=True)
+            ):
+                row = previous.get(segment_index)
+                if segment_outputs_current(row, fingerprints[position], output_npz):
+                    manifest[segment_index] = row
+                    print(f"Segment {segment_index:03d} is current; skipping")
+                else:
+                    stale.append(position)
+            segments = [segments[position] for position in stale]
+            output_specs = [output_specs[position] for position in stale]
+            inclusive_values = [inclusive_values[position] for position in stale]
+            fingerprints = [fingerprints[position] for position in stale]
+
+    def record_row(position: int, row: dict[str, object]) -> None:
+        # Rewrite the manifest after every finished segment so a restart resumes.
+        row.update(fingerprints[position])
+        if manifest_path is not None:
+            manifest[int(row["segment_index"])] = row
+            write_manifest(manifest_path, [manifest[key] for key in sorted(manifest)])
+
+    precomputed: list[dict[str, Any]] = [{} for _ in segments]
+    if workflow == "all" and args.global_stencil and segments:
+        with timed_stage("NFW global segment stack", profile):
+            stack = paint_segment_stack(
+                catalog,
+                segments,
+                inclusive_values,
+                sheets,
+                metadata,
+                particle_mass,
+                args,
                 profile=profile,
-                compute_map_derivatives=compute_map_derivatives,
-                inclusive_upper=inclusive_upper,
             )
+        precomputed = [
+            {"mass_map": mass_map, "nfw_diagnostics": nfw_diagnostics}
+            for mass_map, nfw_diagnostics in stack
+        ]
+
+    tasks = [
+        {
+            "segment_index": segment_index,
+            "mass_map_path": mass_map_path,
+            "output_npz": output_npz,
+            "output_fits": output_fits,
+            "inclusive_upper": inclusive_upper,
+            **extra,
+        }
+        for (segment_index, mass_map_path), (output_npz, output_fits), inclusive_upper, extra in (
+            zip(segments, output_specs, inclusive_values, precomputed, strict=True)
         )
-
-    if workflow == "all":
-        manifest_path = Path(args.output_dir) / "painted_nfw_manifest.csv"
+    ]
+    context = {
+        "sheets": sheets,
+        "metadata": metadata,
+        "particle_mass": particle_mass,
+        "args": args,
+        "profile": profile,
+        "compute_map_derivatives": compute_map_derivatives,
+    }
+    if args.workers > 1 and len(tasks) > 1:
+        with timed_stage("NFW segment worker pool", profile):
+            run_segments_in_workers(
+                tasks,
+                n_workers=args.workers,
+                catalog=catalog,
+                context=context,
+                on_row=record_row,
+            )
+    else:
+        io_context = (
+            SegmentIOPipeline([path for _, path in segments], args.prefetch_depth)
+            if args.prefetch_depth > 0
+            else nullcontext()
+        )
+        with io_context as io_pipeline:
+            for position, task in enumerate(tasks):
+                if io_pipeline is not None and "mass_map" not in task:
+                    task = {**task, "mass_map": io_pipeline.mass_map(position)}
+                row = run_calibration_for_segment(
+                    catalog=catalog,
+                    io_pipeline=io_pipeline,
+                    **context,
+                    **task,
+                )
+                if io_pipeline is None:
+                    record_row(position, row)
+                else:
+                    # Queued behind this segment's writes, so the row lands after its files.
+                    io_pipeline.submit_write(record_row, position, row)
+                if manifest_path is None:
+                    manifest[position] = row
+
+    if manifest_path is not None:
         with timed_stage("write manifest", profile):
-            write_manifest(manifest_path, manifest_rows)
+            write_manifest(manifest_path, [manifest[key] for key in sorted(manifest)])
         print(f"Wrote manifest: {manifest_path}")
-    return manifest_rows
+    return [manifest[key] for key in sorted(manifest)]
 
 
 def main() -> None:
@@ -1758,6 +3102,8 @@ def main() -> None:
     workflow = validate_segment_workflow_args(args)
     profile = args.mode in ("profile", "derivatives-profile")
     compute_map_derivatives = args.mode in ("derivatives", "derivatives-profile")
+    if args.jax_cache_dir is not None:
+        enable_persistent_compilation_cache(args.jax_cache_dir)
 
     with timed_stage("read parameter file", profile):
         metadata = read_pinocchio_parameter_file(args.params)
@@ -1773,9 +3119,13 @@ def main() -> None:
 
     with timed_stage("read sheets", profile):
         sheets = read_pinocchio_mass_sheets(args.sheets)
+    t0 = perf_counter()
     with timed_stage("load PLC catalogue", profile):
         catalog = load_lightcone_catalog(args)
         validate_catalog_for_binning(catalog)
+    if profile:
+        rate = catalog.size / max(perf_counter() - t0, 1.0e-12)
+        print(f"[profile] {'PLC catalogue read rate':<40s} {rate:9.3g} rows/s")
 
     run_segment_workflow(
         args,
@@ -0,0 +1,73 @@
+"""Benchmark the tabulated projected-NFW kernel against the closed form.
+
+The script times the jitted forward pass and the gradient of a sum over
+``n_pairs`` random dimensionless radii for both ``NFWProfileParams`` kernel
+modes, and reports the maximum relative error of each against the float64
+reference ``F(x)``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from time import perf_counter
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from geppetto.profiles import (
+    NFWProfileParams,
+    _projected_nfw_kernel_for,
+    _projected_nfw_kernel_numpy,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-pairs", type=int, default=10_000_000)
+    parser.add_argument("--x-min", type=float, default=1.0e-4)
+    parser.add_argument("--x-max", type=float, default=1.0e3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def best_time(fn, x: jax.Array, repeat: int) -> float:
+    jax.block_until_ready(fn(x))
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        jax.block_until_ready(fn(x))
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    x_np = np.exp(rng.uniform(np.log(args.x_min), np.log(args.x_max), args.n_pairs))
+    x = jnp.asarray(x_np, dtype=jnp.float32)
+    reference, _ = _projected_nfw_kernel_numpy(np.asarray(x, dtype=np.float64))
+
+    print(f"n_pairs={args.n_pairs} x in [{args.x_min:g}, {args.x_max:g}]")
+    results = {}
+    for mode in ("analytic", "table"):
+        kernel = _projected_nfw_kernel_for(NFWProfileParams(projected_kernel=mode))
+        forward = jax.jit(kernel)
+        backward = jax.jit(jax.grad(lambda values, kernel=kernel: jnp.sum(kernel(values))))
+        values = np.asarray(forward(x), dtype=np.float64)
+        results[mode] = (
+            best_time(forward, x, args.repeat),
+            best_time(backward, x, args.repeat),
+            float(np.max(np.abs(values / reference - 1.0))),
+        )
+        fwd, bwd, err = results[mode]
+        print(f"{mode:>8}: forward {fwd * 1e3:9.2f} ms  grad {bwd * 1e3:9.2f} ms  max rel err {err:.3e}")
+
+    speedup_fwd = results["analytic"][0] / results["table"][0]
+    speedup_bwd = results["analytic"][1] / results["table"][1]
+    print(f" speedup: forward {speedup_fwd:.2f}x  grad {speedup_bwd:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark pair-to-pixel reductions for sparse lightcone stencils.
+
+The script draws ``n_pairs`` random pair values on ``n_pix`` pixels and times
+the jitted reduction, plus its gradient, for four layouts: the unsorted
+scatter-add used by halo-ordered stencils, the same scatter-add on pixel-sorted
+indices, the sorted ``jax.ops.segment_sum`` used by CSR stencils, and a
+scatter-free CSR reduction that differences a cumulative sum at the row
+offsets. Each result is compared with a float64 ``np.bincount`` reference.
+"""
+
+from __future__ import annotations
+
+import argparse
+from time import perf_counter
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n-pairs", type=int, default=10_000_000)
+    parser.add_argument("--n-pix", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def best_time(fn, values: jax.Array, repeat: int) -> float:
+    jax.block_until_ready(fn(values))
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        jax.block_until_ready(fn(values))
+        times.append(perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    n_pix = args.n_pix
+    pix_id_np = rng.integers(0, n_pix, args.n_pairs, dtype=np.int32)
+    values_np = rng.uniform(0.0, 1.0, args.n_pairs).astype(np.float32)
+    order = np.argsort(pix_id_np, kind="stable")
+    offsets_np = np.zeros((n_pix + 1,), dtype=np.int32)
+    np.cumsum(np.bincount(pix_id_np, minlength=n_pix), out=offsets_np[1:])
+    reference = np.bincount(pix_id_np, weights=values_np.astype(np.float64), minlength=n_pix)
+
+    pix_id = jnp.asarray(pix_id_np)
+    sorted_pix_id = jnp.asarray(pix_id_np[order])
+    offsets = jnp.asarray(offsets_np)
+    values = jnp.asarray(values_np)
+    sorted_values = jnp.asarray(values_np[order])
+
+    def csr_cumsum(v):
+        # Scatter-free, but float32 prefix sums lose precision for long inputs.
+        prefix = jnp.concatenate([jnp.zeros((1,), v.dtype), jnp.cumsum(v)])
+        return prefix[offsets[1:]] - prefix[offsets[:-1]]
+
+    reductions = {
+        "unsorted scatter": (
+            lambda v: jnp.zeros((n_pix,), v.dtype).at[pix_id].add(v),
+            values,
+        ),
+        "sorted scatter": (
+            lambda v: jnp.zeros((n_pix,), v.dtype).at[sorted_pix_id].add(v, indices_are_sorted=True),
+            sorted_values,
+        ),
+        "sorted segment_sum": (
+            lambda v: jax.ops.segment_sum(v, sorted_pix_id, num_segments=n_pix, indices_are_sorted=True),
+            sorted_values,
+        ),
+        "CSR cumsum": (csr_cumsum, sorted_values),
+    }
+
+    print(f"n_pairs={args.n_pairs} n_pix={n_pix}")
+    baseline = None
+    for name, (reduce, inputs) in reductions.items():
+        forward = jax.jit(reduce)
+        weights = jnp.asarray(rng.uniform(0.0, 1.0, n_pix).astype(np.float32))
+        backward = jax.jit(
+            jax.grad(lambda v, reduce=reduce, weights=weights: jnp.sum(reduce(v) * weights))
+        )
+        result = np.asarray(forward(inputs), dtype=np.float64)
+        fwd = best_time(forward, inputs, args.repeat)
+        bwd = best_time(backward, inputs, args.repeat)
+        err = float(np.max(np.abs(result - reference)) / max(np.max(np.abs(reference)), 1.0e-300))
+        if baseline is None:
+            baseline = fwd
+        print(
+            f"{name:>18}: forward {fwd * 1e3:9.2f} ms  grad {bwd * 1e3:9.2f} ms  "
+            f"speedup {baseline / fwd:5.2f}x  max rel err {err:.3e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """GEPPETTO: differentiable one-halo profile painting for PINOCCHIO catalogues."""
 
 from geppetto.catalog import (
+    BoxSparseStencil,
     HaloCatalog,
     LightconeHaloCatalog,
     LightconeSparseStencil,
@@ -9,9 +10,13 @@ from geppetto.catalog import (
 from geppetto.concentration import ConcentrationParams, duffy08_all_200c, duffy08_relaxed_200c
 from geppetto.cosmology import Cosmology
 from geppetto.painters import (
+    box_fft_binning_error,
     density_at_points,
     density_at_points_chunked,
+    one_halo_power_spectrum,
     paint_box_density_grid,
+    paint_box_density_grid_fft,
+    paint_box_density_grid_sparse,
     paint_lightcone_particle_count_map,
     paint_lightcone_particle_count_map_sparse,
     paint_lightcone_particle_count_map_tabulated_sparse,
@@ -22,6 +27,7 @@ from geppetto.painters import (
 from geppetto.profiles import NFWProfileParams, TabulatedProjectedProfileParams
 
 __all__ = [
+    "BoxSparseStencil",
     "ConcentrationParams",
     "Cosmology",
     "HaloCatalog",
@@ -29,12 +35,16 @@ __all__ = [
     "LightconeSparseStencil",
     "NFWProfileParams",
     "TabulatedProjectedProfileParams",
+    "box_fft_binning_error",
     "density_at_points",
     "density_at_points_chunked",
     "duffy08_all_200c",
     "duffy08_relaxed_200c",
     "from_spherical_lightcone",
+    "one_halo_power_spectrum",
     "paint_box_density_grid",
+    "paint_box_density_grid_fft",
+    "paint_box_density_grid_sparse",
     "paint_lightcone_particle_count_map",
     "paint_lightcone_particle_count_map_sparse",
     "paint_lightcone_particle_count_map_tabulated_sparse",
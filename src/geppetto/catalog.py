@@ -7,11 +7,14 @@ differentiated and transformed with ``jax.jit``, ``jax.grad``, ``jax.vmap`` and
 
 from __future__ import annotations
 
+import json
 from dataclasses import dataclass
+from pathlib import Path
 from typing import NamedTuple
 
 import jax
 import jax.numpy as jnp
+import numpy as np
 
 from geppetto.types import Array
 
@@ -90,32 +93,175 @@ class LightconeSparseStencil:
         differentiable painter kernels.
     n_pix:
         Number of pixels in the output one-dimensional map.
+    pix_offsets:
+        Optional CSR row offsets, shape ``(n_pix + 1,)``. When present, pairs
+        are sorted by ``pix_id`` and the pairs of pixel ``p`` occupy
+        ``pix_offsets[p]:pix_offsets[p + 1]``; sparse painters then reduce with
+        a sorted segment sum instead of an unsorted scatter-add. Build it with
+        :func:`geppetto.io.sort_lightcone_sparse_stencil_by_pixel`.
+    point_pix_id, point_halo_id:
+        Optional direct deposits, both of shape ``(n_point,)``. Each entry adds
+        the whole projected mass of halo ``point_halo_id`` to pixel
+        ``point_pix_id`` instead of evaluating a profile on stencil pairs; the
+        HEALPix builder uses them for haloes smaller than a map pixel.
     """
 
     pix_id: Array
     halo_id: Array
     r_perp: Array
     n_pix: int
+    pix_offsets: Array | None = None
+    point_pix_id: Array | None = None
+    point_halo_id: Array | None = None
 
     def __post_init__(self) -> None:
         object.__setattr__(self, "n_pix", int(self.n_pix))
 
-    def tree_flatten(self) -> tuple[tuple[Array, Array, Array], int]:
+    def tree_flatten(self) -> tuple[tuple[Array | None, ...], int]:
         """Keep ``n_pix`` static for ``jax.jit`` output-shape construction."""
 
-        return (self.pix_id, self.halo_id, self.r_perp), self.n_pix
+        children = (
+            self.pix_id,
+            self.halo_id,
+            self.r_perp,
+            self.pix_offsets,
+            self.point_pix_id,
+            self.point_halo_id,
+        )
+        return children, self.n_pix
 
     @classmethod
     def tree_unflatten(
-        cls, n_pix: int, children: tuple[Array, Array, Array]
+        cls, n_pix: int, children: tuple[Array | None, ...]
     ) -> LightconeSparseStencil:
-        pix_id, halo_id, r_perp = children
-        return cls(pix_id=pix_id, halo_id=halo_id, r_perp=r_perp, n_pix=n_pix)
+        pix_id, halo_id, r_perp, pix_offsets, point_pix_id, point_halo_id = children
+        return cls(
+            pix_id=pix_id,
+            halo_id=halo_id,
+            r_perp=r_perp,
+            n_pix=n_pix,
+            pix_offsets=pix_offsets,
+            point_pix_id=point_pix_id,
+            point_halo_id=point_halo_id,
+        )
 
     @property
     def size(self) -> int:
         return int(self.r_perp.shape[0])
 
+    @property
+    def is_pixel_sorted(self) -> bool:
+        return self.pix_offsets is not None
+
+    @property
+    def has_point_deposits(self) -> bool:
+        return self.point_pix_id is not None
+
+    @property
+    def n_point(self) -> int:
+        return 0 if self.point_pix_id is None else int(self.point_pix_id.shape[0])
+
+    def save(self, path: str | Path) -> Path:
+        """Write the stencil as a directory of ``.npy`` arrays.
+
+        The directory holds ``pix_id.npy``, ``halo_id.npy``, ``r_perp.npy``,
+        one ``.npy`` file per optional field that is set, and a
+        ``stencil.json`` header with ``n_pix``. Plain ``.npy`` files keep the
+        pair arrays memory-mappable by :meth:`load`.
+        """
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name in _LIGHTCONE_STENCIL_FIELDS:
+            np.save(path / f"{name}.npy", np.asarray(getattr(self, name)), allow_pickle=False)
+        for name in _LIGHTCONE_STENCIL_OPTIONAL_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                np.save(path / f"{name}.npy", np.asarray(value), allow_pickle=False)
+            elif (path / f"{name}.npy").exists():
+                (path / f"{name}.npy").unlink()
+        header = {"format": "geppetto.LightconeSparseStencil", "version": 1, "n_pix": self.n_pix}
+        (path / "stencil.json").write_text(json.dumps(header) + "\n")
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path, *, mmap: bool = True) -> LightconeSparseStencil:
+        """Read a stencil written by :meth:`save`.
+
+        With ``mmap=True`` the pair arrays are read-only NumPy memory maps, so
+        loading is independent of the pair count; pages are read on first use.
+        """
+
+        path = Path(path)
+        header = json.loads((path / "stencil.json").read_text())
+        if header.get("format") != "geppetto.LightconeSparseStencil" or header.get("version") != 1:
+            raise ValueError(f"{path} is not a saved LightconeSparseStencil")
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _LIGHTCONE_STENCIL_FIELDS
+        }
+        for name in _LIGHTCONE_STENCIL_OPTIONAL_FIELDS:
+            field_path = path / f"{name}.npy"
+            if field_path.is_file():
+                arrays[name] = np.load(field_path, mmap_mode=mmap_mode, allow_pickle=False)
+        return cls(**arrays, n_pix=int(header["n_pix"]))
+
+
+_LIGHTCONE_STENCIL_FIELDS = ("pix_id", "halo_id", "r_perp")
+_LIGHTCONE_STENCIL_OPTIONAL_FIELDS = ("pix_offsets", "point_pix_id", "point_halo_id")
+
+
+@jax.tree_util.register_pytree_node_class
+@dataclass(frozen=True)
+class BoxSparseStencil:
+    """Sparse comoving-box cell-halo stencil for one-halo grid painting.
+
+    Parameters
+    ----------
+    cell_id:
+        Flattened output-cell index for each retained cell-halo pair, shape
+        ``(n_pair,)``. Cells follow the C-ordered ``(nmesh, nmesh, nmesh)``
+        layout used by :func:`geppetto.geometry.box_grid_positions`.
+    halo_id:
+        Halo index into a ``HaloCatalog`` for each retained pair, shape
+        ``(n_pair,)``.
+    r:
+        Comoving separation between the cell centre and the halo in ``Mpc/h``,
+        shape ``(n_pair,)``. The stencil builder fixes these geometry values
+        outside differentiable painter kernels.
+    nmesh:
+        Number of cells per box side.
+    """
+
+    cell_id: Array
+    halo_id: Array
+    r: Array
+    nmesh: int
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "nmesh", int(self.nmesh))
+
+    def tree_flatten(self) -> tuple[tuple[Array, Array, Array], int]:
+        """Keep ``nmesh`` static for ``jax.jit`` output-shape construction."""
+
+        return (self.cell_id, self.halo_id, self.r), self.nmesh
+
+    @classmethod
+    def tree_unflatten(
+        cls, nmesh: int, children: tuple[Array, Array, Array]
+    ) -> BoxSparseStencil:
+        cell_id, halo_id, r = children
+        return cls(cell_id=cell_id, halo_id=halo_id, r=r, nmesh=nmesh)
+
+    @property
+    def n_cell(self) -> int:
+        return self.nmesh**3
+
+    @property
+    def size(self) -> int:
+        return int(self.r.shape[0])
+
 
 def unit_vectors_from_angles(theta: Array, phi: Array) -> Array:
     """Convert spherical angles to unit vectors.
@@ -7,25 +7,44 @@ resulting catalogue objects to ``geppetto.painters``.
 
 from __future__ import annotations
 
+import hashlib
 import math
+import multiprocessing
+import os
 import re
-from collections.abc import Mapping
+import shutil
+import tempfile
+import warnings
+from collections.abc import Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
-from io import StringIO
+from functools import cached_property, lru_cache
+from io import BytesIO
+from itertools import accumulate, repeat
+from multiprocessing.shared_memory import SharedMemory
 from pathlib import Path
+from time import perf_counter
 from typing import Any, Literal
 
 import jax.numpy as jnp
 import numpy as np
 
 from geppetto.catalog import (
+    BoxSparseStencil,
     HaloCatalog,
     LightconeHaloCatalog,
     LightconeSparseStencil,
     unit_vectors_from_angles,
 )
+from geppetto.concentration import ConcentrationParams
 from geppetto.cosmology import Cosmology, rho_mean_comoving
-from geppetto.profiles import TabulatedProjectedProfileParams
+from geppetto.profiles import (
+    DEFAULT_NFW_PROFILE_PARAMS,
+    NFWProfileParams,
+    TabulatedProjectedProfileParams,
+    _projected_nfw_kernel_numpy,
+    nfw_scale_radius_and_density,
+)
 
 
 class PinocchioCatalogError(ValueError):
@@ -37,6 +56,66 @@ CatalogFormat = Literal["auto", "ascii", "binary"]
 PositionMode = Literal["initial", "final"]
 LightconeRedshiftMode = Literal["true", "observed"]
 _C_LIGHT_KM_S = 299_792.458
+# Bytes of ASCII table text parsed per block.
+_ASCII_BLOCK_BYTES = 1 << 22
+
+# Catalogue fields mapped to binary record fields and ASCII table columns, in
+# dataclass order. Masses are always read because they define the catalogue
+# length and are validated.
+_SNAPSHOT_BINARY_FIELDS = {
+    "group_ids": "name",
+    "masses_msun_h": "Mass",
+    "initial_positions_mpc_h": "posin",
+    "final_positions_mpc_h": "pos",
+    "velocities_km_s": "vel",
+    "n_particles": "npart",
+}
+_SNAPSHOT_ASCII_COLUMNS = {
+    "group_ids": 0,
+    "masses_msun_h": 1,
+    "initial_positions_mpc_h": slice(2, 5),
+    "final_positions_mpc_h": slice(5, 8),
+    "velocities_km_s": slice(8, 11),
+    "n_particles": 11,
+}
+_LIGHTCONE_BINARY_FIELDS = {
+    "group_ids": "name",
+    "true_redshift": "truez",
+    "positions_mpc_h": "pos",
+    "velocities_km_s": "vel",
+    "masses_msun_h": "Mass",
+    "theta_deg": "theta",
+    "phi_deg": "phi",
+    "los_velocity_km_s": "vlos",
+    "observed_redshift": "obsz",
+}
+_LIGHTCONE_ASCII_COLUMNS = {
+    "group_ids": 0,
+    "true_redshift": 1,
+    "positions_mpc_h": slice(2, 5),
+    "velocities_km_s": slice(5, 8),
+    "masses_msun_h": 8,
+    "theta_deg": 9,
+    "phi_deg": 10,
+    "los_velocity_km_s": 11,
+    "observed_redshift": 12,
+}
+_LIGHTCONE_LIGHT_BINARY_FIELDS = {
+    "group_ids": "name",
+    "true_redshift": "truez",
+    "masses_msun_h": "Mass",
+    "theta_deg": "theta",
+    "phi_deg": "phi",
+    "observed_redshift": "obsz",
+}
+_LIGHTCONE_LIGHT_ASCII_COLUMNS = {
+    "group_ids": 0,
+    "true_redshift": 1,
+    "masses_msun_h": 2,
+    "theta_deg": 3,
+    "phi_deg": 4,
+    "observed_redshift": 5,
+}
 
 
 def pinocchio_plc_angle_unit_vectors(theta_deg: np.ndarray, phi_deg: np.ndarray) -> np.ndarray:
@@ -72,14 +151,15 @@ class PinocchioSnapshotCatalog:
 
     Masses are ``Msun/h``; positions are comoving ``Mpc/h``; velocities are
     ``km/s``. ``initial_positions_mpc_h`` and ``n_particles`` can be ``None``
-    for legacy/light binary outputs that did not store those fields.
+    for legacy/light binary outputs that did not store those fields. Columns
+    left out of a reader's ``columns=`` selection are also ``None``.
     """
 
-    group_ids: np.ndarray
+    group_ids: np.ndarray | None
     masses_msun_h: np.ndarray
     initial_positions_mpc_h: np.ndarray | None
-    final_positions_mpc_h: np.ndarray
-    velocities_km_s: np.ndarray
+    final_positions_mpc_h: np.ndarray | None
+    velocities_km_s: np.ndarray | None
     n_particles: np.ndarray | None
     source: Path
     redshift: float | None = None
@@ -110,7 +190,7 @@ class PinocchioSnapshotCatalog:
         """
 
         if position == "final":
-            positions = self.final_positions_mpc_h
+            positions = _catalog_column(self, "final_positions_mpc_h", "snapshot catalog")
         elif position == "initial":
             if self.initial_positions_mpc_h is None:
                 raise PinocchioCatalogError(
@@ -143,18 +223,19 @@ class PinocchioLightconeCatalog:
     Positions are comoving ``Mpc/h``; masses are ``Msun/h``; velocities are
     ``km/s``. PINOCCHIO angle columns are latitude-like ``theta`` and longitude
     ``phi`` in degrees, expressed in the internal PLC basis used by PINOCCHIO
-    mass-map HEALPix pixels.
+    mass-map HEALPix pixels. Columns left out of a reader's ``columns=``
+    selection are ``None``.
     """
 
-    group_ids: np.ndarray
-    true_redshift: np.ndarray
-    positions_mpc_h: np.ndarray
-    velocities_km_s: np.ndarray
+    group_ids: np.ndarray | None
+    true_redshift: np.ndarray | None
+    positions_mpc_h: np.ndarray | None
+    velocities_km_s: np.ndarray | None
     masses_msun_h: np.ndarray
-    theta_deg: np.ndarray
-    phi_deg: np.ndarray
-    los_velocity_km_s: np.ndarray
-    observed_redshift: np.ndarray
+    theta_deg: np.ndarray | None
+    phi_deg: np.ndarray | None
+    los_velocity_km_s: np.ndarray | None
+    observed_redshift: np.ndarray | None
     source: Path
 
     def __len__(self) -> int:
@@ -164,13 +245,16 @@ class PinocchioLightconeCatalog:
     def chi_mpc_h(self) -> np.ndarray:
         """Comoving radial distances in ``Mpc/h``."""
 
-        return np.linalg.norm(self.positions_mpc_h, axis=1)
+        return np.linalg.norm(_catalog_column(self, "positions_mpc_h", "PLC catalog"), axis=1)
 
     @property
     def unit_vectors(self) -> np.ndarray:
         """Unit vectors from PINOCCHIO PLC angular columns."""
 
-        return pinocchio_plc_angle_unit_vectors(self.theta_deg, self.phi_deg)
+        return pinocchio_plc_angle_unit_vectors(
+            _catalog_column(self, "theta_deg", "PLC catalog"),
+            _catalog_column(self, "phi_deg", "PLC catalog"),
+        )
 
     @property
     def cartesian_unit_vectors(self) -> np.ndarray:
@@ -194,9 +278,9 @@ class PinocchioLightconeCatalog:
         """
 
         if redshift == "true":
-            redshift_values = self.true_redshift
+            redshift_values = _catalog_column(self, "true_redshift", "PLC catalog")
         elif redshift == "observed":
-            redshift_values = self.observed_redshift
+            redshift_values = _catalog_column(self, "observed_redshift", "PLC catalog")
         else:
             raise PinocchioCatalogError("redshift must be 'true' or 'observed'")
 
@@ -251,15 +335,16 @@ class PinocchioLightconeLightCatalog:
     redshift. It does not store Cartesian positions or radial distances.
     Conversion to ``LightconeHaloCatalog`` therefore requires an explicit
     ``PinocchioDistanceInterpolator`` built from the PINOCCHIO cosmology/Hubble
-    table, returning distances in comoving ``Mpc/h``.
+    table, returning distances in comoving ``Mpc/h``. Columns left out of a
+    reader's ``columns=`` selection are ``None``.
     """
 
-    group_ids: np.ndarray
-    true_redshift: np.ndarray
+    group_ids: np.ndarray | None
+    true_redshift: np.ndarray | None
     masses_msun_h: np.ndarray
-    theta_deg: np.ndarray
-    phi_deg: np.ndarray
-    observed_redshift: np.ndarray
+    theta_deg: np.ndarray | None
+    phi_deg: np.ndarray | None
+    observed_redshift: np.ndarray | None
     source: Path
 
     def __len__(self) -> int:
@@ -269,7 +354,10 @@ class PinocchioLightconeLightCatalog:
     def unit_vectors(self) -> np.ndarray:
         """Unit vectors from PINOCCHIO angular columns."""
 
-        return pinocchio_plc_angle_unit_vectors(self.theta_deg, self.phi_deg)
+        return pinocchio_plc_angle_unit_vectors(
+            _catalog_column(self, "theta_deg", "light PLC catalog"),
+            _catalog_column(self, "phi_deg", "light PLC catalog"),
+        )
 
     def to_lightcone_catalog(
         self,
@@ -291,9 +379,9 @@ class PinocchioLightconeLightCatalog:
         """
 
         if redshift == "true":
-            redshift_values = self.true_redshift
+            redshift_values = _catalog_column(self, "true_redshift", "light PLC catalog")
         elif redshift == "observed":
-            redshift_values = self.observed_redshift
+            redshift_values = _catalog_column(self, "observed_redshift", "light PLC catalog")
         else:
             raise PinocchioCatalogError("redshift must be 'true' or 'observed'")
 
@@ -359,6 +447,89 @@ class PinocchioMassFunction:
         return int(self.mass_msun_h.shape[0])
 
 
+@dataclass(frozen=True)
+class CompactPixelIndex:
+    """Vectorized lookup from HEALPix pixel ids to compact mass-map rows.
+
+    Dense domains, where the pixel span is at most twice the number of compact
+    pixels, use a row table indexed by ``pixel - first_pixel``. Sparse domains
+    use the sorted pixel ids with ``np.searchsorted``. Both return the same rows
+    as a ``{pixel: row}`` dictionary, including the last row for repeated ids.
+    """
+
+    n_pix: int
+    first_pixel: int
+    dense_rows: np.ndarray | None
+    sorted_pixels: np.ndarray | None
+    sorted_rows: np.ndarray | None
+
+    @classmethod
+    def from_pixels(
+        cls,
+        pixels: np.ndarray,
+        first_pixel: int | None = None,
+        last_pixel: int | None = None,
+    ) -> CompactPixelIndex:
+        """Build an index over compact ``pixels``.
+
+        ``first_pixel`` and ``last_pixel`` are the optional ``FIRSTPIX`` and
+        ``LASTPIX`` header bounds; they are used as the dense table range when
+        they enclose every pixel.
+        """
+
+        pixels = np.asarray(pixels, dtype=np.int64)
+        if pixels.ndim != 1:
+            raise PinocchioCatalogError("compact pixel ids must be one-dimensional")
+        n_pix = int(pixels.shape[0])
+        row_dtype = np.int32 if n_pix < np.iinfo(np.int32).max else np.int64
+        if n_pix == 0:
+            return cls(0, 0, None, pixels, np.empty((0,), dtype=row_dtype))
+
+        lo = int(pixels.min())
+        hi = int(pixels.max())
+        if first_pixel is not None and last_pixel is not None:
+            header_in_range = first_pixel <= lo and hi <= last_pixel
+            if header_in_range and last_pixel - first_pixel + 1 <= 2 * n_pix:
+                lo, hi = int(first_pixel), int(last_pixel)
+        if hi - lo + 1 <= 2 * n_pix:
+            dense_rows = np.full((hi - lo + 1,), -1, dtype=row_dtype)
+            dense_rows[pixels - lo] = np.arange(n_pix, dtype=row_dtype)
+            return cls(n_pix, lo, dense_rows, None, None)
+
+        order = np.argsort(pixels, kind="stable")
+        return cls(n_pix, 0, None, pixels[order], order.astype(row_dtype))
+
+    @property
+    def is_dense(self) -> bool:
+        return self.dense_rows is not None
+
+    def rows(self, pixels: np.ndarray) -> np.ndarray:
+        """Return compact rows for HEALPix ``pixels``, or ``-1`` outside the domain."""
+
+        pixels = np.asarray(pixels, dtype=np.int64)
+        rows = np.full(pixels.shape, -1, dtype=np.int64)
+        if self.n_pix == 0:
+            return rows
+        if self.dense_rows is not None:
+            local = pixels - self.first_pixel
+            valid = (local >= 0) & (local < self.dense_rows.shape[0])
+            rows[valid] = self.dense_rows[local[valid]]
+            return rows
+        flat = pixels.reshape(-1)
+        if flat.size > 4096:
+            # Sorted queries keep the binary searches cache-friendly; for large
+            # unsorted inputs this is several times faster than searching directly.
+            order = np.argsort(flat)
+            position = np.empty_like(order)
+            position[order] = np.searchsorted(self.sorted_pixels, flat[order], side="right")
+        else:
+            position = np.searchsorted(self.sorted_pixels, flat, side="right")
+        position = np.maximum(position - 1, 0)
+        hit = self.sorted_pixels[position] == flat
+        rows.reshape(-1)[hit] = self.sorted_rows[position[hit]]
+        return rows
+
+
 @dataclass(frozen=True)
 class PinocchioMassMap:
     """PINOCCHIO HEALPix mass map from ``*.massmap.seg*.fits``.
@@ -389,6 +560,12 @@ class PinocchioMassMap:
     def __len__(self) -> int:
         return int(self.pixel.shape[0])
 
+    @cached_property
+    def pixel_index(self) -> CompactPixelIndex:
+        """Pixel-to-row index over ``pixel``, built once per mass map."""
+
+        return CompactPixelIndex.from_pixels(self.pixel, self.first_pixel, self.last_pixel)
+
 
 @dataclass(frozen=True)
 class PinocchioRunMetadata:
@@ -448,7 +625,11 @@ def lightcone_catalog_from_columns(
 
 
 def read_pinocchio_snapshot_catalog(
-    path: PathLike, *, format: CatalogFormat = "auto"
+    path: PathLike,
+    *,
+    format: CatalogFormat = "auto",
+    columns: Sequence[str] | None = None,
+    n_threads: int = 1,
 ) -> PinocchioSnapshotCatalog:
     """Read a PINOCCHIO snapshot halo catalogue from ``*.catalog.out``.
 
@@ -457,69 +638,74 @@ def read_pinocchio_snapshot_catalog(
     position, velocity, and particle count. Binary files are the native
     PINOCCHIO ``catalog_data`` layout, including split files named
     ``*.catalog.out.0``, ``*.catalog.out.1``, ...
+
+    ``columns`` optionally names the ``PinocchioSnapshotCatalog`` fields to
+    read; the others are left ``None``. ``masses_msun_h`` is always read.
+    ``n_threads`` decodes split binary files concurrently; ASCII tables are
+    read serially.
     """
 
     source = Path(path)
     if format == "auto":
         format = _detect_catalog_format(source)
     if format == "binary":
-        return read_pinocchio_binary_snapshot_catalog(source)
+        return read_pinocchio_binary_snapshot_catalog(source, columns=columns, n_threads=n_threads)
     if format != "ascii":
         raise PinocchioCatalogError("format must be 'auto', 'ascii', or 'binary'")
 
+    names = _requested_catalog_columns(columns, _SNAPSHOT_ASCII_COLUMNS, "snapshot catalog")
     data = _load_numeric_table(source, expected_columns=12, label="snapshot catalog")
-    masses = data[:, 1]
-    _require_positive(masses, source, "snapshot masses")
+    fields = _ascii_catalog_columns(
+        data, _SNAPSHOT_ASCII_COLUMNS, names, project=columns is not None
+    )
+    _require_positive(fields["masses_msun_h"], source, "snapshot masses")
+    if "group_ids" in fields:
+        fields["group_ids"] = _integer_column(fields["group_ids"], source, "group IDs")
+    if "n_particles" in fields:
+        fields["n_particles"] = _integer_column(fields["n_particles"], source, "particle counts")
     return PinocchioSnapshotCatalog(
-        group_ids=_integer_column(data[:, 0], source, "group IDs"),
-        masses_msun_h=masses,
-        initial_positions_mpc_h=data[:, 2:5],
-        final_positions_mpc_h=data[:, 5:8],
-        velocities_km_s=data[:, 8:11],
-        n_particles=_integer_column(data[:, 11], source, "particle counts"),
+        **{name: fields.get(name) for name in _SNAPSHOT_ASCII_COLUMNS},
         source=source,
         redshift=_parse_snapshot_redshift(source),
     )
 
 
-def read_pinocchio_binary_snapshot_catalog(path: PathLike) -> PinocchioSnapshotCatalog:
+def read_pinocchio_binary_snapshot_catalog(
+    path: PathLike, *, columns: Sequence[str] | None = None, n_threads: int = 1
+) -> PinocchioSnapshotCatalog:
     """Read a binary PINOCCHIO snapshot halo catalogue.
 
     Supports the native PINOCCHIO ``catalog_data`` binary layout written when
     ``CatalogInAscii`` is disabled, including split files named
     ``*.catalog.out.0``, ``*.catalog.out.1``, ... Masses are ``Msun/h``;
-    positions are comoving ``Mpc/h``; velocities are ``km/s``.
+    positions are comoving ``Mpc/h``; velocities are ``km/s``. Only the fields
+    named in ``columns`` (plus masses) are decoded; the others are ``None``.
+    With ``n_threads > 1`` split files are scanned and decoded concurrently.
     """
 
     source = Path(path)
+    names = _requested_catalog_columns(columns, _SNAPSHOT_BINARY_FIELDS, "snapshot catalog")
     files = _pinocchio_output_files(source, label="snapshot catalog")
-    chunks = [_read_binary_snapshot_catalog_file(file) for file in files]
-    data = _concatenate_structured_chunks(chunks)
-    if data is None:
-        data = np.empty(0, dtype=_binary_snapshot_catalog_dtype(56, new_run=True)[0])
-
-    masses = np.asarray(data["Mass"], dtype=np.float64)
-    _require_positive(masses, source, "snapshot masses")
-    n_particles = (
-        np.asarray(data["npart"], dtype=np.int64) if "npart" in data.dtype.names else None
-    )
-    initial_positions = (
-        np.asarray(data["posin"], dtype=np.float64) if "posin" in data.dtype.names else None
+    fields = _read_binary_catalog_columns(
+        files,
+        _scan_binary_snapshot_catalog_file,
+        {name: _SNAPSHOT_BINARY_FIELDS[name] for name in names},
+        n_threads=n_threads,
     )
+    _require_positive(fields["masses_msun_h"], source, "snapshot masses")
     return PinocchioSnapshotCatalog(
-        group_ids=np.asarray(data["name"], dtype=np.uint64),
-        masses_msun_h=masses,
-        initial_positions_mpc_h=initial_positions,
-        final_positions_mpc_h=np.asarray(data["pos"], dtype=np.float64),
-        velocities_km_s=np.asarray(data["vel"], dtype=np.float64),
-        n_particles=n_particles,
+        **{name: fields.get(name) for name in _SNAPSHOT_BINARY_FIELDS},
         source=source,
         redshift=_parse_snapshot_redshift(source),
     )
 
 
 def read_pinocchio_lightcone_catalog(
-    path: PathLike, *, format: CatalogFormat = "auto"
+    path: PathLike,
+    *,
+    format: CatalogFormat = "auto",
+    columns: Sequence[str] | None = None,
+    n_threads: int = 1,
 ) -> PinocchioLightconeCatalog:
     """Read a PINOCCHIO past-light-cone halo catalogue from ``*.plc.out``.
 
@@ -529,34 +715,39 @@ def read_pinocchio_lightcone_catalog(
     line-of-sight velocity, and observed redshift. Binary files are the native
     PINOCCHIO ``plc_write_data`` layout, including split files named
     ``*.plc.out.0``, ``*.plc.out.1``, ...
+
+    ``columns`` optionally names the ``PinocchioLightconeCatalog`` fields to
+    read; the others are left ``None``. ``masses_msun_h`` is always read.
+    Painting needs ``positions_mpc_h``, ``theta_deg``, ``phi_deg``, and the
+    true or observed redshift. ``n_threads`` decodes split binary files
+    concurrently; ASCII tables are read serially.
     """
 
     source = Path(path)
     if format == "auto":
         format = _detect_catalog_format(source)
     if format == "binary":
-        return read_pinocchio_binary_lightcone_catalog(source)
+        return read_pinocchio_binary_lightcone_catalog(source, columns=columns, n_threads=n_threads)
     if format != "ascii":
         raise PinocchioCatalogError("format must be 'auto', 'ascii', or 'binary'")
 
+    names = _requested_catalog_columns(columns, _LIGHTCONE_ASCII_COLUMNS, "PLC catalog")
     data = _load_numeric_table(source, expected_columns=13, label="PLC catalog")
-    masses = data[:, 8]
-    _require_positive(masses, source, "PLC masses")
+    fields = _ascii_catalog_columns(
+        data, _LIGHTCONE_ASCII_COLUMNS, names, project=columns is not None
+    )
+    _require_positive(fields["masses_msun_h"], source, "PLC masses")
+    if "group_ids" in fields:
+        fields["group_ids"] = _integer_column(fields["group_ids"], source, "group IDs")
     return PinocchioLightconeCatalog(
-        group_ids=_integer_column(data[:, 0], source, "group IDs"),
-        true_redshift=data[:, 1],
-        positions_mpc_h=data[:, 2:5],
-        velocities_km_s=data[:, 5:8],
-        masses_msun_h=masses,
-        theta_deg=data[:, 9],
-        phi_deg=data[:, 10],
-        los_velocity_km_s=data[:, 11],
-        observed_redshift=data[:, 12],
+        **{name: fields.get(name) for name in _LIGHTCONE_ASCII_COLUMNS},
         source=source,
     )
 
 
-def read_pinocchio_binary_lightcone_catalog(path: PathLike) -> PinocchioLightconeCatalog:
+def read_pinocchio_binary_lightcone_catalog(
+    path: PathLike, *, columns: Sequence[str] | None = None, n_threads: int = 1
+) -> PinocchioLightconeCatalog:
     """Read a binary PINOCCHIO past-light-cone halo catalogue.
 
     Supports the full native PINOCCHIO ``plc_write_data`` binary layout written
@@ -567,33 +758,98 @@ def read_pinocchio_binary_lightcone_catalog(path: PathLike) -> PinocchioLightcon
     PINOCCHIO light binary PLC output is intentionally rejected because it does
     not contain Cartesian positions or radial distances, so it cannot be
     converted into GEPPETTO's lightcone catalogue convention.
+
+    Only the fields named in ``columns`` (plus masses) are decoded from the
+    records, each straight into a contiguous array; the others are ``None``.
+    With ``n_threads > 1`` split files are scanned and decoded concurrently.
     """
 
     source = Path(path)
+    names = _requested_catalog_columns(columns, _LIGHTCONE_BINARY_FIELDS, "PLC catalog")
     files = _pinocchio_output_files(source, label="PLC catalog")
-    chunks = [_read_binary_lightcone_catalog_file(file) for file in files]
-    data = _concatenate_structured_chunks(chunks)
-    if data is None:
-        data = np.empty(0, dtype=_binary_lightcone_catalog_dtype(56, new_run=True)[0])
-
-    masses = np.asarray(data["Mass"], dtype=np.float64)
-    _require_positive(masses, source, "PLC masses")
+    fields = _read_binary_catalog_columns(
+        files,
+        _scan_binary_lightcone_catalog_file,
+        {name: _LIGHTCONE_BINARY_FIELDS[name] for name in names},
+        n_threads=n_threads,
+    )
+    _require_positive(fields["masses_msun_h"], source, "PLC masses")
     return PinocchioLightconeCatalog(
-        group_ids=np.asarray(data["name"], dtype=np.uint64),
-        true_redshift=np.asarray(data["truez"], dtype=np.float64),
-        positions_mpc_h=np.asarray(data["pos"], dtype=np.float64),
-        velocities_km_s=np.asarray(data["vel"], dtype=np.float64),
-        masses_msun_h=masses,
-        theta_deg=np.asarray(data["theta"], dtype=np.float64),
-        phi_deg=np.asarray(data["phi"], dtype=np.float64),
-        los_velocity_km_s=np.asarray(data["vlos"], dtype=np.float64),
-        observed_redshift=np.asarray(data["obsz"], dtype=np.float64),
+        **{name: fields.get(name) for name in _LIGHTCONE_BINARY_FIELDS},
         source=source,
     )
 
 
+def iter_pinocchio_lightcone_chunks(
+    path: PathLike,
+    *,
+    chunk_haloes: int = 1_000_000,
+    columns: Sequence[str] | None = None,
+    z_range: tuple[float, float] | None = None,
+    format: CatalogFormat = "auto",
+) -> Iterator[PinocchioLightconeCatalog]:
+    """Yield a full PINOCCHIO PLC catalogue in bounded-memory chunks.
+
+    Split files ``*.plc.out.0``, ``*.plc.out.1``, ... and the binary block
+    records inside them are walked incrementally, and every yielded
+    ``PinocchioLightconeCatalog`` holds exactly ``chunk_haloes`` haloes except
+    the last. Binary records are decoded at most ``chunk_haloes`` at a time from
+    the memory-mapped files, so peak memory scales with the chunk size rather
+    than the catalogue size. ASCII catalogues are parsed one split file at a
+    time.
+
+    ``columns`` selects fields as in :func:`read_pinocchio_lightcone_catalog`.
+    ``z_range=(z_lo, z_hi)`` keeps haloes with ``z_lo <= true_redshift <= z_hi``
+    before chunking.
+    """
+
+    if chunk_haloes <= 0:
+        raise PinocchioCatalogError("chunk_haloes must be positive")
+    source = Path(path)
+    names = _requested_catalog_columns(columns, _LIGHTCONE_BINARY_FIELDS, "PLC catalog")
+    if z_range is not None:
+        z_lo, z_hi = (float(value) for value in z_range)
+        if not z_lo <= z_hi:
+            raise PinocchioCatalogError("z_range must satisfy z_lo <= z_hi")
+    decoded = names if z_range is None else tuple(dict.fromkeys((*names, "true_redshift")))
+    if format == "auto":
+        format = _detect_catalog_format(source)
+    files = _pinocchio_output_files(source, label="PLC catalog")
+    if format == "binary":
+        blocks = _iter_binary_lightcone_blocks(files, decoded, chunk_haloes)
+    elif format == "ascii":
+        blocks = _iter_ascii_lightcone_blocks(files, decoded, chunk_haloes)
+    else:
+        raise PinocchioCatalogError("format must be 'auto', 'ascii', or 'binary'")
+
+    pending: list[dict[str, np.ndarray]] = []
+    n_pending = 0
+    for block in blocks:
+        if z_range is not None:
+            redshift = block["true_redshift"]
+            keep = (redshift >= z_lo) & (redshift <= z_hi)
+            block = {name: values[keep] for name, values in block.items()}
+        start = 0
+        n_block = block["masses_msun_h"].shape[0]
+        while start < n_block:
+            take = min(chunk_haloes - n_pending, n_block - start)
+            pending.append({name: values[start : start + take] for name, values in block.items()})
+            n_pending += take
+            start += take
+            if n_pending == chunk_haloes:
+                yield _lightcone_chunk(pending, names, source)
+                pending = []
+                n_pending = 0
+    if n_pending:
+        yield _lightcone_chunk(pending, names, source)
+
+
 def read_pinocchio_lightcone_light_catalog(
-    path: PathLike, *, format: CatalogFormat = "auto"
+    path: PathLike,
+    *,
+    format: CatalogFormat = "auto",
+    columns: Sequence[str] | None = None,
+    n_threads: int = 1,
 ) -> PinocchioLightconeLightCatalog:
     """Read a PINOCCHIO light PLC catalogue from ``*.plc.out``.
 
@@ -604,33 +860,39 @@ def read_pinocchio_lightcone_light_catalog(
     Cartesian positions or radial distances, use
     ``PinocchioLightconeLightCatalog.to_lightcone_catalog`` with a
     ``PinocchioDistanceInterpolator`` from ``read_pinocchio_hubble_table``
-    before passing it to GEPPETTO painters.
+    before passing it to GEPPETTO painters. ``columns`` optionally names the
+    fields to read; the others are left ``None``. ``n_threads`` decodes split
+    binary files concurrently; ASCII tables are read serially.
     """
 
     source = Path(path)
     if format == "auto":
         format = _detect_catalog_format(source)
     if format == "binary":
-        return read_pinocchio_binary_lightcone_light_catalog(source)
+        return read_pinocchio_binary_lightcone_light_catalog(
+            source, columns=columns, n_threads=n_threads
+        )
     if format != "ascii":
         raise PinocchioCatalogError("format must be 'auto', 'ascii', or 'binary'")
 
+    names = _requested_catalog_columns(
+        columns, _LIGHTCONE_LIGHT_ASCII_COLUMNS, "light PLC catalog"
+    )
     data = _load_numeric_table(source, expected_columns=6, label="light PLC catalog")
-    masses = data[:, 2]
-    _require_positive(masses, source, "light PLC masses")
+    fields = _ascii_catalog_columns(
+        data, _LIGHTCONE_LIGHT_ASCII_COLUMNS, names, project=columns is not None
+    )
+    _require_positive(fields["masses_msun_h"], source, "light PLC masses")
+    if "group_ids" in fields:
+        fields["group_ids"] = _integer_column(fields["group_ids"], source, "group IDs")
     return PinocchioLightconeLightCatalog(
-        group_ids=_integer_column(data[:, 0], source, "group IDs"),
-        true_redshift=data[:, 1],
-        masses_msun_h=masses,
-        theta_deg=data[:, 3],
-        phi_deg=data[:, 4],
-        observed_redshift=data[:, 5],
+        **{name: fields.get(name) for name in _LIGHTCONE_LIGHT_ASCII_COLUMNS},
         source=source,
     )
 
 
 def read_pinocchio_binary_lightcone_light_catalog(
-    path: PathLike,
+    path: PathLike, *, columns: Sequence[str] | None = None, n_threads: int = 1
 ) -> PinocchioLightconeLightCatalog:
     """Read a binary PINOCCHIO light PLC catalogue.
 
@@ -638,25 +900,25 @@ def read_pinocchio_binary_lightcone_light_catalog(
     ``LIGHT_OUTPUT`` is enabled and ``CatalogInAscii`` is disabled, including
     split files named ``*.plc.out.0``, ``*.plc.out.1``, ... Masses are
     ``Msun/h``; angles are latitude-like ``theta`` and longitude ``phi`` in
-    degrees; redshifts are dimensionless.
+    degrees; redshifts are dimensionless. Only the fields named in ``columns``
+    (plus masses) are decoded; the others are ``None``. With ``n_threads > 1``
+    split files are scanned and decoded concurrently.
     """
 
     source = Path(path)
+    names = _requested_catalog_columns(
+        columns, _LIGHTCONE_LIGHT_BINARY_FIELDS, "light PLC catalog"
+    )
     files = _pinocchio_output_files(source, label="light PLC catalog")
-    chunks = [_read_binary_lightcone_light_catalog_file(file) for file in files]
-    data = _concatenate_structured_chunks(chunks)
-    if data is None:
-        data = np.empty(0, dtype=_binary_lightcone_light_catalog_dtype(32, new_run=True)[0])
-
-    masses = np.asarray(data["Mass"], dtype=np.float64)
-    _require_positive(masses, source, "light PLC masses")
+    fields = _read_binary_catalog_columns(
+        files,
+        _scan_binary_lightcone_light_catalog_file,
+        {name: _LIGHTCONE_LIGHT_BINARY_FIELDS[name] for name in names},
+        n_threads=n_threads,
+    )
+    _require_positive(fields["masses_msun_h"], source, "light PLC masses")
     return PinocchioLightconeLightCatalog(
-        group_ids=np.asarray(data["name"], dtype=np.uint64),
-        true_redshift=np.asarray(data["truez"], dtype=np.float64),
-        masses_msun_h=masses,
-        theta_deg=np.asarray(data["theta"], dtype=np.float64),
-        phi_deg=np.asarray(data["phi"], dtype=np.float64),
-        observed_redshift=np.asarray(data["obsz"], dtype=np.float64),
+        **{name: fields.get(name) for name in _LIGHTCONE_LIGHT_BINARY_FIELDS},
         source=source,
     )
 
@@ -861,6 +1123,34 @@ def validate_lightcone_sparse_stencil(
     if not np.all(np.isfinite(r_perp)) or np.any(r_perp < 0.0):
         raise PinocchioCatalogError("stencil.r_perp values must be finite and non-negative")
 
+    if stencil.pix_offsets is not None:
+        pix_offsets = np.asarray(stencil.pix_offsets)
+        if pix_offsets.shape != (n_pix + 1,):
+            raise PinocchioCatalogError("stencil.pix_offsets must have shape (n_pix + 1,)")
+        expected = np.zeros((n_pix + 1,), dtype=np.int64)
+        np.cumsum(np.bincount(pix_id, minlength=n_pix), out=expected[1:])
+        if np.any(np.diff(pix_id) < 0) or not np.array_equal(pix_offsets, expected):
+            raise PinocchioCatalogError(
+                "stencil.pix_offsets requires pairs sorted by pix_id with matching CSR offsets"
+            )
+
+    point_halo_id = np.empty((0,), dtype=np.int64)
+    if (stencil.point_pix_id is None) != (stencil.point_halo_id is None):
+        raise PinocchioCatalogError("stencil.point_pix_id and point_halo_id must be set together")
+    if stencil.point_pix_id is not None:
+        point_pix_id = np.asarray(stencil.point_pix_id)
+        point_halo_id = np.asarray(stencil.point_halo_id)
+        if point_pix_id.ndim != 1 or point_pix_id.shape != point_halo_id.shape:
+            raise PinocchioCatalogError("stencil point deposits must be matching 1D arrays")
+        if not np.issubdtype(point_pix_id.dtype, np.integer) or not np.issubdtype(
+            point_halo_id.dtype, np.integer
+        ):
+            raise PinocchioCatalogError("stencil point deposits must contain integer indices")
+        if point_pix_id.size and (np.any(point_pix_id < 0) or np.any(point_pix_id >= n_pix)):
+            raise PinocchioCatalogError("stencil.point_pix_id contains out-of-range pixel indices")
+        if point_halo_id.size and np.any(point_halo_id < 0):
+            raise PinocchioCatalogError("stencil.point_halo_id contains negative halo indices")
+
     if catalog is not None:
         mass = np.asarray(catalog.mass)
         if mass.ndim != 1:
@@ -868,6 +1158,195 @@ def validate_lightcone_sparse_stencil(
         n_halo = int(mass.shape[0])
         if halo_id.size and np.any(halo_id >= n_halo):
             raise PinocchioCatalogError("stencil.halo_id contains out-of-range halo indices")
+        if point_halo_id.size and np.any(point_halo_id >= n_halo):
+            raise PinocchioCatalogError("stencil.point_halo_id contains out-of-range halo indices")
+
+
+def sort_lightcone_sparse_stencil_by_pixel(
+    stencil: LightconeSparseStencil,
+) -> LightconeSparseStencil:
+    """Return the stencil with pairs sorted by ``pix_id`` and CSR row offsets.
+
+    The sort is stable, so pairs within a pixel keep their halo order. The
+    result carries ``pix_offsets`` of shape ``(n_pix + 1,)``, which switches the
+    sparse painters from an unsorted scatter-add to a sorted segment sum.
+    Already sorted stencils are returned unchanged.
+    """
+
+    if stencil.pix_offsets is not None:
+        return stencil
+    pix_id = np.asarray(stencil.pix_id)
+    order = np.argsort(pix_id, kind="stable")
+    sorted_pix_id = pix_id[order]
+    pix_offsets = np.zeros((stencil.n_pix + 1,), dtype=np.int64)
+    np.cumsum(np.bincount(sorted_pix_id, minlength=stencil.n_pix), out=pix_offsets[1:])
+    if stencil.size > np.iinfo(np.int32).max:
+        raise PinocchioCatalogError("pixel-sorted stencils support at most 2**31 - 1 pairs")
+    return LightconeSparseStencil(
+        pix_id=jnp.asarray(sorted_pix_id, dtype=jnp.int32),
+        halo_id=jnp.asarray(np.asarray(stencil.halo_id)[order], dtype=jnp.int32),
+        r_perp=jnp.asarray(np.asarray(stencil.r_perp)[order]),
+        n_pix=stencil.n_pix,
+        pix_offsets=jnp.asarray(pix_offsets, dtype=jnp.int32),
+        point_pix_id=stencil.point_pix_id,
+        point_halo_id=stencil.point_halo_id,
+    )
+
+
+def stack_lightcone_sparse_stencil_by_segment(
+    stencil: LightconeSparseStencil,
+    halo_segment: np.ndarray,
+    n_segment: int,
+) -> LightconeSparseStencil:
+    """Key a stencil over a shared pixel domain by the segment of each halo.
+
+    ``halo_segment[h]`` is the segment slot in ``[0, n_segment)`` of halo
+    ``h``. The returned stencil has ``n_pix = n_segment * stencil.n_pix`` and
+    ``pix_id = halo_segment[halo_id] * stencil.n_pix + pix_id``, so one sparse
+    paint reshaped to ``(n_segment, stencil.n_pix)`` is the per-segment map
+    stack. Point deposits are keyed the same way. CSR offsets are dropped;
+    sort the result again for the pixel-sorted layout.
+    """
+
+    halo_segment = np.asarray(halo_segment)
+    n_segment = int(n_segment)
+    if n_segment <= 0:
+        raise PinocchioCatalogError("n_segment must be positive")
+    if halo_segment.ndim != 1 or not np.issubdtype(halo_segment.dtype, np.integer):
+        raise PinocchioCatalogError("halo_segment must be a one-dimensional integer array")
+    if halo_segment.size and (np.any(halo_segment < 0) or np.any(halo_segment >= n_segment)):
+        raise PinocchioCatalogError("halo_segment contains out-of-range segment slots")
+    n_pix = int(stencil.n_pix)
+    if n_segment * n_pix > np.iinfo(np.int32).max:
+        raise PinocchioCatalogError("n_segment * n_pix exceeds the int32 pixel index range")
+
+    def keyed(pix_id: Any, halo_id: Any) -> Any:
+        offset = halo_segment[np.asarray(halo_id)].astype(np.int64) * n_pix
+        return jnp.asarray(offset + np.asarray(pix_id, dtype=np.int64), dtype=jnp.int32)
+
+    point_pix_id = None
+    if stencil.has_point_deposits:
+        point_pix_id = keyed(stencil.point_pix_id, stencil.point_halo_id)
+    return LightconeSparseStencil(
+        pix_id=keyed(stencil.pix_id, stencil.halo_id),
+        halo_id=stencil.halo_id,
+        r_perp=stencil.r_perp,
+        n_pix=n_segment * n_pix,
+        point_pix_id=point_pix_id,
+        point_halo_id=stencil.point_halo_id,
+    )
+
+
+@dataclass(frozen=True)
+class StencilBucketPolicy:
+    """Geometric shape buckets for padding sparse lightcone problems.
+
+    Each size is rounded up to the first of ``minimum``, ``minimum * growth``,
+    ``minimum * growth**2``, ... that holds it, so stencils from different
+    mass-map segments share a handful of padded shapes and therefore of
+    compiled JAX executables.
+    """
+
+    growth: float = 2.0
+    min_pairs: int = 1 << 12
+    min_pixels: int = 1 << 10
+    min_halos: int = 1 << 8
+
+    def __post_init__(self) -> None:
+        if not self.growth > 1.0:
+            raise PinocchioCatalogError("bucket growth must be greater than one")
+        if min(self.min_pairs, self.min_pixels, self.min_halos) <= 0:
+            raise PinocchioCatalogError("bucket minimum sizes must be positive")
+
+    def bucket(self, size: int, minimum: int) -> int:
+        """Return the smallest bucket of at least ``size`` starting at ``minimum``."""
+
+        bucket = int(minimum)
+        while bucket < size:
+            bucket = max(bucket + 1, math.ceil(bucket * self.growth))
+        return bucket
+
+
+def pad_lightcone_sparse_stencil(
+    stencil: LightconeSparseStencil,
+    catalog: LightconeHaloCatalog,
+    policy: StencilBucketPolicy | None = None,
+) -> tuple[LightconeSparseStencil, LightconeHaloCatalog]:
+    """Pad a stencil and its catalogue to bucketed shapes.
+
+    ``n_pair``, ``n_pix + 1`` and ``n_halo + 1`` are rounded up with ``policy``.
+    Point deposits, if any, are padded to a bucket of at least ``min_halos``.
+    Padding pairs point at the sink pixel ``stencil.n_pix`` and at a padding
+    halo with index ``catalog.size``, so the first ``stencil.n_pix`` entries of
+    any painted map, and of its derivatives, are unchanged. Callers slice the
+    painted map back to ``[:stencil.n_pix]``. Padding halos are finite nominal
+    haloes (``1e12 Msun/h`` at ``z = 0`` and ``chi = 1 Mpc/h``), which keeps
+    padded contributions and their gradients finite. Pixel-sorted stencils stay
+    sorted, with the CSR offsets extended over the padded pixels.
+    """
+
+    policy = StencilBucketPolicy() if policy is None else policy
+    n_pix = stencil.n_pix
+    n_pair = stencil.size
+    n_halo = catalog.size
+    n_pix_padded = policy.bucket(n_pix + 1, policy.min_pixels)
+    n_halo_padded = policy.bucket(n_halo + 1, policy.min_halos)
+    n_pair_padded = policy.bucket(n_pair, policy.min_pairs)
+    n_extra_pairs = n_pair_padded - n_pair
+    n_extra_halos = n_halo_padded - n_halo
+
+    r_perp = jnp.asarray(stencil.r_perp)
+    pix_offsets = None
+    if stencil.pix_offsets is not None:
+        pix_offsets = jnp.concatenate(
+            [
+                jnp.asarray(stencil.pix_offsets, dtype=jnp.int32),
+                jnp.full((n_pix_padded - n_pix,), n_pair_padded, dtype=jnp.int32),
+            ]
+        )
+    point_pix_id = None
+    point_halo_id = None
+    if stencil.has_point_deposits:
+        n_extra_points = policy.bucket(stencil.n_point, policy.min_halos) - stencil.n_point
+        point_pix_id = jnp.concatenate(
+            [
+                jnp.asarray(stencil.point_pix_id, dtype=jnp.int32),
+                jnp.full((n_extra_points,), n_pix, dtype=jnp.int32),
+            ]
+        )
+        point_halo_id = jnp.concatenate(
+            [
+                jnp.asarray(stencil.point_halo_id, dtype=jnp.int32),
+                jnp.full((n_extra_points,), n_halo, dtype=jnp.int32),
+            ]
+        )
+    padded_stencil = LightconeSparseStencil(
+        pix_id=jnp.concatenate(
+            [
+                jnp.asarray(stencil.pix_id, dtype=jnp.int32),
+                jnp.full((n_extra_pairs,), n_pix, dtype=jnp.int32),
+            ]
+        ),
+        halo_id=jnp.concatenate(
+            [
+                jnp.asarray(stencil.halo_id, dtype=jnp.int32),
+                jnp.full((n_extra_pairs,), n_halo, dtype=jnp.int32),
+            ]
+        ),
+        r_perp=jnp.concatenate([r_perp, jnp.zeros((n_extra_pairs,), dtype=r_perp.dtype)]),
+        n_pix=n_pix_padded,
+        pix_offsets=pix_offsets,
+        point_pix_id=point_pix_id,
+        point_halo_id=point_halo_id,
+    )
+
+    padded_catalog = LightconeHaloCatalog(
+        unit_vector=_pad_halo_column(catalog.unit_vector, [0.0, 0.0, 1.0], n_extra_halos),
+        chi=_pad_halo_column(catalog.chi, 1.0, n_extra_halos),
+        mass=_pad_halo_column(catalog.mass, 1.0e12, n_extra_halos),
+        redshift=_pad_halo_column(catalog.redshift, 0.0, n_extra_halos),
+    )
+    return padded_stencil, padded_catalog
 
 
 def validate_tabulated_projected_profile_params(
@@ -936,16 +1415,7 @@ def build_lightcone_sparse_stencil_bruteforce(
         raise PinocchioCatalogError("catalog.chi must be finite")
 
     n_halo = int(halo_chi.shape[0])
-    rmax = np.asarray(rmax_mpc_h, dtype=np.float64)
-    if rmax.ndim == 0:
-        rmax_value = float(rmax)
-        if not math.isfinite(rmax_value) or rmax_value < 0.0:
-            raise PinocchioCatalogError("rmax_mpc_h values must be finite and non-negative")
-        rmax = np.full((n_halo,), rmax_value, dtype=np.float64)
-    elif rmax.shape != (n_halo,):
-        raise PinocchioCatalogError("rmax_mpc_h must be scalar or have shape (n_halo,)")
-    if not np.all(np.isfinite(rmax)) or np.any(rmax < 0.0):
-        raise PinocchioCatalogError("rmax_mpc_h values must be finite and non-negative")
+    rmax = _per_halo_rmax(rmax_mpc_h, n_halo)
 
     if n_pix == 0 or n_halo == 0:
         stencil = LightconeSparseStencil(
@@ -990,6 +1460,505 @@ def build_lightcone_sparse_stencil(
     )
 
 
+@dataclass
+class StencilBuildDiagnostics:
+    """Host-side counters for HEALPix sparse-stencil construction."""
+
+    n_halos: int = 0
+    n_halos_with_query_pixels: int = 0
+    n_halos_with_inside_pixels: int = 0
+    n_halos_with_kept_pairs: int = 0
+    n_query_pixels_total: int = 0
+    n_inside_domain_total: int = 0
+    n_kept_pairs_total: int = 0
+    query_mode: str = "inclusive"
+    elapsed_seconds: float = 0.0
+    worker_elapsed_seconds: tuple[float, ...] = ()
+    worker_n_halos: tuple[int, ...] = ()
+    cache_hit: bool = False
+    n_subpixel_halos: int = 0
+    n_subpixel_deposits: int = 0
+    n_subpixel_pairs_avoided: int = 0
+    n_subpixel_query_pixels_avoided: int = 0
+
+    @property
+    def worker_load_imbalance(self) -> float:
+        """Return the slowest over the mean worker time, or ``1.0`` if serial."""
+
+        if not self.worker_elapsed_seconds:
+            return 1.0
+        mean = sum(self.worker_elapsed_seconds) / len(self.worker_elapsed_seconds)
+        if mean <= 0.0:
+            return 1.0
+        return max(self.worker_elapsed_seconds) / mean
+
+    @property
+    def inside_over_query(self) -> float:
+        if self.n_query_pixels_total == 0:
+            return 0.0
+        return self.n_inside_domain_total / self.n_query_pixels_total
+
+    @property
+    def kept_over_query(self) -> float:
+        if self.n_query_pixels_total == 0:
+            return 0.0
+        return self.n_kept_pairs_total / self.n_query_pixels_total
+
+    @property
+    def kept_over_inside(self) -> float:
+        if self.n_inside_domain_total == 0:
+            return 0.0
+        return self.n_kept_pairs_total / self.n_inside_domain_total
+
+
+def build_lightcone_sparse_stencil_healpix(
+    mass_map: PinocchioMassMap,
+    catalog: LightconeHaloCatalog,
+    rmax_mpc_h: np.ndarray | float,
+    *,
+    max_batch_pixels: int = 1 << 22,
+    n_workers: int = 1,
+    collect_diagnostics: bool = False,
+    cache_dir: PathLike | None = None,
+    subpixel_threshold: float | None = None,
+) -> LightconeSparseStencil | tuple[LightconeSparseStencil, StencilBuildDiagnostics]:
+    """Build a HEALPix-local sparse stencil on a compact RING mass-map domain.
+
+    Each halo's disc of angular radius ``2 arcsin(Rmax / (2 chi))`` is queried
+    ring by ring: the HEALPix rings crossing the disc and the pixel-index range
+    of each ring inside it follow from closed-form RING geometry, so whole
+    batches of haloes are expanded with NumPy instead of one ``query_disc`` call
+    per halo. Candidate pixels are mapped to compact rows of ``mass_map.pixel``
+    and retained when their centre satisfies ``R_perp <= Rmax_halo``.
+
+    Parameters
+    ----------
+    mass_map:
+        Compact RING-ordered PINOCCHIO mass map. The returned ``pix_id`` values
+        are row indices into ``mass_map.pixel``.
+    catalog:
+        Lightcone catalogue with unit vectors and comoving distances in
+        ``Mpc/h``.
+    rmax_mpc_h:
+        Scalar or per-halo projected support radius in comoving ``Mpc/h``.
+    max_batch_pixels:
+        Upper bound on candidate pixels expanded at once, bounding host memory.
+        With ``n_workers > 1`` the bound applies per worker.
+    n_workers:
+        Number of worker processes. Values above one split the halo list into
+        contiguous shards of similar estimated query cost and build them in a
+        ``spawn`` process pool. The catalogue and pixel arrays are placed in
+        shared memory once instead of being pickled to every worker.
+    collect_diagnostics:
+        If true, also return :class:`StencilBuildDiagnostics` with
+        ``query_mode="ring"`` and per-worker shard timings.
+    cache_dir:
+        Optional directory of saved stencils keyed by
+        :func:`lightcone_sparse_stencil_cache_key`. On a hit the stencil is
+        memory-mapped from disk and only the kept-pair diagnostics are filled;
+        on a miss the built stencil is written there for later runs.
+    subpixel_threshold:
+        If given, haloes whose angular support radius is below this multiple
+        of the HEALPix pixel size ``sqrt(4 pi / N_pix)`` are not expanded into
+        pairs. Each such halo instead becomes a point deposit into the pixel
+        containing its centre (``stencil.point_pix_id``/``point_halo_id``);
+        centres outside the compact domain are dropped. With diagnostics, the
+        skipped haloes are still queried once to count the pairs avoided.
+
+    Notes
+    -----
+    Pairs are ordered by halo and then by HEALPix pixel within each ring,
+    independently of ``n_workers``. Separations use the float64 chord ``chi * |n_pix - n_halo|``, which avoids
+    the ``1 - cos`` cancellation of small angles. No ``healpy`` import is
+    needed.
+    """
+
+    if str(mass_map.ordering).upper() != "RING":
+        raise PinocchioCatalogError(
+            f"Only RING mass maps are supported, got ORDERING={mass_map.ordering!r}"
+        )
+    if max_batch_pixels <= 0:
+        raise PinocchioCatalogError("max_batch_pixels must be positive")
+    if n_workers <= 0:
+        raise PinocchioCatalogError("n_workers must be positive")
+    nside = _validate_healpix_nside(mass_map.nside)
+    if np.ndim(mass_map.pixel) != 1:
+        raise PinocchioCatalogError("mass_map.pixel must be one-dimensional")
+    pixel_index = mass_map.pixel_index
+    n_pix = pixel_index.n_pix
+
+    halo_unit_vectors = np.asarray(catalog.unit_vector, dtype=np.float64)
+    halo_chi = np.asarray(catalog.chi, dtype=np.float64)
+    if halo_unit_vectors.ndim != 2 or halo_unit_vectors.shape[1] != 3:
+        raise PinocchioCatalogError("catalog.unit_vector must have shape (n_halo, 3)")
+    if halo_chi.ndim != 1 or halo_chi.shape[0] != halo_unit_vectors.shape[0]:
+        raise PinocchioCatalogError("catalog.chi must have shape (n_halo,)")
+    if not np.all(np.isfinite(halo_unit_vectors)) or not np.all(np.isfinite(halo_chi)):
+        raise PinocchioCatalogError("catalog unit vectors and distances must be finite")
+    if np.any(halo_chi <= 0.0):
+        raise PinocchioCatalogError("catalog.chi values must be positive for local stencil construction")
+    n_halo = int(halo_chi.shape[0])
+    rmax = _per_halo_rmax(rmax_mpc_h, n_halo)
+    r_perp_dtype = jnp.asarray(catalog.chi).dtype
+    if subpixel_threshold is not None:
+        subpixel_threshold = float(subpixel_threshold)
+        if not math.isfinite(subpixel_threshold) or subpixel_threshold < 0.0:
+            raise PinocchioCatalogError("subpixel_threshold must be finite and non-negative")
+
+    t0 = perf_counter()
+    cache_path = None
+    if cache_dir is not None:
+        key = _lightcone_sparse_stencil_cache_key(
+            nside,
+            mass_map.pixel,
+            halo_unit_vectors,
+            halo_chi,
+            rmax,
+            r_perp_dtype,
+            subpixel_threshold,
+        )
+        cache_path = Path(cache_dir) / key
+        if (cache_path / "stencil.json").is_file():
+            stencil = LightconeSparseStencil.load(cache_path, mmap=True)
+            validate_lightcone_sparse_stencil(stencil, catalog)
+            if not collect_diagnostics:
+                return stencil
+            kept_counts = np.bincount(np.asarray(stencil.halo_id), minlength=n_halo)
+            return stencil, StencilBuildDiagnostics(
+                n_halos=n_halo,
+                n_halos_with_kept_pairs=int(np.count_nonzero(kept_counts)),
+                n_kept_pairs_total=stencil.size,
+                query_mode="ring",
+                elapsed_seconds=perf_counter() - t0,
+                cache_hit=True,
+                n_subpixel_deposits=stencil.n_point,
+            )
+
+    if subpixel_threshold is None:
+        resolved_ids = np.arange(n_halo, dtype=np.int64)
+        subpixel_ids = np.empty((0,), dtype=np.int64)
+    else:
+        alpha = 2.0 * np.arcsin(np.minimum(1.0, rmax / (2.0 * halo_chi)))
+        subpixel = alpha < subpixel_threshold * math.sqrt(healpix_pixel_area_sr(nside))
+        resolved_ids = np.flatnonzero(~subpixel)
+        subpixel_ids = np.flatnonzero(subpixel)
+
+    shards = _healpix_stencil_shards(
+        nside,
+        pixel_index,
+        halo_unit_vectors[resolved_ids],
+        halo_chi[resolved_ids],
+        rmax[resolved_ids],
+        n_workers,
+        max_batch_pixels,
+    )
+
+    # Shards cover contiguous, increasing ranges of the resolved haloes, so
+    # concatenating them in shard order reproduces the serial halo-major pair
+    # order exactly; mapping back through ``resolved_ids`` keeps it increasing.
+    pix_id = np.concatenate([shard.pix_id for shard in shards])
+    halo_id = resolved_ids[np.concatenate([shard.halo_id for shard in shards])]
+    r_perp = np.concatenate([shard.r_perp for shard in shards])
+    query_counts = np.zeros(n_halo, dtype=np.int64)
+    inside_counts = np.zeros(n_halo, dtype=np.int64)
+    kept_counts = np.zeros(n_halo, dtype=np.int64)
+    query_counts[resolved_ids] = np.concatenate([shard.query_counts for shard in shards])
+    inside_counts[resolved_ids] = np.concatenate([shard.inside_counts for shard in shards])
+    kept_counts[resolved_ids] = np.concatenate([shard.kept_counts for shard in shards])
+
+    point_pix_id = None
+    point_halo_id = None
+    if subpixel_threshold is not None:
+        rows = pixel_index.rows(_healpix_vec2pix_ring(nside, halo_unit_vectors[subpixel_ids]))
+        inside = rows >= 0
+        point_pix_id = jnp.asarray(rows[inside], dtype=jnp.int32)
+        point_halo_id = jnp.asarray(subpixel_ids[inside], dtype=jnp.int32)
+    elapsed = perf_counter() - t0
+
+    stencil = LightconeSparseStencil(
+        pix_id=jnp.asarray(pix_id, dtype=jnp.int32),
+        halo_id=jnp.asarray(halo_id, dtype=jnp.int32),
+        r_perp=jnp.asarray(r_perp, dtype=r_perp_dtype),
+        n_pix=n_pix,
+        point_pix_id=point_pix_id,
+        point_halo_id=point_halo_id,
+    )
+    validate_lightcone_sparse_stencil(stencil, catalog)
+    if cache_path is not None:
+        _save_stencil_atomically(stencil, cache_path)
+    if not collect_diagnostics:
+        return stencil
+    avoided = _healpix_stencil_shard(
+        nside,
+        pixel_index,
+        halo_unit_vectors[subpixel_ids],
+        halo_chi[subpixel_ids],
+        rmax[subpixel_ids],
+        slice(0, int(subpixel_ids.size)),
+        max_batch_pixels,
+    )
+    diagnostics = StencilBuildDiagnostics(
+        n_halos=n_halo,
+        n_halos_with_query_pixels=int(np.count_nonzero(query_counts)),
+        n_halos_with_inside_pixels=int(np.count_nonzero(inside_counts)),
+        n_halos_with_kept_pairs=int(np.count_nonzero(kept_counts)),
+        n_query_pixels_total=int(query_counts.sum()),
+        n_inside_domain_total=int(inside_counts.sum()),
+        n_kept_pairs_total=int(kept_counts.sum()),
+        query_mode="ring",
+        elapsed_seconds=elapsed,
+        worker_elapsed_seconds=tuple(shard.elapsed_seconds for shard in shards),
+        worker_n_halos=tuple(shard.n_halos for shard in shards),
+        n_subpixel_halos=int(subpixel_ids.size),
+        n_subpixel_deposits=stencil.n_point,
+        n_subpixel_pairs_avoided=int(avoided.kept_counts.sum()),
+        n_subpixel_query_pixels_avoided=int(avoided.query_counts.sum()),
+    )
+    return stencil, diagnostics
+
+
+def lightcone_sparse_stencil_cache_key(
+    mass_map: PinocchioMassMap,
+    catalog: LightconeHaloCatalog,
+    rmax_mpc_h: np.ndarray | float,
+    *,
+    subpixel_threshold: float | None = None,
+) -> str:
+    """Return the content hash identifying a HEALPix-local stencil.
+
+    The retained pair set depends only on ``nside``, the compact pixel ids, the
+    halo unit vectors and distances, the support radii and the optional
+    sub-pixel threshold, so the key hashes exactly those inputs (as
+    float64/int64 bytes) plus the output ``r_perp`` dtype. Concentration and
+    profile parameters that leave ``rmax_mpc_h`` unchanged map to the same key.
+    """
+
+    halo_chi = np.asarray(catalog.chi, dtype=np.float64)
+    return _lightcone_sparse_stencil_cache_key(
+        _validate_healpix_nside(mass_map.nside),
+        mass_map.pixel,
+        np.asarray(catalog.unit_vector, dtype=np.float64),
+        halo_chi,
+        _per_halo_rmax(rmax_mpc_h, int(halo_chi.shape[0])),
+        jnp.asarray(catalog.chi).dtype,
+        None if subpixel_threshold is None else float(subpixel_threshold),
+    )
+
+
+def nfw_support_radius_mpc_h(
+    mass: np.ndarray,
+    redshift: np.ndarray,
+    cosmology: Cosmology,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    taper_radius_factor: float = 10.0,
+) -> np.ndarray:
+    """Return fixed sparse-stencil NFW support radii in comoving ``Mpc/h``.
+
+    The support radius is ``R_delta`` for hard truncation and
+    ``R_delta + taper_radius_factor * truncation_width`` for the smooth taper.
+    ``R_delta`` does not depend on concentration, so the radius is fixed
+    geometry for concentration calibration.
+    """
+
+    if taper_radius_factor < 0.0:
+        raise PinocchioCatalogError("taper_radius_factor must be non-negative")
+
+    r_delta, _, _, _ = nfw_scale_radius_and_density(
+        jnp.asarray(mass),
+        jnp.asarray(redshift),
+        cosmology,
+        concentration_params,
+        profile_params,
+    )
+    r_delta_np = np.asarray(r_delta, dtype=np.float64)
+    if not profile_params.smooth_truncation:
+        return r_delta_np
+
+    width = float(profile_params.truncation_width_fraction) * r_delta_np
+    return r_delta_np + float(taper_radius_factor) * width
+
+
+def nfw_adaptive_support_radius_mpc_h(
+    mass: np.ndarray,
+    redshift: np.ndarray,
+    cosmology: Cosmology,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    mass_loss_tolerance: float = 1.0e-3,
+    n_concentration_table: int = 64,
+) -> np.ndarray:
+    """Return per-halo NFW support radii for a painted-mass loss tolerance.
+
+    Each radius is the smallest projected ``R`` for which the tapered projected
+    NFW mass outside ``R`` is at most ``mass_loss_tolerance`` times the total
+    tapered projected mass. In units of ``R_delta`` that fraction depends only
+    on the concentration and ``truncation_width_fraction``, so the inverse is
+    tabulated once on ``n_concentration_table`` log-spaced concentrations
+    spanning the catalogue and interpolated per halo. Hard truncation returns
+    ``R_delta``.
+
+    Unlike :func:`nfw_support_radius_mpc_h`, the radius depends on the
+    concentration relation; the stencil built from it is fixed geometry for
+    the concentration parameters it was evaluated at.
+    """
+
+    mass_loss_tolerance = float(mass_loss_tolerance)
+    if not 0.0 < mass_loss_tolerance < 1.0:
+        raise PinocchioCatalogError("mass_loss_tolerance must lie in (0, 1)")
+    if n_concentration_table < 2:
+        raise PinocchioCatalogError("n_concentration_table must be at least 2")
+
+    r_delta, concentration, _, _ = nfw_scale_radius_and_density(
+        jnp.asarray(mass),
+        jnp.asarray(redshift),
+        cosmology,
+        concentration_params,
+        profile_params,
+    )
+    r_delta_np = np.asarray(r_delta, dtype=np.float64)
+    if not profile_params.smooth_truncation or r_delta_np.size == 0:
+        return r_delta_np
+
+    log_c = np.log(np.asarray(concentration, dtype=np.float64))
+    log_c_table = np.linspace(log_c.min(), log_c.max(), n_concentration_table)
+    u_table = _nfw_tapered_mass_loss_radius(
+        np.exp(log_c_table),
+        float(profile_params.truncation_width_fraction),
+        mass_loss_tolerance,
+    )
+    return r_delta_np * np.interp(log_c, log_c_table, u_table)
+
+
+def validate_box_sparse_stencil(
+    stencil: BoxSparseStencil,
+    catalog: HaloCatalog | None = None,
+) -> None:
+    """Validate a sparse box stencil outside JAX-transformed paths."""
+
+    cell_id = np.asarray(stencil.cell_id)
+    halo_id = np.asarray(stencil.halo_id)
+    r = np.asarray(stencil.r)
+
+    if cell_id.ndim != 1 or halo_id.ndim != 1 or r.ndim != 1:
+        raise PinocchioCatalogError("box stencil fields must be one-dimensional")
+    if cell_id.shape[0] != halo_id.shape[0] or cell_id.shape[0] != r.shape[0]:
+        raise PinocchioCatalogError("box stencil fields must have matching lengths")
+    if not np.issubdtype(cell_id.dtype, np.integer):
+        raise PinocchioCatalogError("stencil.cell_id must contain integer indices")
+    if not np.issubdtype(halo_id.dtype, np.integer):
+        raise PinocchioCatalogError("stencil.halo_id must contain integer indices")
+    if stencil.nmesh <= 0:
+        raise PinocchioCatalogError("stencil.nmesh must be positive")
+    if cell_id.size and (np.any(cell_id < 0) or np.any(cell_id >= stencil.n_cell)):
+        raise PinocchioCatalogError("stencil.cell_id contains out-of-range cell indices")
+    if halo_id.size and np.any(halo_id < 0):
+        raise PinocchioCatalogError("stencil.halo_id contains negative halo indices")
+    if not np.all(np.isfinite(r)) or np.any(r < 0.0):
+        raise PinocchioCatalogError("stencil.r values must be finite and non-negative")
+
+    if catalog is not None:
+        n_halo = int(np.asarray(catalog.mass).shape[0])
+        if halo_id.size and np.any(halo_id >= n_halo):
+            raise PinocchioCatalogError("stencil.halo_id contains out-of-range halo indices")
+
+
+def build_box_sparse_stencil(
+    catalog: HaloCatalog,
+    box_size: float,
+    nmesh: int,
+    rmax_mpc_h: np.ndarray | float,
+    *,
+    periodic: bool = True,
+    max_batch_pairs: int = 1 << 22,
+) -> BoxSparseStencil:
+    """Build a sparse comoving-box cell-halo stencil with a mesh cell list.
+
+    Each halo is assigned to the mesh cell containing it. Candidate cells are
+    the ``(2 k + 1)**3`` neighbours with ``k = ceil(Rmax / cell_size)``, wrapped
+    periodically when ``periodic`` is true. Only cell centres with
+    ``r <= Rmax_halo`` are retained. Haloes sharing the same ``k`` are
+    processed together in NumPy batches of at most ``max_batch_pairs``
+    candidate pairs, so host memory stays bounded and the cost scales with the
+    number of candidate pairs rather than ``nmesh**3 * n_halo``.
+
+    Positions and ``box_size`` are comoving ``Mpc/h``. ``rmax_mpc_h`` may be
+    scalar or per-halo, for example from :func:`nfw_support_radius_mpc_h`.
+    """
+
+    if box_size <= 0.0:
+        raise PinocchioCatalogError("box_size must be positive")
+    nmesh = int(nmesh)
+    if nmesh <= 0:
+        raise PinocchioCatalogError("nmesh must be positive")
+    if max_batch_pairs <= 0:
+        raise PinocchioCatalogError("max_batch_pairs must be positive")
+
+    positions = np.asarray(catalog.position, dtype=np.float64)
+    if positions.ndim != 2 or positions.shape[1] != 3:
+        raise PinocchioCatalogError("catalog.position must have shape (n_halo, 3)")
+    if not np.all(np.isfinite(positions)):
+        raise PinocchioCatalogError("catalog.position must be finite")
+    n_halo = int(positions.shape[0])
+    rmax = _per_halo_rmax(rmax_mpc_h, n_halo)
+
+    cell_size = float(box_size) / nmesh
+    if periodic:
+        positions = np.mod(positions, float(box_size))
+    home = np.floor(positions / cell_size).astype(np.int64)
+    reach = np.minimum(np.ceil(rmax / cell_size), nmesh).astype(np.int64)
+
+    cell_id_chunks: list[np.ndarray] = []
+    halo_id_chunks: list[np.ndarray] = []
+    r_chunks: list[np.ndarray] = []
+    for k in np.unique(reach):
+        if periodic and 2 * k + 1 > nmesh:
+            offsets_1d = np.arange(-(nmesh // 2), nmesh - nmesh // 2, dtype=np.int64)
+        else:
+            offsets_1d = np.arange(-k, k + 1, dtype=np.int64)
+        ox, oy, oz = np.meshgrid(offsets_1d, offsets_1d, offsets_1d, indexing="ij")
+        offsets = np.stack([ox.ravel(), oy.ravel(), oz.ravel()], axis=-1)
+        group = np.flatnonzero(reach == k)
+        batch = max(1, int(max_batch_pairs) // offsets.shape[0])
+
+        for start in range(0, group.size, batch):
+            halo_ids = group[start : start + batch]
+            index = home[halo_ids, None, :] + offsets[None, :, :]
+            if periodic:
+                index = np.mod(index, nmesh)
+                valid = np.ones(index.shape[:2], dtype=bool)
+            else:
+                valid = np.all((index >= 0) & (index < nmesh), axis=-1)
+            dx = (index + 0.5) * cell_size - positions[halo_ids, None, :]
+            if periodic:
+                dx = dx - float(box_size) * np.round(dx / float(box_size))
+            r = np.sqrt(np.sum(dx * dx, axis=-1))
+            keep = valid & (r <= rmax[halo_ids, None])
+            pair_halo, pair_offset = np.nonzero(keep)
+            ix, iy, iz = index[pair_halo, pair_offset].T
+            cell_id_chunks.append((ix * nmesh + iy) * nmesh + iz)
+            halo_id_chunks.append(halo_ids[pair_halo])
+            r_chunks.append(r[pair_halo, pair_offset])
+
+    if cell_id_chunks:
+        cell_id = np.concatenate(cell_id_chunks)
+        halo_id = np.concatenate(halo_id_chunks)
+        r = np.concatenate(r_chunks)
+    else:
+        cell_id = np.empty((0,), dtype=np.int64)
+        halo_id = np.empty((0,), dtype=np.int64)
+        r = np.empty((0,), dtype=np.float64)
+
+    stencil = BoxSparseStencil(
+        cell_id=jnp.asarray(cell_id, dtype=jnp.int32),
+        halo_id=jnp.asarray(halo_id, dtype=jnp.int32),
+        r=jnp.asarray(r, dtype=jnp.asarray(catalog.mass).dtype),
+        nmesh=nmesh,
+    )
+    validate_box_sparse_stencil(stencil, catalog)
+    return stencil
+
+
 def read_pinocchio_mass_sheets(path: PathLike) -> PinocchioMassSheetTable:
     """Read a PINOCCHIO mass-sheet table from ``*.sheets.out``."""
 
@@ -1107,6 +2076,527 @@ def read_pinocchio_mass_map_fits(path: PathLike) -> PinocchioMassMap:
     )
 
 
+@dataclass(frozen=True)
+class _HealpixRingTable:
+    """RING-scheme geometry for rings ``1 .. 4 nside - 1`` (stored 0-based)."""
+
+    z: np.ndarray
+    sin_theta: np.ndarray
+    n_pixels: np.ndarray
+    first_pixel: np.ndarray
+    phase: np.ndarray
+
+
+@lru_cache(maxsize=8)
+def _healpix_ring_table(nside: int) -> _HealpixRingTable:
+    ring = np.arange(1, 4 * nside, dtype=np.int64)
+    north = ring < nside
+    south = ring > 3 * nside
+    cap_index = np.where(south, 4 * nside - ring, ring)
+    cap = north | south
+
+    one_minus_z = cap_index.astype(np.float64) ** 2 / (3.0 * nside * nside)
+    z_equator = (4.0 / 3.0) - 2.0 * ring / (3.0 * nside)
+    z = np.where(cap, 1.0 - one_minus_z, z_equator)
+    z = np.where(south, -z, z)
+    sin_theta = np.sqrt(
+        np.maximum(
+            np.where(cap, one_minus_z * (2.0 - one_minus_z), (1.0 - z_equator) * (1.0 + z_equator)),
+            0.0,
+        )
+    )
+
+    n_pixels = np.where(cap, 4 * cap_index, 4 * nside)
+    npix = 12 * nside * nside
+    first_pixel = np.where(
+        north,
+        2 * cap_index * (cap_index - 1),
+        np.where(
+            south,
+            npix - 2 * cap_index * (cap_index + 1),
+            2 * nside * (nside - 1) + (ring - nside) * 4 * nside,
+        ),
+    )
+    phase = np.where(cap | ((ring + nside) % 2 == 0), 0.5, 0.0)
+    return _HealpixRingTable(
+        z=z,
+        sin_theta=sin_theta,
+        n_pixels=n_pixels.astype(np.int64),
+        first_pixel=first_pixel.astype(np.int64),
+        phase=phase,
+    )
+
+
+def _healpix_disc_ring_range(
+    rings: _HealpixRingTable, z_centre: np.ndarray, alpha: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return inclusive 0-based ring ranges crossing discs of radius ``alpha``."""
+
+    theta = np.arccos(np.clip(z_centre, -1.0, 1.0))
+    z_top = np.cos(np.maximum(theta - alpha, 0.0))
+    z_bottom = np.cos(np.minimum(theta + alpha, np.pi))
+    # Ring z values decrease with ring index.
+    ring_lo = np.searchsorted(-rings.z, -z_top, side="left")
+    ring_hi = np.searchsorted(-rings.z, -z_bottom, side="right") - 1
+    return ring_lo.astype(np.int64), ring_hi.astype(np.int64)
+
+
+def _healpix_disc_ring_spans(
+    rings: _HealpixRingTable,
+    ring: np.ndarray,
+    centre: np.ndarray,
+    alpha: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the first in-ring pixel index and pixel count of each disc span.
+
+    The first index may be negative or exceed the ring length; callers wrap it
+    modulo the ring size.
+    """
+
+    z = rings.z[ring]
+    sin_theta = rings.sin_theta[ring]
+    n_pixels = rings.n_pixels[ring]
+    z0 = np.clip(centre[:, 2], -1.0, 1.0)
+    sin_theta0 = np.hypot(centre[:, 0], centre[:, 1])
+    phi0 = np.mod(np.arctan2(centre[:, 1], centre[:, 0]), 2.0 * np.pi)
+
+    denom = sin_theta * sin_theta0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_dphi = (np.cos(alpha) - z * z0) / denom
+    full = (denom <= 0.0) | (cos_dphi <= -1.0)
+    dphi = np.arccos(np.clip(np.nan_to_num(cos_dphi, nan=1.0), -1.0, 1.0))
+    step = 2.0 * np.pi / n_pixels
+    first = np.ceil((phi0 - dphi) / step - rings.phase[ring]).astype(np.int64)
+    last = np.floor((phi0 + dphi) / step - rings.phase[ring]).astype(np.int64)
+    count = np.clip(last - first + 1, 0, None)
+    full = full | (count >= n_pixels)
+    first = np.where(full, 0, first)
+    count = np.where(full, n_pixels, count)
+    count = np.where((denom > 0.0) & (cos_dphi > 1.0), 0, count)
+    return first, count
+
+
+def _healpix_ring_pixel_vectors(
+    rings: _HealpixRingTable, ring: np.ndarray, j: np.ndarray
+) -> np.ndarray:
+    phi = (j + rings.phase[ring]) * (2.0 * np.pi / rings.n_pixels[ring])
+    sin_theta = rings.sin_theta[ring]
+    return np.stack([sin_theta * np.cos(phi), sin_theta * np.sin(phi), rings.z[ring]], axis=-1)
+
+
+def _ragged_arange(counts: np.ndarray) -> np.ndarray:
+    """Concatenate ``arange(c)`` for each ``c`` in ``counts``."""
+
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    starts = np.cumsum(counts) - counts
+    return np.arange(total, dtype=np.int64) - np.repeat(starts, counts)
+
+
+def _cumulative_batches(counts: np.ndarray, limit: int):
+    """Yield contiguous slices whose summed ``counts`` stay within ``limit``.
+
+    A single entry larger than ``limit`` forms its own slice.
+    """
+
+    counts = np.asarray(counts, dtype=np.int64)
+    n = int(counts.shape[0])
+    cumulative = np.cumsum(counts)
+    start = 0
+    while start < n:
+        base = cumulative[start - 1] if start else 0
+        stop = int(np.searchsorted(cumulative, base + limit, side="right"))
+        stop = max(stop, start + 1)
+        yield slice(start, stop)
+        start = stop
+
+
+@dataclass(frozen=True)
+class _HealpixStencilShard:
+    """Pairs and per-halo counters for one contiguous halo shard."""
+
+    pix_id: np.ndarray
+    halo_id: np.ndarray
+    r_perp: np.ndarray
+    query_counts: np.ndarray
+    inside_counts: np.ndarray
+    kept_counts: np.ndarray
+    n_halos: int
+    elapsed_seconds: float
+
+
+def _healpix_stencil_shard(
+    nside: int,
+    pixel_index: CompactPixelIndex,
+    halo_unit_vectors: np.ndarray,
+    halo_chi: np.ndarray,
+    rmax: np.ndarray,
+    halo_slice: slice,
+    max_batch_pixels: int,
+) -> _HealpixStencilShard:
+    """Build ring-range stencil pairs for the haloes in ``halo_slice``.
+
+    ``halo_id`` values are global catalogue indices; the counters have one entry
+    per halo of the shard.
+    """
+
+    t0 = perf_counter()
+    start = int(halo_slice.start)
+    n_shard = int(halo_slice.stop) - start
+    unit_vectors = halo_unit_vectors[halo_slice]
+    chi = halo_chi[halo_slice]
+    shard_rmax = rmax[halo_slice]
+    rings = _healpix_ring_table(nside)
+    # A small angular margin makes the ring-range query a superset of the
+    # pixel centres that pass the exact chord test below.
+    alpha = 2.0 * np.arcsin(np.minimum(1.0, shard_rmax / (2.0 * chi)))
+    alpha_query = alpha * (1.0 + 1.0e-9) + 1.0e-12
+    ring_lo, ring_hi = _healpix_disc_ring_range(rings, unit_vectors[:, 2], alpha_query)
+    n_ring_per_halo = np.maximum(ring_hi - ring_lo + 1, 0)
+
+    pix_id_chunks: list[np.ndarray] = [np.empty((0,), dtype=np.int64)]
+    halo_id_chunks: list[np.ndarray] = [np.empty((0,), dtype=np.int64)]
+    r_perp_chunks: list[np.ndarray] = [np.empty((0,), dtype=np.float64)]
+    query_counts = np.zeros(n_shard, dtype=np.int64)
+    inside_counts = np.zeros(n_shard, dtype=np.int64)
+    kept_counts = np.zeros(n_shard, dtype=np.int64)
+
+    for batch in _cumulative_batches(n_ring_per_halo, max_batch_pixels):
+        local_ids = np.arange(batch.start, batch.stop, dtype=np.int64)
+        span_halo = np.repeat(local_ids, n_ring_per_halo[batch])
+        span_ring = ring_lo[span_halo] + _ragged_arange(n_ring_per_halo[batch])
+        span_first, span_count = _healpix_disc_ring_spans(
+            rings, span_ring, unit_vectors[span_halo], alpha_query[span_halo]
+        )
+
+        for span_slice in _cumulative_batches(span_count, max_batch_pixels):
+            counts = span_count[span_slice]
+            cand_halo = np.repeat(span_halo[span_slice], counts)
+            cand_ring = np.repeat(span_ring[span_slice], counts)
+            j = np.repeat(span_first[span_slice], counts) + _ragged_arange(counts)
+            j = np.mod(j, rings.n_pixels[cand_ring])
+            cand_pixel = rings.first_pixel[cand_ring] + j
+            query_counts += np.bincount(cand_halo, minlength=n_shard)
+
+            rows = pixel_index.rows(cand_pixel)
+            inside = rows >= 0
+            cand_halo = cand_halo[inside]
+            cand_ring = cand_ring[inside]
+            j = j[inside]
+            rows = rows[inside]
+            inside_counts += np.bincount(cand_halo, minlength=n_shard)
+
+            pixel_vectors = _healpix_ring_pixel_vectors(rings, cand_ring, j)
+            chord = np.linalg.norm(pixel_vectors - unit_vectors[cand_halo], axis=-1)
+            r_perp = chi[cand_halo] * chord
+            keep = r_perp <= shard_rmax[cand_halo]
+            kept_counts += np.bincount(cand_halo[keep], minlength=n_shard)
+            pix_id_chunks.append(rows[keep])
+            halo_id_chunks.append(cand_halo[keep] + start)
+            r_perp_chunks.append(r_perp[keep])
+
+    return _HealpixStencilShard(
+        pix_id=np.concatenate(pix_id_chunks),
+        halo_id=np.concatenate(halo_id_chunks),
+        r_perp=np.concatenate(r_perp_chunks),
+        query_counts=query_counts,
+        inside_counts=inside_counts,
+        kept_counts=kept_counts,
+        n_halos=n_shard,
+        elapsed_seconds=perf_counter() - t0,
+    )
+
+
+def _healpix_stencil_shards(
+    nside: int,
+    pixel_index: CompactPixelIndex,
+    halo_unit_vectors: np.ndarray,
+    halo_chi: np.ndarray,
+    rmax: np.ndarray,
+    n_workers: int,
+    max_batch_pixels: int,
+) -> list[_HealpixStencilShard]:
+    """Build all halo shards serially or in a process pool."""
+
+    n_halo = int(halo_chi.shape[0])
+    if n_workers == 1 or n_halo < 2:
+        return [
+            _healpix_stencil_shard(
+                nside,
+                pixel_index,
+                halo_unit_vectors,
+                halo_chi,
+                rmax,
+                slice(0, n_halo),
+                max_batch_pixels,
+            )
+        ]
+    return _healpix_stencil_shards_parallel(
+        nside,
+        pixel_index,
+        halo_unit_vectors,
+        halo_chi,
+        rmax,
+        n_workers,
+        max_batch_pixels,
+    )
+
+
+def _healpix_vec2pix_ring(nside: int, vectors: np.ndarray) -> np.ndarray:
+    """Return RING pixel indices containing ``vectors`` (``healpy.vec2pix``)."""
+
+    vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 3)
+    norm = np.linalg.norm(vectors, axis=-1)
+    z = vectors[:, 2] / norm
+    za = np.abs(z)
+    tt = np.mod(np.arctan2(vectors[:, 1], vectors[:, 0]), 2.0 * np.pi) * (2.0 / np.pi)
+    tt = np.where(tt >= 4.0, 0.0, tt)
+
+    # Equatorial belt, |z| <= 2/3.
+    temp1 = nside * (0.5 + tt)
+    temp2 = nside * z * 0.75
+    jp = np.floor(temp1 - temp2).astype(np.int64)
+    jm = np.floor(temp1 + temp2).astype(np.int64)
+    ir = nside + 1 + jp - jm
+    kshift = 1 - (ir & 1)
+    ip = np.mod((jp + jm - nside + kshift + 1) // 2, 4 * nside)
+    equator = 2 * nside * (nside - 1) + (ir - 1) * 4 * nside + ip
+
+    # Polar caps; ``1 - |z|`` from the transverse norm avoids cancellation.
+    sin2 = (vectors[:, 0] ** 2 + vectors[:, 1] ** 2) / (norm * norm)
+    tmp = nside * np.sqrt(3.0 * sin2 / (1.0 + za))
+    tp = tt - np.floor(tt)
+    jp = np.floor(tp * tmp).astype(np.int64)
+    jm = np.floor((1.0 - tp) * tmp).astype(np.int64)
+    ir = jp + jm + 1
+    ip = np.mod(np.floor(tt * ir).astype(np.int64), 4 * ir)
+    polar = np.where(
+        z > 0.0,
+        2 * ir * (ir - 1) + ip,
+        12 * nside * nside - 2 * ir * (ir + 1) + ip,
+    )
+    return np.where(za <= 2.0 / 3.0, equator, polar)
+
+
+def _healpix_stencil_shard_slices(
+    nside: int,
+    halo_chi: np.ndarray,
+    rmax: np.ndarray,
+    n_shards: int,
+) -> list[slice]:
+    """Split haloes into contiguous shards of similar estimated query cost.
+
+    The cost of one halo is modelled as one plus the number of pixels in its
+    disc, so shards of many small haloes and of a few large ones balance.
+    """
+
+    n_halo = int(halo_chi.shape[0])
+    alpha = 2.0 * np.arcsin(np.minimum(1.0, rmax / (2.0 * halo_chi)))
+    pixel_area = np.pi / (3.0 * nside * nside)
+    cumulative = np.cumsum(1.0 + np.pi * alpha * alpha / pixel_area)
+    targets = cumulative[-1] * np.arange(1, n_shards) / n_shards
+    cuts = np.searchsorted(cumulative, targets, side="left") + 1
+    bounds = np.unique(np.concatenate([[0], np.clip(cuts, 1, n_halo), [n_halo]]))
+    return [slice(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:], strict=True)]
+
+
+def _healpix_stencil_shard_worker(
+    nside: int,
+    n_pix: int,
+    first_pixel: int,
+    shared_specs: dict[str, tuple[str, tuple[int, ...], str]],
+    halo_slice: slice,
+    max_batch_pixels: int,
+) -> _HealpixStencilShard:
+    """Process-pool entry point attaching to the shared-memory inputs."""
+
+    handles = [SharedMemory(name=name) for name, _, _ in shared_specs.values()]
+    arrays = {
+        key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=handle.buf)
+        for (key, (_, shape, dtype)), handle in zip(shared_specs.items(), handles, strict=True)
+    }
+    pixel_index = CompactPixelIndex(
+        n_pix=n_pix,
+        first_pixel=first_pixel,
+        dense_rows=arrays.get("dense_rows"),
+        sorted_pixels=arrays.get("sorted_pixels"),
+        sorted_rows=arrays.get("sorted_rows"),
+    )
+    try:
+        return _healpix_stencil_shard(
+            nside,
+            pixel_index,
+            arrays["halo_unit_vectors"],
+            arrays["halo_chi"],
+            arrays["rmax"],
+            halo_slice,
+            max_batch_pixels,
+        )
+    finally:
+        # Views into shared memory must be released before the handles close.
+        del pixel_index
+        arrays.clear()
+        for handle in handles:
+            handle.close()
+
+
+def _healpix_stencil_shards_parallel(
+    nside: int,
+    pixel_index: CompactPixelIndex,
+    halo_unit_vectors: np.ndarray,
+    halo_chi: np.ndarray,
+    rmax: np.ndarray,
+    n_workers: int,
+    max_batch_pixels: int,
+) -> list[_HealpixStencilShard]:
+    """Build halo shards in a process pool over shared-memory inputs."""
+
+    index_arrays = {
+        "dense_rows": pixel_index.dense_rows,
+        "sorted_pixels": pixel_index.sorted_pixels,
+        "sorted_rows": pixel_index.sorted_rows,
+    }
+    inputs = {
+        **{key: array for key, array in index_arrays.items() if array is not None},
+        "halo_unit_vectors": halo_unit_vectors,
+        "halo_chi": halo_chi,
+        "rmax": rmax,
+    }
+    slices = _healpix_stencil_shard_slices(nside, halo_chi, rmax, n_workers)
+    handles: list[SharedMemory] = []
+    try:
+        shared_specs = {}
+        for key, array in inputs.items():
+            array = np.ascontiguousarray(array)
+            handle = SharedMemory(create=True, size=max(array.nbytes, 1))
+            handles.append(handle)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=handle.buf)[...] = array
+            shared_specs[key] = (handle.name, array.shape, array.dtype.str)
+        # ``spawn`` avoids forking a process that may already hold JAX threads.
+        with ProcessPoolExecutor(
+            max_workers=min(n_workers, len(slices)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _healpix_stencil_shard_worker,
+                    nside,
+                    pixel_index.n_pix,
+                    pixel_index.first_pixel,
+                    shared_specs,
+                    halo_slice,
+                    max_batch_pixels,
+                )
+                for halo_slice in slices
+            ]
+            return [future.result() for future in futures]
+    finally:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
+
+
+def _lightcone_sparse_stencil_cache_key(
+    nside: int,
+    pixels: np.ndarray,
+    halo_unit_vectors: np.ndarray,
+    halo_chi: np.ndarray,
+    rmax: np.ndarray,
+    r_perp_dtype: np.dtype,
+    subpixel_threshold: float | None = None,
+) -> str:
+    digest = hashlib.sha256(b"geppetto.lightcone_sparse_stencil.ring.v1")
+    digest.update(f"nside={nside};r_perp={np.dtype(r_perp_dtype).str}".encode())
+    if subpixel_threshold is not None:
+        # Appended only when set so keys of full stencils stay unchanged.
+        digest.update(f";subpixel={subpixel_threshold!r}".encode())
+    for array, dtype in (
+        (pixels, np.int64),
+        (halo_unit_vectors, np.float64),
+        (halo_chi, np.float64),
+        (rmax, np.float64),
+    ):
+        array = np.ascontiguousarray(array, dtype=dtype)
+        digest.update(repr(array.shape).encode())
+        digest.update(memoryview(array).cast("B"))
+    return digest.hexdigest()
+
+
+def _save_stencil_atomically(stencil: LightconeSparseStencil, path: Path) -> None:
+    """Save into a sibling temporary directory and rename it into place."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+    try:
+        stencil.save(tmp)
+        os.replace(tmp, path)
+    except OSError:
+        # A concurrent run may have published the same key first.
+        if not (path / "stencil.json").is_file():
+            raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _pad_halo_column(values: Any, fill: float | list[float], n_extra: int) -> Any:
+    values = jnp.asarray(values)
+    padding = jnp.broadcast_to(jnp.asarray(fill, dtype=values.dtype), (n_extra,) + values.shape[1:])
+    return jnp.concatenate([values, padding])
+
+
+def _nfw_tapered_mass_loss_radius(
+    concentration: np.ndarray, width_fraction: float, tolerance: float
+) -> np.ndarray:
+    """Solve ``M(> u R_delta) / M_total = tolerance`` for the tapered projected NFW.
+
+    The projected mass element is ``u F(c u) T(u) du`` up to a per-halo
+    constant, with ``F`` the projected kernel and ``T(u)`` the logistic taper
+    of width ``width_fraction`` centred on ``u = 1``. The tail is integrated
+    with the trapezoid rule on a grid that is logarithmic inside ``R_delta``
+    and resolves the taper outside it, then inverted by linear interpolation.
+    """
+
+    u = np.concatenate(
+        [
+            np.geomspace(1.0e-6, 1.0, 512, endpoint=False),
+            np.linspace(1.0, 1.0 + 60.0 * width_fraction, 1201),
+        ]
+    )
+    c = np.asarray(concentration, dtype=np.float64)[:, None]
+    kernel, _ = _projected_nfw_kernel_numpy(c * u)
+    taper = 0.5 * (1.0 - np.tanh((u - 1.0) / (2.0 * width_fraction)))
+    integrand = u * kernel * taper
+    segments = 0.5 * (integrand[:, 1:] + integrand[:, :-1]) * np.diff(u)
+    tail = np.zeros_like(integrand)
+    tail[:, :-1] = np.cumsum(segments[:, ::-1], axis=1)[:, ::-1]
+    fraction = tail / tail[:, :1]
+
+    # ``fraction`` decreases along ``u``; find the first grid point at or below
+    # the tolerance and interpolate back into the preceding interval.
+    hi = np.argmax(fraction <= tolerance, axis=1)
+    lo = np.maximum(hi - 1, 0)
+    rows = np.arange(c.shape[0])
+    f_lo = fraction[rows, lo]
+    f_hi = fraction[rows, hi]
+    gap = f_lo - f_hi
+    weight = np.clip((f_lo - tolerance) / np.where(gap > 0.0, gap, 1.0), 0.0, 1.0)
+    return u[lo] + weight * (u[hi] - u[lo])
+
+
+def _per_halo_rmax(rmax_mpc_h: np.ndarray | float, n_halo: int) -> np.ndarray:
+    rmax = np.asarray(rmax_mpc_h, dtype=np.float64)
+    if rmax.ndim == 0:
+        rmax_value = float(rmax)
+        if not math.isfinite(rmax_value) or rmax_value < 0.0:
+            raise PinocchioCatalogError("rmax_mpc_h values must be finite and non-negative")
+        rmax = np.full((n_halo,), rmax_value, dtype=np.float64)
+    elif rmax.shape != (n_halo,):
+        raise PinocchioCatalogError("rmax_mpc_h must be scalar or have shape (n_halo,)")
+    if not np.all(np.isfinite(rmax)) or np.any(rmax < 0.0):
+        raise PinocchioCatalogError("rmax_mpc_h values must be finite and non-negative")
+    return rmax
+
+
 def _detect_catalog_format(path: Path) -> CatalogFormat:
     first_file = _pinocchio_output_files(path, label="catalog")[0]
     try:
@@ -1140,11 +2630,37 @@ def _pinocchio_output_files(path: Path, *, label: str) -> list[Path]:
     raise PinocchioCatalogError(f"Cannot find PINOCCHIO {label}: {path} or {path}.0")
 
 
-def _read_binary_snapshot_catalog_file(path: Path) -> np.ndarray:
+@dataclass(frozen=True)
+class _BinaryCatalogLayout:
+    """Validated record blocks of one memory-mapped binary PINOCCHIO file.
+
+    ``blocks`` holds ``(byte offset, n_halos)`` pairs into ``data``; records are
+    decoded only when copied out by :func:`_fill_binary_columns`.
+    """
+
+    path: Path
+    data: np.ndarray
+    dtype: np.dtype
+    stored_dtype: np.dtype
+    blocks: tuple[tuple[int, int], ...]
+
+    @property
+    def size(self) -> int:
+        return sum(count for _, count in self.blocks)
+
+
+def _map_binary_file(path: Path, label: str) -> np.ndarray:
     try:
-        bindata = path.read_bytes()
+        if path.stat().st_size == 0:
+            # ``mmap`` cannot map empty files.
+            return np.empty(0, dtype=np.uint8)
+        return np.memmap(path, dtype=np.uint8, mode="r")
     except OSError as exc:
-        raise PinocchioCatalogError(f"Cannot read binary PINOCCHIO snapshot catalog: {path}") from exc
+        raise PinocchioCatalogError(f"Cannot read binary PINOCCHIO {label}: {path}") from exc
+
+
+def _scan_binary_snapshot_catalog_file(path: Path) -> _BinaryCatalogLayout:
+    bindata = _map_binary_file(path, "snapshot catalog")
     if len(bindata) < 16:
         raise PinocchioCatalogError(f"Binary PINOCCHIO snapshot catalog is truncated: {path}")
 
@@ -1173,7 +2689,7 @@ def _read_binary_snapshot_catalog_file(path: Path) -> np.ndarray:
         )
 
     offset = 4 * np.dtype(np.int32).itemsize
-    chunks: list[np.ndarray] = []
+    blocks: list[tuple[int, int]] = []
     while offset < len(bindata):
         count_record, offset = _read_int32_triplet(bindata, offset, path, "snapshot block count")
         if count_record[0] != np.dtype(np.int32).itemsize or count_record[2] != count_record[0]:
@@ -1189,39 +2705,32 @@ def _read_binary_snapshot_catalog_file(path: Path) -> np.ndarray:
             expected_bytes = n_halos * record_length
             if int(block_bytes) != expected_bytes:
                 raise PinocchioCatalogError(f"Invalid snapshot data block size in {path}")
-            raw = _read_bytes(bindata, offset, expected_bytes, path, "snapshot records")
-            offset += expected_bytes
+            blocks.append((offset, n_halos))
+            offset = _skip_bytes(bindata, offset, expected_bytes, path, "snapshot records")
             closing_bytes, offset = _read_int32(bindata, offset, path, "snapshot data record")
             if int(closing_bytes) != expected_bytes:
                 raise PinocchioCatalogError(f"Invalid closing snapshot data block size in {path}")
         else:
             expected_bytes = n_halos * stored_dtype.itemsize
-            raw = _read_bytes(bindata, offset, expected_bytes, path, "snapshot records")
-            offset += expected_bytes
-
-        stored = np.frombuffer(raw, dtype=stored_dtype, count=n_halos)
-        chunks.append(_copy_structured_fields(stored, cat_dtype))
+            blocks.append((offset, n_halos))
+            offset = _skip_bytes(bindata, offset, expected_bytes, path, "snapshot records")
 
     if offset != len(bindata):
         raise PinocchioCatalogError(f"Unexpected trailing bytes in binary snapshot catalog: {path}")
-    catalog = _concatenate_structured_chunks(chunks)
-    return catalog if catalog is not None else np.empty(0, dtype=cat_dtype)
+    return _BinaryCatalogLayout(path, bindata, cat_dtype, stored_dtype, tuple(blocks))
 
 
-def _read_binary_lightcone_catalog_file(path: Path) -> np.ndarray:
-    return _read_binary_lightcone_file(path, dtype_factory=_binary_lightcone_catalog_dtype)
+def _scan_binary_lightcone_catalog_file(path: Path) -> _BinaryCatalogLayout:
+    return _scan_binary_lightcone_file(path, dtype_factory=_binary_lightcone_catalog_dtype)
 
 
-def _read_binary_lightcone_light_catalog_file(path: Path) -> np.ndarray:
-    return _read_binary_lightcone_file(path, dtype_factory=_binary_lightcone_light_catalog_dtype)
+def _scan_binary_lightcone_light_catalog_file(path: Path) -> _BinaryCatalogLayout:
+    return _scan_binary_lightcone_file(path, dtype_factory=_binary_lightcone_light_catalog_dtype)
 
 
-def _read_binary_lightcone_file(path: Path, *, dtype_factory) -> np.ndarray:
-    try:
-        bindata = path.read_bytes()
-    except OSError as exc:
-        raise PinocchioCatalogError(f"Cannot read binary PINOCCHIO PLC catalog: {path}") from exc
-    if not bindata:
+def _scan_binary_lightcone_file(path: Path, *, dtype_factory) -> _BinaryCatalogLayout:
+    bindata = _map_binary_file(path, "PLC catalog")
+    if not len(bindata):
         raise PinocchioCatalogError(f"Binary PINOCCHIO PLC catalog is empty: {path}")
 
     header = np.frombuffer(bindata, dtype=np.int32, count=min(3, len(bindata) // 4))
@@ -1249,10 +2758,10 @@ def _read_binary_lightcone_file(path: Path, *, dtype_factory) -> np.ndarray:
     if not new_run:
         if len(bindata) % stored_dtype.itemsize != 0:
             raise PinocchioCatalogError(f"Classic binary PINOCCHIO PLC size is inconsistent: {path}")
-        stored = np.frombuffer(bindata, dtype=stored_dtype)
-        return _copy_structured_fields(stored, cat_dtype)
+        blocks = ((0, len(bindata) // stored_dtype.itemsize),)
+        return _BinaryCatalogLayout(path, bindata, cat_dtype, stored_dtype, blocks)
 
-    chunks: list[np.ndarray] = []
+    block_list: list[tuple[int, int]] = []
     while offset < len(bindata):
         count_record, offset = _read_int32_triplet(bindata, offset, path, "PLC block count")
         if count_record[0] != np.dtype(np.int32).itemsize or count_record[2] != count_record[0]:
@@ -1265,19 +2774,168 @@ def _read_binary_lightcone_file(path: Path, *, dtype_factory) -> np.ndarray:
         expected_bytes = n_halos * record_length
         if int(block_bytes) != expected_bytes:
             raise PinocchioCatalogError(f"Invalid PLC data block size in {path}")
-        raw = _read_bytes(bindata, offset, expected_bytes, path, "PLC records")
-        offset += expected_bytes
+        if n_halos:
+            block_list.append((offset, n_halos))
+        offset = _skip_bytes(bindata, offset, expected_bytes, path, "PLC records")
         closing_bytes, offset = _read_int32(bindata, offset, path, "PLC data record")
         if int(closing_bytes) != expected_bytes:
             raise PinocchioCatalogError(f"Invalid closing PLC data block size in {path}")
-        if n_halos:
-            stored = np.frombuffer(raw, dtype=stored_dtype, count=n_halos)
-            chunks.append(_copy_structured_fields(stored, cat_dtype))
 
     if offset != len(bindata):
         raise PinocchioCatalogError(f"Unexpected trailing bytes in binary PLC catalog: {path}")
-    catalog = _concatenate_structured_chunks(chunks)
-    return catalog if catalog is not None else np.empty(0, dtype=cat_dtype)
+    return _BinaryCatalogLayout(path, bindata, cat_dtype, stored_dtype, tuple(block_list))
+
+
+def _read_binary_catalog_columns(
+    files: list[Path], scan, fields: Mapping[str, str], n_threads: int = 1
+) -> dict[str, np.ndarray | None]:
+    """Scan every split file, then decode each requested field into one column.
+
+    ``fields`` maps output names to record field names. Each column is
+    preallocated contiguously (floats as ``float64``, integers as 64-bit) and
+    filled once from the mapped records; unrequested record fields are never
+    touched. Fields missing from the record layout come back as ``None``.
+
+    With ``n_threads > 1`` the files are scanned by a thread pool, and each
+    file then fills its own row range, known from the scanned block headers.
+    NumPy releases the GIL while copying, so page faults on slow parallel
+    filesystems overlap across files.
+    """
+
+    if n_threads <= 0:
+        raise PinocchioCatalogError("n_threads must be positive")
+    n_threads = min(n_threads, len(files))
+    pool = ThreadPoolExecutor(n_threads, "pinocchio-read") if n_threads > 1 else None
+    try:
+        map_files = map if pool is None else pool.map
+        return _decode_binary_catalog_columns(files, scan, fields, map_files)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _decode_binary_catalog_columns(
+    files: list[Path], scan, fields: Mapping[str, str], map_files
+) -> dict[str, np.ndarray | None]:
+    layouts = list(map_files(scan, files))
+    dtype = layouts[0].dtype
+    for layout in layouts[1:]:
+        if layout.dtype != dtype:
+            raise PinocchioCatalogError(
+                f"Split binary PINOCCHIO files have inconsistent record layouts: {layout.path}"
+            )
+    n_halos = sum(layout.size for layout in layouts)
+    columns: dict[str, np.ndarray | None] = {}
+    for name, field in fields.items():
+        if field not in (dtype.names or ()):
+            columns[name] = None
+            continue
+        field_dtype = dtype[field]
+        columns[name] = np.empty(
+            (n_halos, *field_dtype.shape), dtype=_decoded_field_dtype(field_dtype)
+        )
+    targets = {fields[name]: column for name, column in columns.items() if column is not None}
+    starts = accumulate((layout.size for layout in layouts[:-1]), initial=0)
+    for _ in map_files(_fill_binary_columns, layouts, repeat(targets), starts):
+        pass
+    return columns
+
+
+def _fill_binary_columns(
+    layout: _BinaryCatalogLayout, targets: Mapping[str, np.ndarray], start: int
+) -> int:
+    """Copy ``layout``'s record fields into ``targets[field][start:]``; return the end."""
+
+    for offset, count in layout.blocks:
+        # A zero-copy structured view of the mapped records.
+        stored = np.ndarray((count,), dtype=layout.stored_dtype, buffer=layout.data, offset=offset)
+        for field, column in targets.items():
+            column[start : start + count] = stored[field]
+        start += count
+    return start
+
+
+def _iter_binary_lightcone_blocks(
+    files: list[Path], names: tuple[str, ...], max_haloes: int
+) -> Iterator[dict[str, np.ndarray]]:
+    for file in files:
+        layout = _scan_binary_lightcone_catalog_file(file)
+        fields = {name: _LIGHTCONE_BINARY_FIELDS[name] for name in names}
+        for offset, count in layout.blocks:
+            stored = np.ndarray(
+                (count,), dtype=layout.stored_dtype, buffer=layout.data, offset=offset
+            )
+            for start in range(0, count, max_haloes):
+                records = stored[start : start + max_haloes]
+                yield {
+                    name: np.asarray(
+                        records[field], dtype=_decoded_field_dtype(layout.dtype[field])
+                    )
+                    for name, field in fields.items()
+                }
+
+
+def _iter_ascii_lightcone_blocks(
+    files: list[Path], names: tuple[str, ...], max_haloes: int
+) -> Iterator[dict[str, np.ndarray]]:
+    for file in files:
+        data = _load_numeric_table(file, expected_columns=13, label="PLC catalog")
+        fields = _ascii_catalog_columns(data, _LIGHTCONE_ASCII_COLUMNS, names, project=True)
+        del data
+        if "group_ids" in fields:
+            fields["group_ids"] = _integer_column(fields["group_ids"], file, "group IDs")
+        n_halos = fields["masses_msun_h"].shape[0]
+        for start in range(0, n_halos, max_haloes):
+            yield {name: values[start : start + max_haloes] for name, values in fields.items()}
+
+
+def _lightcone_chunk(
+    pieces: list[dict[str, np.ndarray]], names: tuple[str, ...], source: Path
+) -> PinocchioLightconeCatalog:
+    fields = {name: np.concatenate([piece[name] for piece in pieces]) for name in names}
+    _require_positive(fields["masses_msun_h"], source, "PLC masses")
+    return PinocchioLightconeCatalog(
+        **{name: fields.get(name) for name in _LIGHTCONE_BINARY_FIELDS},
+        source=source,
+    )
+
+
+def _decoded_field_dtype(field_dtype: np.dtype) -> np.dtype:
+    """Return the column dtype for a record field: ``float64``, ``uint64`` or ``int64``."""
+
+    kind = field_dtype.base.kind
+    return np.dtype(np.float64 if kind == "f" else np.uint64 if kind == "u" else np.int64)
+
+
+def _requested_catalog_columns(
+    columns: Sequence[str] | None, available: Mapping[str, Any], label: str
+) -> tuple[str, ...]:
+    if columns is None:
+        return tuple(available)
+    if isinstance(columns, str):
+        raise PinocchioCatalogError("columns must be a sequence of field names, not a string")
+    requested = {*columns, "masses_msun_h"}
+    unknown = sorted(requested.difference(available))
+    if unknown:
+        raise PinocchioCatalogError(f"Unknown PINOCCHIO {label} columns: {', '.join(unknown)}")
+    return tuple(name for name in available if name in requested)
+
+
+def _ascii_catalog_columns(
+    data: np.ndarray, layout: Mapping[str, int | slice], names: tuple[str, ...], *, project: bool
+) -> dict[str, np.ndarray]:
+    columns = {name: data[:, layout[name]] for name in names}
+    if project:
+        # Copy so the full table can be released once unused columns are dropped.
+        columns = {name: np.ascontiguousarray(column) for name, column in columns.items()}
+    return columns
+
+
+def _catalog_column(catalog: Any, name: str, label: str) -> np.ndarray:
+    values = getattr(catalog, name)
+    if values is None:
+        raise PinocchioCatalogError(f"PINOCCHIO {label} was read without the {name} column")
+    return values
 
 
 def _binary_snapshot_catalog_dtype(
@@ -1421,67 +3079,115 @@ def _binary_lightcone_light_catalog_dtype(
     return np.dtype(fields), np.dtype(stored_fields)
 
 
-def _copy_structured_fields(data: np.ndarray, dtype: np.dtype) -> np.ndarray:
-    copied = np.empty(data.shape[0], dtype=dtype)
-    for name in copied.dtype.names or ():
-        copied[name] = data[name]
-    return copied
-
-
-def _concatenate_structured_chunks(chunks: list[np.ndarray]) -> np.ndarray | None:
-    if not chunks:
-        return None
-    nonempty = [chunk for chunk in chunks if chunk.size]
-    if nonempty:
-        return np.concatenate(nonempty)
-    return np.empty(0, dtype=chunks[0].dtype)
-
-
-def _read_int32(data: bytes, offset: int, path: Path, label: str) -> tuple[int, int]:
+def _read_int32(data: np.ndarray, offset: int, path: Path, label: str) -> tuple[int, int]:
     raw = _read_bytes(data, offset, np.dtype(np.int32).itemsize, path, label)
     return int(np.frombuffer(raw, dtype=np.int32, count=1)[0]), offset + np.dtype(np.int32).itemsize
 
 
 def _read_int32_triplet(
-    data: bytes, offset: int, path: Path, label: str
+    data: np.ndarray, offset: int, path: Path, label: str
 ) -> tuple[np.ndarray, int]:
     nbytes = 3 * np.dtype(np.int32).itemsize
     raw = _read_bytes(data, offset, nbytes, path, label)
     return np.frombuffer(raw, dtype=np.int32, count=3), offset + nbytes
 
 
-def _read_bytes(data: bytes, offset: int, nbytes: int, path: Path, label: str) -> bytes:
+def _read_bytes(data: np.ndarray, offset: int, nbytes: int, path: Path, label: str) -> np.ndarray:
+    end = _skip_bytes(data, offset, nbytes, path, label)
+    return data[offset:end]
+
+
+def _skip_bytes(data: np.ndarray, offset: int, nbytes: int, path: Path, label: str) -> int:
     end = offset + nbytes
     if offset < 0 or nbytes < 0 or end > len(data):
         raise PinocchioCatalogError(f"Truncated binary PINOCCHIO {label}: {path}")
-    return data[offset:end]
+    return end
 
 
 def _load_numeric_table(path: Path, *, expected_columns: int, label: str) -> np.ndarray:
+    """Parse whitespace-separated numeric rows from ``path`` or its split files.
+
+    Files are streamed in ``_ASCII_BLOCK_BYTES`` blocks cut at line ends, and
+    each block is handed as bytes to NumPy's C ``loadtxt`` parser, which skips
+    ``#`` comments and blank lines itself. Rows land in a ``(capacity,
+    expected_columns)`` array sized from the bytes per row seen so far and
+    resized in place, so the text is never held in full.
+    """
+
     try:
         files = _pinocchio_output_files(path, label=label)
-        text = "\n".join(file.read_text(encoding="utf-8") for file in files)
-    except (OSError, UnicodeDecodeError) as exc:
+        total_bytes = sum(file.stat().st_size for file in files)
+        data = np.empty((0, expected_columns), dtype=np.float64)
+        n_rows = 0
+        read_bytes = 0
+        for file in files:
+            with file.open("rb") as stream:
+                carry = b""
+                while True:
+                    block = stream.read(_ASCII_BLOCK_BYTES)
+                    if block:
+                        cut = block.rfind(b"\n") + 1
+                        if cut == 0:
+                            carry += block
+                            continue
+                        text, carry = carry + block[:cut], block[cut:]
+                    elif carry:
+                        text, carry = carry + b"\n", b""
+                    else:
+                        break
+                    rows = _parse_numeric_block(text, expected_columns, path, label)
+                    if n_rows + len(rows) > len(data):
+                        # Rows per byte of the text so far predicts the whole table.
+                        parsed_bytes = max(read_bytes + stream.tell(), 1)
+                        estimate = (n_rows + len(rows)) * total_bytes // parsed_bytes
+                        capacity = max(n_rows + len(rows), estimate + 1, 2 * len(data))
+                        data.resize((capacity, expected_columns), refcheck=False)
+                    data[n_rows : n_rows + len(rows)] = rows
+                    n_rows += len(rows)
+            read_bytes += file.stat().st_size
+    except OSError as exc:
         raise PinocchioCatalogError(f"Cannot read PINOCCHIO {label}: {path}") from exc
 
-    data_lines = [
-        line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")
-    ]
-    if not data_lines:
-        return np.empty((0, expected_columns), dtype=np.float64)
+    data.resize((n_rows, expected_columns), refcheck=False)
+    _require_finite(data, path, label)
+    return data
+
 
+def _parse_numeric_block(
+    text: bytes, expected_columns: int, path: Path, label: str
+) -> np.ndarray:
     try:
-        data = np.loadtxt(StringIO("\n".join(data_lines)), dtype=np.float64, ndmin=2)
+        with warnings.catch_warnings():
+            # Blocks holding only comments or blank lines have no rows.
+            warnings.simplefilter("ignore", UserWarning)
+            rows = np.loadtxt(BytesIO(text), dtype=np.float64, comments="#", ndmin=2)
     except ValueError as exc:
+        found = _ragged_row_columns(text, expected_columns)
+        if found is not None:
+            raise _column_count_error(label, expected_columns, found, path) from exc
         raise PinocchioCatalogError(f"Invalid numeric rows in PINOCCHIO {label}: {path}") from exc
+    if rows.size == 0:
+        return np.empty((0, expected_columns), dtype=np.float64)
+    if rows.shape[1] != expected_columns:
+        raise _column_count_error(label, expected_columns, rows.shape[1], path)
+    return rows
 
-    if data.ndim != 2 or data.shape[1] != expected_columns:
-        raise PinocchioCatalogError(
-            f"PINOCCHIO {label} must have {expected_columns} columns; "
-            f"found shape {data.shape}: {path}"
-        )
-    _require_finite(data, path, label)
-    return data
+
+def _column_count_error(
+    label: str, expected_columns: int, found: int, path: Path
+) -> PinocchioCatalogError:
+    return PinocchioCatalogError(
+        f"PINOCCHIO {label} must have {expected_columns} columns; "
+        f"found a row with {found}: {path}"
+    )
+
+
+def _ragged_row_columns(text: bytes, expected_columns: int) -> int | None:
+    for line in text.split(b"\n"):
+        found = len(line.split(b"#", 1)[0].split())
+        if found and found != expected_columns:
+            return found
+    return None
 
 
 def _parse_pinocchio_parameter_file(path: Path) -> dict[str, tuple[str, ...]]:
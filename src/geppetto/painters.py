@@ -6,8 +6,14 @@ import math
 
 import jax
 import jax.numpy as jnp
+import numpy as np
 
-from geppetto.catalog import HaloCatalog, LightconeHaloCatalog, LightconeSparseStencil
+from geppetto.catalog import (
+    BoxSparseStencil,
+    HaloCatalog,
+    LightconeHaloCatalog,
+    LightconeSparseStencil,
+)
 from geppetto.concentration import ConcentrationParams
 from geppetto.cosmology import Cosmology, rho_mean_comoving
 from geppetto.geometry import (
@@ -17,10 +23,16 @@ from geppetto.geometry import (
 )
 from geppetto.profiles import (
     DEFAULT_NFW_PROFILE_PARAMS,
+    NFWHaloParameters,
     NFWProfileParams,
     TabulatedProjectedProfileParams,
     nfw_density,
+    nfw_density_from_halo_parameters,
+    nfw_fourier_transform,
+    nfw_halo_parameters,
+    nfw_projected_enclosed_mass_from_halo_parameters,
     nfw_projected_surface_density,
+    nfw_projected_surface_density_from_halo_parameters,
     tabulated_projected_surface_density,
 )
 from geppetto.types import Array
@@ -90,6 +102,44 @@ def _pad_catalog_for_chunks(catalog: HaloCatalog, chunk_size: int) -> tuple[Halo
     return HaloCatalog(position=position, mass=mass, redshift=redshift), valid, n_chunk
 
 
+# Floats of live workspace per (point, halo) pair inside one tile: the three
+# displacement components plus the radius and profile temporaries.
+_PAIR_WORKSPACE_FLOATS = 12
+
+
+def _density_tile_sizes(
+    n_points: int,
+    n_halo: int,
+    itemsize: int,
+    chunk_size: int,
+    point_chunk_size: int | None,
+    memory_budget_bytes: int | None,
+) -> tuple[int, int]:
+    """Return static ``(point_chunk_size, halo_chunk_size)`` for tiled painting.
+
+    Without a budget the halo chunk is ``chunk_size`` and all points form one
+    block unless ``point_chunk_size`` is given. With a budget, the halo chunk is
+    capped so a single point fits, and the point block is the largest that keeps
+    ``point_chunk * halo_chunk`` pairs within the budget.
+    """
+
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if point_chunk_size is not None and point_chunk_size <= 0:
+        raise ValueError("point_chunk_size must be positive")
+    halo_chunk = min(chunk_size, max(n_halo, 1))
+    if memory_budget_bytes is None:
+        return min(point_chunk_size or n_points, max(n_points, 1)), halo_chunk
+    if memory_budget_bytes <= 0:
+        raise ValueError("memory_budget_bytes must be positive")
+
+    pair_budget = max(memory_budget_bytes // (_PAIR_WORKSPACE_FLOATS * itemsize), 1)
+    halo_chunk = max(min(halo_chunk, pair_budget), 1)
+    if point_chunk_size is None:
+        point_chunk_size = max(pair_budget // halo_chunk, 1)
+    return min(point_chunk_size, max(n_points, 1)), halo_chunk
+
+
 def density_at_points_chunked(
     points: Array,
     catalog: HaloCatalog,
@@ -99,35 +149,70 @@ def density_at_points_chunked(
     periodic_box_size: float | None = None,
     as_delta: bool = False,
     chunk_size: int = 1024,
+    point_chunk_size: int | None = None,
+    memory_budget_bytes: int | None = None,
 ) -> Array:
     """Chunked version of :func:`density_at_points` for many haloes.
 
     The chunk dimension is static, which makes this function suitable for
     ``jax.jit`` once the catalogue size and chunk size are fixed.
-    """
 
-    padded, valid, n_chunk = _pad_catalog_for_chunks(catalog, chunk_size)
-    pos_chunks = padded.position.reshape(n_chunk, chunk_size, 3)
-    mass_chunks = padded.mass.reshape(n_chunk, chunk_size)
-    redshift_chunks = padded.redshift.reshape(n_chunk, chunk_size)
-    valid_chunks = valid.reshape(n_chunk, chunk_size)
+    Parameters
+    ----------
+    chunk_size:
+        Static halo chunk size scanned with ``jax.lax.scan``.
+    point_chunk_size:
+        Optional static target-point block size. Point blocks are evaluated
+        sequentially with ``jax.lax.map``, so each tile holds at most
+        ``point_chunk_size * chunk_size`` pair temporaries.
+    memory_budget_bytes:
+        Optional bound on the pair workspace of one tile. It fills in
+        ``point_chunk_size`` when that is not given and caps ``chunk_size``.
+        The output array and the inputs are not counted.
+    """
 
-    def body(carry: Array, chunk: tuple[Array, Array, Array, Array]) -> tuple[Array, None]:
-        pos, mass, z, weight = chunk
-        partial_catalog = HaloCatalog(position=pos, mass=mass, redshift=z)
-        partial = _density_from_catalog(
-            points,
-            partial_catalog,
-            cosmology,
-            concentration_params,
-            profile_params,
-            periodic_box_size,
-            halo_weight=weight,
-        )
-        return carry + partial, None
+    n_points = points.shape[0]
+    point_chunk, halo_chunk = _density_tile_sizes(
+        n_points,
+        catalog.mass.shape[0],
+        jnp.dtype(points.dtype).itemsize,
+        chunk_size,
+        point_chunk_size,
+        memory_budget_bytes,
+    )
 
-    rho0 = jnp.zeros(points.shape[0], dtype=points.dtype)
-    rho, _ = jax.lax.scan(body, rho0, (pos_chunks, mass_chunks, redshift_chunks, valid_chunks))
+    padded, valid, n_chunk = _pad_catalog_for_chunks(catalog, halo_chunk)
+    pos_chunks = padded.position.reshape(n_chunk, halo_chunk, 3)
+    mass_chunks = padded.mass.reshape(n_chunk, halo_chunk)
+    redshift_chunks = padded.redshift.reshape(n_chunk, halo_chunk)
+    valid_chunks = valid.reshape(n_chunk, halo_chunk)
+
+    def scan_haloes(point_block: Array) -> Array:
+        def body(carry: Array, chunk: tuple[Array, Array, Array, Array]) -> tuple[Array, None]:
+            pos, mass, z, weight = chunk
+            partial_catalog = HaloCatalog(position=pos, mass=mass, redshift=z)
+            partial = _density_from_catalog(
+                point_block,
+                partial_catalog,
+                cosmology,
+                concentration_params,
+                profile_params,
+                periodic_box_size,
+                halo_weight=weight,
+            )
+            return carry + partial, None
+
+        rho0 = jnp.zeros(point_block.shape[0], dtype=point_block.dtype)
+        rho, _ = jax.lax.scan(body, rho0, (pos_chunks, mass_chunks, redshift_chunks, valid_chunks))
+        return rho
+
+    if point_chunk >= n_points:
+        rho = scan_haloes(points)
+    else:
+        n_block = int(math.ceil(n_points / point_chunk))
+        padded_points = jnp.pad(points, ((0, n_block * point_chunk - n_points), (0, 0)))
+        blocks = padded_points.reshape(n_block, point_chunk, 3)
+        rho = jax.lax.map(scan_haloes, blocks).reshape(-1)[:n_points]
     if as_delta:
         return rho / rho_mean_comoving(cosmology) - 1.0
     return rho
@@ -143,15 +228,19 @@ def paint_box_density_grid(
     periodic: bool = True,
     as_delta: bool = False,
     chunk_size: int | None = None,
+    point_chunk_size: int | None = None,
+    memory_budget_bytes: int | None = None,
 ) -> Array:
     """Paint a periodic comoving-box density grid from a halo catalogue.
 
-    Returns an array with shape ``(nmesh, nmesh, nmesh)``.
+    Returns an array with shape ``(nmesh, nmesh, nmesh)``. Passing any of
+    ``chunk_size``, ``point_chunk_size`` or ``memory_budget_bytes`` selects the
+    tiled :func:`density_at_points_chunked` path.
     """
 
     points = box_grid_positions(box_size, nmesh)
     periodic_box_size = box_size if periodic else None
-    if chunk_size is None:
+    if chunk_size is None and point_chunk_size is None and memory_budget_bytes is None:
         rho = density_at_points(
             points,
             catalog,
@@ -170,11 +259,321 @@ def paint_box_density_grid(
             profile_params,
             periodic_box_size=periodic_box_size,
             as_delta=as_delta,
-            chunk_size=chunk_size,
+            chunk_size=1024 if chunk_size is None else chunk_size,
+            point_chunk_size=point_chunk_size,
+            memory_budget_bytes=memory_budget_bytes,
         )
     return rho.reshape((nmesh, nmesh, nmesh))
 
 
+def _gather_halo_parameters(halo: NFWHaloParameters, halo_id: Array) -> NFWHaloParameters:
+    return NFWHaloParameters(*(field[halo_id] for field in halo))
+
+
+def paint_box_density_grid_sparse(
+    stencil: BoxSparseStencil,
+    catalog: HaloCatalog,
+    cosmology: Cosmology = DEFAULT_COSMOLOGY,
+    concentration_params: ConcentrationParams = DEFAULT_CONCENTRATION_PARAMS,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    as_delta: bool = False,
+) -> Array:
+    """Paint a comoving-box density grid from a sparse cell-halo stencil.
+
+    Parameters
+    ----------
+    stencil:
+        Precomputed sparse cell-halo geometry, for example from
+        ``geppetto.io.build_box_sparse_stencil``. ``stencil.r`` is in comoving
+        ``Mpc/h`` and already includes any periodic minimum-image wrapping.
+    catalog:
+        Box halo catalogue. Masses are ``Msun/h``.
+
+    Returns
+    -------
+    Array
+        Density grid with shape ``(nmesh, nmesh, nmesh)``.
+
+    Notes
+    -----
+    Cost scales with the number of retained pairs rather than
+    ``nmesh**3 * n_halo``. The result is differentiable with respect to halo
+    masses, redshifts, and profile/concentration parameters. Pair separations
+    and the retained pair set are fixed inputs and are not differentiated, so
+    gradients with respect to halo positions are not available on this path.
+    """
+
+    halo_id = jnp.asarray(stencil.halo_id, dtype=jnp.int32)
+    cell_id = jnp.asarray(stencil.cell_id, dtype=jnp.int32)
+    halo = nfw_halo_parameters(
+        catalog.mass, catalog.redshift, cosmology, concentration_params, profile_params
+    )
+    rho = nfw_density_from_halo_parameters(
+        stencil.r, _gather_halo_parameters(halo, halo_id), profile_params
+    )
+    grid = jnp.zeros((stencil.n_cell,), dtype=rho.dtype).at[cell_id].add(rho)
+    if as_delta:
+        grid = grid / rho_mean_comoving(cosmology) - 1.0
+    return grid.reshape((stencil.nmesh, stencil.nmesh, stencil.nmesh))
+
+
+def _cic_deposit(position: Array, weight: Array, box_size: float, nmesh: int) -> Array:
+    """Cloud-in-cell deposit onto cell centres of a periodic ``nmesh**3`` grid."""
+
+    u = position / (box_size / nmesh) - 0.5
+    i0 = jnp.floor(u)
+    frac = u - i0
+    i0 = i0.astype(jnp.int32)
+    grid = jnp.zeros((nmesh**3,), dtype=weight.dtype)
+    for dx in (0, 1):
+        for dy in (0, 1):
+            for dz in (0, 1):
+                shift = jnp.array([dx, dy, dz], dtype=jnp.int32)
+                idx = jnp.mod(i0 + shift, nmesh)
+                w = jnp.prod(jnp.where(shift == 1, frac, 1.0 - frac), axis=-1)
+                flat = (idx[:, 0] * nmesh + idx[:, 1]) * nmesh + idx[:, 2]
+                grid = grid.at[flat].add(weight * w)
+    return grid.reshape((nmesh, nmesh, nmesh))
+
+
+def _box_fft_bin_index(
+    catalog: HaloCatalog, n_mass_bins: int, n_redshift_bins: int
+) -> Array:
+    """Assign haloes to equal-width ``(log M, z)`` bins spanning the catalogue."""
+
+    def edges_index(values: Array, n_bins: int) -> Array:
+        lo = jnp.min(values)
+        span = jnp.maximum(jnp.max(values) - lo, 1.0e-12)
+        idx = jnp.floor((values - lo) / span * n_bins).astype(jnp.int32)
+        return jnp.clip(idx, 0, n_bins - 1)
+
+    mass_id = edges_index(jnp.log(catalog.mass), n_mass_bins)
+    redshift_id = edges_index(catalog.redshift, n_redshift_bins)
+    return jax.lax.stop_gradient(mass_id * n_redshift_bins + redshift_id)
+
+
+def paint_box_density_grid_fft(
+    catalog: HaloCatalog,
+    box_size: float,
+    nmesh: int,
+    cosmology: Cosmology = DEFAULT_COSMOLOGY,
+    concentration_params: ConcentrationParams = DEFAULT_CONCENTRATION_PARAMS,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    n_mass_bins: int = 16,
+    n_redshift_bins: int = 1,
+    as_delta: bool = False,
+    deconvolve_window: bool = True,
+) -> Array:
+    """Paint a periodic box density grid in Fourier space.
+
+    Haloes are grouped into ``n_mass_bins * n_redshift_bins`` bins of equal
+    width in ``log M`` and ``z``. Each bin's halo mass is deposited onto the
+    mesh with cloud-in-cell weights, Fourier transformed, multiplied by the
+    truncated-NFW :func:`geppetto.profiles.nfw_fourier_transform` evaluated at
+    the bin's mass-weighted mean mass and redshift, and accumulated. A single
+    inverse FFT returns the real-space grid.
+
+    Parameters
+    ----------
+    catalog:
+        Box halo catalogue with positions in ``[0, box_size)`` comoving
+        ``Mpc/h`` and masses in ``Msun/h``.
+    n_mass_bins, n_redshift_bins:
+        Static bin counts. Cost is one forward FFT per bin.
+    deconvolve_window:
+        If true, divide by the cloud-in-cell window so the grid approximates
+        the profile sampled at cell centres, as in :func:`paint_box_density_grid`.
+
+    Returns
+    -------
+    Array
+        Density grid with shape ``(nmesh, nmesh, nmesh)``.
+
+    Notes
+    -----
+    The result is always periodic. It is differentiable with respect to halo
+    masses, redshifts, positions, and profile/concentration parameters; bin
+    membership is fixed by the input masses and redshifts and is not
+    differentiated. The profile is sharply truncated at ``r_delta``, so the
+    optional smooth taper is ignored. Use :func:`box_fft_binning_error` to
+    measure the combined binning and mesh error against the direct painter.
+    """
+
+    n_bins = n_mass_bins * n_redshift_bins
+    cell = box_size / nmesh
+    bin_id = _box_fft_bin_index(catalog, n_mass_bins, n_redshift_bins)
+
+    bin_mass = jax.ops.segment_sum(catalog.mass, bin_id, num_segments=n_bins)
+    occupied = bin_mass > 0.0
+    bin_norm = jnp.where(occupied, bin_mass, 1.0)
+    mean_mass = jax.ops.segment_sum(catalog.mass**2, bin_id, num_segments=n_bins) / bin_norm
+    mean_redshift = (
+        jax.ops.segment_sum(catalog.mass * catalog.redshift, bin_id, num_segments=n_bins) / bin_norm
+    )
+    # Empty bins deposit nothing; give them a benign profile to keep gradients finite.
+    mean_mass = jnp.where(occupied, mean_mass, 1.0)
+    mean_redshift = jnp.where(occupied, mean_redshift, 0.0)
+
+    # |k|^2 is an integer multiple of (2 pi / L)^2 on the mesh, so u(k) is
+    # evaluated once per distinct shell and gathered instead of per mode.
+    ix = np.fft.fftfreq(nmesh, d=1.0 / nmesh).astype(np.int64)
+    iz = np.fft.rfftfreq(nmesh, d=1.0 / nmesh).astype(np.int64)
+    shell = ix[:, None, None] ** 2 + ix[None, :, None] ** 2 + iz[None, None, :] ** 2
+    k_shell = (2.0 * np.pi / box_size) * np.sqrt(np.arange(int(shell.max()) + 1))
+    shell = jnp.asarray(shell, dtype=jnp.int32)
+    k_shell = jnp.asarray(k_shell, dtype=catalog.mass.dtype)
+
+    def body(carry: Array, b: tuple[Array, Array, Array]) -> tuple[Array, None]:
+        index, mass_b, redshift_b = b
+        weight = jnp.where(bin_id == index, catalog.mass, 0.0)
+        mass_k = jnp.fft.rfftn(_cic_deposit(catalog.position, weight, box_size, nmesh))
+        u_shell = nfw_fourier_transform(
+            k_shell, mass_b, redshift_b, cosmology, concentration_params, profile_params
+        )
+        return carry + mass_k * u_shell[shell], None
+
+    field0 = jnp.zeros(shell.shape, dtype=jnp.result_type(catalog.mass.dtype, jnp.complex64))
+    field_k, _ = jax.lax.scan(
+        body, field0, (jnp.arange(n_bins, dtype=bin_id.dtype), mean_mass, mean_redshift)
+    )
+    if deconvolve_window:
+        wx = np.sinc(ix / nmesh) ** 2
+        wz = np.sinc(iz / nmesh) ** 2
+        window = wx[:, None, None] * wx[None, :, None] * wz[None, None, :]
+        field_k = field_k / jnp.asarray(window, dtype=catalog.mass.dtype)
+    rho = jnp.fft.irfftn(field_k, s=(nmesh, nmesh, nmesh)) / cell**3
+    if as_delta:
+        return rho / rho_mean_comoving(cosmology) - 1.0
+    return rho
+
+
+def box_fft_binning_error(
+    catalog: HaloCatalog,
+    box_size: float,
+    nmesh: int,
+    cosmology: Cosmology = DEFAULT_COSMOLOGY,
+    concentration_params: ConcentrationParams = DEFAULT_CONCENTRATION_PARAMS,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    n_mass_bins: int = 16,
+    n_redshift_bins: int = 1,
+    chunk_size: int | None = None,
+) -> dict[str, float]:
+    """Compare :func:`paint_box_density_grid_fft` with the direct painter.
+
+    The reference is the periodic :func:`paint_box_density_grid`, i.e.
+    :func:`density_at_points` at cell centres. Both grids are evaluated on the
+    host, so call this on validation-sized meshes.
+
+    Returns
+    -------
+    dict[str, float]
+        ``relative_l2_error``: ``||fft - direct|| / ||direct||``;
+        ``max_abs_error_over_peak``: ``max|fft - direct| / max|direct|``;
+        ``total_mass_relative_error``: relative difference of the grid sums.
+        The metrics include mass/redshift binning, truncation-taper, and mesh
+        resolution effects.
+    """
+
+    direct = paint_box_density_grid(
+        catalog,
+        box_size,
+        nmesh,
+        cosmology,
+        concentration_params,
+        profile_params,
+        periodic=True,
+        chunk_size=chunk_size,
+    )
+    fft = paint_box_density_grid_fft(
+        catalog,
+        box_size,
+        nmesh,
+        cosmology,
+        concentration_params,
+        profile_params,
+        n_mass_bins=n_mass_bins,
+        n_redshift_bins=n_redshift_bins,
+    )
+    diff = fft - direct
+    direct_total = jnp.sum(direct)
+    return {
+        "relative_l2_error": float(jnp.linalg.norm(diff) / jnp.linalg.norm(direct)),
+        "max_abs_error_over_peak": float(jnp.max(jnp.abs(diff)) / jnp.max(jnp.abs(direct))),
+        "total_mass_relative_error": float((jnp.sum(fft) - direct_total) / direct_total),
+    }
+
+
+def one_halo_power_spectrum(
+    k: Array,
+    catalog: HaloCatalog,
+    box_size: float,
+    cosmology: Cosmology = DEFAULT_COSMOLOGY,
+    concentration_params: ConcentrationParams = DEFAULT_CONCENTRATION_PARAMS,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+    chunk_size: int | None = None,
+) -> Array:
+    """Predict the one-halo matter power spectrum of a box catalogue.
+
+    Parameters
+    ----------
+    k:
+        Comoving wavenumbers in ``h/Mpc``, shape ``(n_k,)``.
+    catalog:
+        Box halo catalogue with masses in ``Msun/h``. Positions are unused.
+    box_size:
+        Comoving box side in ``Mpc/h``; the catalogue volume is ``box_size**3``.
+    chunk_size:
+        Optional static halo chunk size for ``jax.lax.scan``.
+
+    Returns
+    -------
+    Array
+        ``P_1h(k) = sum_i (M_i / rho_mean)**2 |u(k|M_i, z_i)|**2 / V`` in
+        ``(Mpc/h)^3``, shape ``(n_k,)``.
+
+    Notes
+    -----
+    No grid is painted, so the cost is ``n_k * n_halo`` profile transforms.
+    The result is differentiable with respect to halo masses, redshifts,
+    cosmology, and profile/concentration parameters. The profile is the sharply
+    truncated NFW of :func:`geppetto.profiles.nfw_fourier_transform`.
+    """
+
+    k = jnp.asarray(k)
+    rho_mean = rho_mean_comoving(cosmology)
+
+    def contribution(mass: Array, redshift: Array, weight: Array | None = None) -> Array:
+        u = nfw_fourier_transform(
+            k[:, None],
+            mass[None, :],
+            redshift[None, :],
+            cosmology,
+            concentration_params,
+            profile_params,
+        )
+        amplitude = (mass / rho_mean) ** 2
+        if weight is not None:
+            amplitude = amplitude * weight
+        return jnp.sum(amplitude[None, :] * u**2, axis=1)
+
+    volume = box_size**3
+    if chunk_size is None:
+        return contribution(catalog.mass, catalog.redshift) / volume
+
+    padded, valid, n_chunk = _pad_catalog_for_chunks(catalog, chunk_size)
+    mass_chunks = padded.mass.reshape(n_chunk, chunk_size)
+    redshift_chunks = padded.redshift.reshape(n_chunk, chunk_size)
+    valid_chunks = valid.reshape(n_chunk, chunk_size)
+
+    def body(carry: Array, chunk: tuple[Array, Array, Array]) -> tuple[Array, None]:
+        mass, z, weight = chunk
+        return carry + contribution(mass, z, weight), None
+
+    power0 = jnp.zeros(k.shape, dtype=jnp.result_type(k.dtype, catalog.mass.dtype))
+    power, _ = jax.lax.scan(body, power0, (mass_chunks, redshift_chunks, valid_chunks))
+    return power / volume
+
+
 def paint_lightcone_surface_density(
     pixel_unit_vectors: Array,
     catalog: LightconeHaloCatalog,
@@ -269,7 +668,8 @@ def paint_lightcone_surface_density_sparse(
         Lightcone halo catalogue. Masses are ``Msun/h`` and distances are
         comoving ``Mpc/h``.
     pixel_area_sr:
-        Pixel solid angle. Required only when ``return_mass_per_pixel=True``.
+        Pixel solid angle. Required when ``return_mass_per_pixel=True`` or when the
+        stencil carries point deposits.
     return_mass_per_pixel:
         If true, convert each pair contribution to approximate projected mass
         per pixel using ``Sigma * chi_h**2 * pixel_area_sr`` before scatter-add.
@@ -285,29 +685,78 @@ def paint_lightcone_surface_density_sparse(
     profile/concentration parameters. The stencil geometry and retained pair set
     are fixed inputs and are not differentiated. Use
     ``validate_lightcone_sparse_stencil`` before entering JIT-compiled paths
-    when stencils are manually constructed.
+    when stencils are manually constructed. Stencils normalized with
+    ``sort_lightcone_sparse_stencil_by_pixel`` are reduced with a sorted
+    ``jax.ops.segment_sum`` instead of an unsorted scatter-add. Point deposits
+    add the closed-form projected mass inside ``r_delta`` of each sub-pixel halo
+    to its containing pixel.
     """
 
-    if return_mass_per_pixel and pixel_area_sr is None:
-        raise ValueError("pixel_area_sr is required when return_mass_per_pixel=True")
+    _check_sparse_pixel_area(stencil, pixel_area_sr, return_mass_per_pixel)
 
     halo_id = jnp.asarray(stencil.halo_id, dtype=jnp.int32)
     pix_id = jnp.asarray(stencil.pix_id, dtype=jnp.int32)
-    mass = catalog.mass[halo_id]
-    redshift = catalog.redshift[halo_id]
-    sigma = nfw_projected_surface_density(
-        stencil.r_perp,
-        mass,
-        redshift,
-        cosmology,
-        concentration_params,
-        profile_params,
+    halo = nfw_halo_parameters(
+        catalog.mass, catalog.redshift, cosmology, concentration_params, profile_params
+    )
+    sigma = nfw_projected_surface_density_from_halo_parameters(
+        stencil.r_perp, _gather_halo_parameters(halo, halo_id), profile_params
     )
     if return_mass_per_pixel:
         chi = catalog.chi[halo_id]
         sigma = sigma * (chi**2) * pixel_area_sr
 
-    return jnp.zeros((stencil.n_pix,), dtype=sigma.dtype).at[pix_id].add(sigma)
+    out = _sum_pairs_into_pixels(sigma, pix_id, stencil)
+    if stencil.has_point_deposits:
+        point_halo_id = jnp.asarray(stencil.point_halo_id, dtype=jnp.int32)
+        point_mass = nfw_projected_enclosed_mass_from_halo_parameters(
+            _gather_halo_parameters(halo, point_halo_id)
+        )
+        out = _add_point_deposits(
+            out, point_mass, catalog, stencil, pixel_area_sr, return_mass_per_pixel
+        )
+    return out
+
+
+def _sum_pairs_into_pixels(values: Array, pix_id: Array, stencil: LightconeSparseStencil) -> Array:
+    """Reduce per-pair values onto ``stencil.n_pix`` output pixels.
+
+    Pixel-sorted (CSR) stencils use a segment sum with ``indices_are_sorted``,
+    which XLA lowers to a contiguous reduction; other stencils fall back to an
+    unsorted scatter-add.
+    """
+
+    if stencil.is_pixel_sorted:
+        return jax.ops.segment_sum(
+            values, pix_id, num_segments=stencil.n_pix, indices_are_sorted=True
+        )
+    return jnp.zeros((stencil.n_pix,), dtype=values.dtype).at[pix_id].add(values)
+
+
+def _check_sparse_pixel_area(
+    stencil: LightconeSparseStencil, pixel_area_sr: float | None, return_mass_per_pixel: bool
+) -> None:
+    if return_mass_per_pixel and pixel_area_sr is None:
+        raise ValueError("pixel_area_sr is required when return_mass_per_pixel=True")
+    if stencil.has_point_deposits and pixel_area_sr is None:
+        raise ValueError("pixel_area_sr is required for stencils with point deposits")
+
+
+def _add_point_deposits(
+    out: Array,
+    point_mass: Array,
+    catalog: LightconeHaloCatalog,
+    stencil: LightconeSparseStencil,
+    pixel_area_sr: float,
+    return_mass_per_pixel: bool,
+) -> Array:
+    """Add whole-halo projected masses of sub-pixel haloes to their pixels."""
+
+    point_pix_id = jnp.asarray(stencil.point_pix_id, dtype=jnp.int32)
+    if not return_mass_per_pixel:
+        chi = catalog.chi[jnp.asarray(stencil.point_halo_id, dtype=jnp.int32)]
+        point_mass = point_mass / ((chi**2) * pixel_area_sr)
+    return out.at[point_pix_id].add(point_mass.astype(out.dtype))
 
 
 def _rmax_for_sparse_pairs(rmax_mpc_h: Array | float, halo_id: Array) -> Array:
@@ -343,7 +792,8 @@ def paint_lightcone_surface_density_tabulated_sparse(
         Shared dimensionless projected-profile template. The painter is
         differentiable with respect to ``profile_params.log_shape``.
     pixel_area_sr:
-        Pixel solid angle. Required only when ``return_mass_per_pixel=True``.
+        Pixel solid angle. Required when ``return_mass_per_pixel=True`` or when the
+        stencil carries point deposits.
     return_mass_per_pixel:
         If true, convert each pair contribution to projected mass per pixel
         using ``Sigma * chi_h**2 * pixel_area_sr`` before scatter-add.
@@ -362,8 +812,7 @@ def paint_lightcone_surface_density_tabulated_sparse(
     manually constructed tabulated profile parameters.
     """
 
-    if return_mass_per_pixel and pixel_area_sr is None:
-        raise ValueError("pixel_area_sr is required when return_mass_per_pixel=True")
+    _check_sparse_pixel_area(stencil, pixel_area_sr, return_mass_per_pixel)
 
     halo_id = jnp.asarray(stencil.halo_id, dtype=jnp.int32)
     pix_id = jnp.asarray(stencil.pix_id, dtype=jnp.int32)
@@ -379,7 +828,14 @@ def paint_lightcone_surface_density_tabulated_sparse(
         chi = catalog.chi[halo_id]
         sigma = sigma * (chi**2) * pixel_area_sr
 
-    return jnp.zeros((stencil.n_pix,), dtype=sigma.dtype).at[pix_id].add(sigma)
+    out = _sum_pairs_into_pixels(sigma, pix_id, stencil)
+    if stencil.has_point_deposits:
+        # The template is normalized to the halo mass inside ``Rmax``.
+        point_mass = catalog.mass[jnp.asarray(stencil.point_halo_id, dtype=jnp.int32)]
+        out = _add_point_deposits(
+            out, point_mass, catalog, stencil, pixel_area_sr, return_mass_per_pixel
+        )
+    return out
 
 
 def paint_lightcone_particle_count_map_tabulated_sparse(
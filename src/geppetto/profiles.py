@@ -7,10 +7,12 @@ inside the NFW implementation.
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Literal, NamedTuple
 
 import jax.nn as jnn
 import jax.numpy as jnp
+import numpy as np
 from jax import lax
 
 from geppetto.concentration import ConcentrationParams, concentration_power_law
@@ -19,13 +21,19 @@ from geppetto.types import Array
 
 
 class NFWProfileParams(NamedTuple):
-    """Parameters controlling the NFW profile normalization and truncation."""
+    """Parameters controlling the NFW profile normalization and truncation.
+
+    ``projected_kernel`` selects how the dimensionless projected kernel ``F(x)``
+    is evaluated: ``"analytic"`` uses the closed form and ``"table"`` uses the
+    cheaper log-spaced Hermite lookup of :func:`_projected_nfw_kernel_lookup`.
+    """
 
     overdensity: float = 200.0
     reference_density: Literal["critical", "mean"] = "critical"
     smooth_truncation: bool = True
     truncation_width_fraction: float = 0.05
     r_softening_fraction: float = 1.0e-4
+    projected_kernel: Literal["analytic", "table"] = "analytic"
 
 
 DEFAULT_NFW_PROFILE_PARAMS = NFWProfileParams()
@@ -83,6 +91,39 @@ def nfw_scale_radius_and_density(
     return r_delta, c, r_s, rho_s
 
 
+class NFWHaloParameters(NamedTuple):
+    """Per-halo NFW quantities shared by every pair of a sparse stencil.
+
+    All radii are comoving ``Mpc/h`` and ``rho_s`` is in comoving
+    ``(Msun/h)/(Mpc/h)^3``. ``width`` is the smooth-taper width.
+    """
+
+    r_delta: Array
+    r_s: Array
+    rho_s: Array
+    width: Array
+
+
+def nfw_halo_parameters(
+    mass: Array,
+    redshift: Array,
+    cosmology: Cosmology,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+) -> NFWHaloParameters:
+    """Evaluate the concentration, halo radius and normalization once per halo.
+
+    Sparse painters call this on the catalogue and gather the result by
+    ``halo_id`` instead of recomputing it for every halo-pixel pair.
+    """
+
+    r_delta, _, r_s, rho_s = nfw_scale_radius_and_density(
+        mass, redshift, cosmology, concentration_params, profile_params
+    )
+    width = jnp.maximum(profile_params.truncation_width_fraction * r_delta, 1.0e-12)
+    return NFWHaloParameters(r_delta=r_delta, r_s=r_s, rho_s=rho_s, width=width)
+
+
 def smooth_taper(r: Array, r_delta: Array, width: Array) -> Array:
     """Smoothly suppress the profile outside ``r_delta``.
 
@@ -94,6 +135,22 @@ def smooth_taper(r: Array, r_delta: Array, width: Array) -> Array:
     return jnn.sigmoid(-(r - r_delta) / width)
 
 
+def nfw_density_from_halo_parameters(
+    r: Array,
+    halo: NFWHaloParameters,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+) -> Array:
+    """Evaluate :func:`nfw_density` from precomputed per-halo parameters."""
+
+    r_safe = jnp.sqrt(r**2 + (profile_params.r_softening_fraction * halo.r_s) ** 2)
+    x = r_safe / halo.r_s
+    rho = halo.rho_s / (x * (1.0 + x) ** 2)
+
+    if profile_params.smooth_truncation:
+        return rho * smooth_taper(r_safe, halo.r_delta, halo.width)
+    return jnp.where(r_safe <= halo.r_delta, rho, 0.0)
+
+
 def nfw_density(
     r: Array,
     mass: Array,
@@ -104,17 +161,8 @@ def nfw_density(
 ) -> Array:
     """Evaluate the 3D NFW density in comoving ``(Msun/h)/(Mpc/h)^3`` units."""
 
-    r_delta, _, r_s, rho_s = nfw_scale_radius_and_density(
-        mass, redshift, cosmology, concentration_params, profile_params
-    )
-    r_safe = jnp.sqrt(r**2 + (profile_params.r_softening_fraction * r_s) ** 2)
-    x = r_safe / r_s
-    rho = rho_s / (x * (1.0 + x) ** 2)
-
-    if profile_params.smooth_truncation:
-        width = jnp.maximum(profile_params.truncation_width_fraction * r_delta, 1.0e-12)
-        return rho * smooth_taper(r_safe, r_delta, width)
-    return jnp.where(r_safe <= r_delta, rho, 0.0)
+    halo = nfw_halo_parameters(mass, redshift, cosmology, concentration_params, profile_params)
+    return nfw_density_from_halo_parameters(r, halo, profile_params)
 
 
 def _projected_nfw_kernel(x: Array) -> Array:
@@ -139,6 +187,129 @@ def _projected_nfw_kernel(x: Array) -> Array:
     return jnp.where(x < 1.0 - eps, low, jnp.where(x > 1.0 + eps, high, near))
 
 
+# Log-spaced projected-kernel table. With 512 nodes the cubic Hermite
+# interpolant of ln F in ln x has a float64 relative error below 3e-9 on
+# [1e-6, 1e4]. Evaluated in float32 the lookup stays within 1e-5 relative of
+# the float64 closed form, dominated by rounding of ln x and ln F.
+_PROJECTED_NFW_TABLE_X_MIN = 1.0e-6
+_PROJECTED_NFW_TABLE_X_MAX = 1.0e4
+_PROJECTED_NFW_TABLE_SIZE = 512
+
+
+def _projected_nfw_kernel_numpy(x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return float64 ``(F(x), dF/dx)`` for the projected NFW kernel.
+
+    Near ``x = 1`` both are summed from the series in ``q = x**2 - 1``, which
+    avoids the cancellation in the closed form.
+    """
+
+    x = np.asarray(x, dtype=np.float64)
+    q = x * x - 1.0
+    kernel = np.empty_like(x)
+    derivative = np.empty_like(x)
+
+    near = np.abs(q) < 0.1
+    q_near = q[near]
+    f_near = np.zeros_like(q_near)
+    df_dq_near = np.zeros_like(q_near)
+    for n in range(1, 40):
+        sign = 1.0 if n % 2 else -1.0
+        f_near += sign * q_near ** (n - 1) / (2 * n + 1)
+        if n >= 2:
+            df_dq_near += sign * (n - 1) * q_near ** (n - 2) / (2 * n + 1)
+    kernel[near] = f_near
+    derivative[near] = 2.0 * x[near] * df_dq_near
+
+    far = ~near
+    x_far = x[far]
+    q_far = q[far]
+    root = np.sqrt(np.abs(q_far))
+    c = np.where(x_far < 1.0, np.log((1.0 + root) / x_far), np.arctan(root)) / root
+    kernel[far] = (1.0 - c) / q_far
+    derivative[far] = ((x_far * c - 1.0 / x_far) - 2.0 * x_far * (1.0 - c)) / q_far**2
+    return kernel, derivative
+
+
+@lru_cache(maxsize=1)
+def _projected_nfw_kernel_table() -> tuple[float, float, np.ndarray, np.ndarray]:
+    """Return ``(ln_x0, d_ln_x, ln_F, d ln_F / d ln_x)`` on the lookup grid."""
+
+    ln_x = np.linspace(
+        np.log(_PROJECTED_NFW_TABLE_X_MIN),
+        np.log(_PROJECTED_NFW_TABLE_X_MAX),
+        _PROJECTED_NFW_TABLE_SIZE,
+    )
+    x = np.exp(ln_x)
+    kernel, derivative = _projected_nfw_kernel_numpy(x)
+    return float(ln_x[0]), float(ln_x[1] - ln_x[0]), np.log(kernel), x * derivative / kernel
+
+
+def _projected_nfw_kernel_lookup(x: Array) -> Array:
+    """Tabulated projected NFW kernel ``F(x)``.
+
+    Interpolates ``ln F`` in ``ln x`` with cubic Hermite splines using the
+    tabulated analytic slope. Outside the table the leading asymptotic forms
+    ``ln(2/x) - 1`` and ``(1 - pi/(2x) + 1/x**2) / x**2`` are used; their
+    relative error there is below ``1e-8``. Only a log, an exponential and four
+    gathers are evaluated per element, and the backward pass is polynomial.
+    """
+
+    ln_x0, d_ln_x, ln_kernel, slope = _projected_nfw_kernel_table()
+    ln_kernel = jnp.asarray(ln_kernel, dtype=jnp.result_type(x, jnp.float32))
+    slope = jnp.asarray(slope, dtype=ln_kernel.dtype)
+
+    x_table = jnp.clip(x, _PROJECTED_NFW_TABLE_X_MIN, _PROJECTED_NFW_TABLE_X_MAX)
+    s = (jnp.log(x_table) - ln_x0) / d_ln_x
+    i = jnp.clip(jnp.floor(s).astype(jnp.int32), 0, _PROJECTED_NFW_TABLE_SIZE - 2)
+    t = s - i
+    t2 = t * t
+    t3 = t2 * t
+    ln_f = (
+        (2.0 * t3 - 3.0 * t2 + 1.0) * ln_kernel[i]
+        + (t3 - 2.0 * t2 + t) * d_ln_x * slope[i]
+        + (3.0 * t2 - 2.0 * t3) * ln_kernel[i + 1]
+        + (t3 - t2) * d_ln_x * slope[i + 1]
+    )
+    table = jnp.exp(ln_f)
+
+    x_low = jnp.minimum(x, _PROJECTED_NFW_TABLE_X_MIN)
+    low = jnp.log(2.0 / x_low) - 1.0
+    x_high = jnp.maximum(x, _PROJECTED_NFW_TABLE_X_MAX)
+    high = (1.0 - 0.5 * jnp.pi / x_high + 1.0 / x_high**2) / x_high**2
+    return jnp.where(
+        x < _PROJECTED_NFW_TABLE_X_MIN,
+        low,
+        jnp.where(x > _PROJECTED_NFW_TABLE_X_MAX, high, table),
+    )
+
+
+def _projected_nfw_kernel_for(profile_params: NFWProfileParams):
+    if profile_params.projected_kernel == "analytic":
+        return _projected_nfw_kernel
+    if profile_params.projected_kernel == "table":
+        return _projected_nfw_kernel_lookup
+    raise ValueError("projected_kernel must be 'analytic' or 'table'")
+
+
+def nfw_projected_surface_density_from_halo_parameters(
+    r_perp: Array,
+    halo: NFWHaloParameters,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+) -> Array:
+    """Evaluate :func:`nfw_projected_surface_density` from per-halo parameters.
+
+    ``halo`` may be gathered to pair shape, so only the softened radius, the
+    projected kernel and the taper are evaluated per pair.
+    """
+
+    kernel = _projected_nfw_kernel_for(profile_params)
+    r_safe = jnp.sqrt(r_perp**2 + (profile_params.r_softening_fraction * halo.r_s) ** 2)
+    sigma = 2.0 * halo.rho_s * halo.r_s * kernel(r_safe / halo.r_s)
+    if profile_params.smooth_truncation:
+        return sigma * smooth_taper(r_safe, halo.r_delta, halo.width)
+    return jnp.where(r_safe <= halo.r_delta, sigma, 0.0)
+
+
 def nfw_projected_surface_density(
     r_perp: Array,
     mass: Array,
@@ -149,15 +320,127 @@ def nfw_projected_surface_density(
 ) -> Array:
     """Projected NFW surface density in comoving ``(Msun/h)/(Mpc/h)^2`` units."""
 
-    r_delta, _, r_s, rho_s = nfw_scale_radius_and_density(
+    halo = nfw_halo_parameters(mass, redshift, cosmology, concentration_params, profile_params)
+    return nfw_projected_surface_density_from_halo_parameters(r_perp, halo, profile_params)
+
+
+def nfw_projected_enclosed_mass_from_halo_parameters(halo: NFWHaloParameters) -> Array:
+    """Projected NFW mass inside the cylinder ``R <= r_delta`` in ``Msun/h``.
+
+    This is the closed-form integral of the untruncated projected kernel,
+    ``4 pi rho_s r_s**3 [ln(c/2) + C(c)]`` with ``C(x) = arccos(1/x)/sqrt(x**2-1)``
+    (``arccosh`` below ``x = 1``). It equals the mass the sparse painter deposits
+    with hard truncation and is the taper-midpoint value for the smooth taper,
+    so it stands in for the painted mass of haloes smaller than a map pixel.
+    """
+
+    eps = 1.0e-5
+    x = halo.r_delta / halo.r_s
+    x_safe_low = jnp.minimum(x, 1.0 - eps)
+    x_safe_high = jnp.maximum(x, 1.0 + eps)
+    low = jnp.arccosh(1.0 / x_safe_low) / jnp.sqrt(1.0 - x_safe_low**2)
+    high = jnp.arccos(1.0 / x_safe_high) / jnp.sqrt(x_safe_high**2 - 1.0)
+    shape = jnp.log(0.5 * x) + jnp.where(
+        x < 1.0 - eps, low, jnp.where(x > 1.0 + eps, high, jnp.ones_like(x))
+    )
+    return 4.0 * jnp.pi * halo.rho_s * halo.r_s**3 * shape
+
+
+# Rational approximations for the sine/cosine-integral auxiliary functions
+# (Abramowitz & Stegun 5.2.38-5.2.39), written in ``t = 1/x**2`` so they stay
+# finite in float32. Absolute error is below ``5e-7`` for ``x >= 1``.
+_SICI_F_NUM = (38.027264, 265.187033, 335.677320, 38.102495)
+_SICI_F_DEN = (40.021433, 322.624911, 570.236280, 157.105423)
+_SICI_G_NUM = (42.242855, 302.757865, 352.018498, 21.821899)
+_SICI_G_DEN = (48.196927, 482.485984, 1114.978885, 449.690326)
+_EULER_GAMMA = 0.5772156649015329
+
+
+def _quartic_in_t(t: Array, coeffs: tuple[float, float, float, float]) -> Array:
+    return 1.0 + t * (coeffs[0] + t * (coeffs[1] + t * (coeffs[2] + t * coeffs[3])))
+
+
+def _sine_cosine_integrals(x: Array) -> tuple[Array, Array]:
+    """Return ``(Si(x), Ci(x))`` for positive ``x``.
+
+    A power series is used below ``x = 1`` and the asymptotic auxiliary
+    functions above it. Both branches are evaluated on clamped inputs so
+    gradients stay finite on either side of the switch.
+    """
+
+    x_low = jnp.clip(x, 1.0e-30, 1.0)
+    x2 = x_low**2
+    si_low = jnp.zeros_like(x_low)
+    ci_low = jnp.zeros_like(x_low)
+    term = x_low
+    for n in range(7):
+        si_low = si_low + term / (2 * n + 1)
+        term = -term * x2 / ((2 * n + 2) * (2 * n + 3))
+    term = -0.5 * x2
+    for n in range(1, 8):
+        ci_low = ci_low + term / (2 * n)
+        term = -term * x2 / ((2 * n + 1) * (2 * n + 2))
+    ci_low = ci_low + _EULER_GAMMA + jnp.log(x_low)
+
+    x_high = jnp.maximum(x, 1.0)
+    t = 1.0 / x_high**2
+    f = _quartic_in_t(t, _SICI_F_NUM) / (_quartic_in_t(t, _SICI_F_DEN) * x_high)
+    g = _quartic_in_t(t, _SICI_G_NUM) / (_quartic_in_t(t, _SICI_G_DEN) * x_high**2)
+    sin_x = jnp.sin(x_high)
+    cos_x = jnp.cos(x_high)
+    si_high = 0.5 * jnp.pi - f * cos_x - g * sin_x
+    ci_high = f * sin_x - g * cos_x
+
+    low = x < 1.0
+    return jnp.where(low, si_low, si_high), jnp.where(low, ci_low, ci_high)
+
+
+def nfw_fourier_transform(
+    k: Array,
+    mass: Array,
+    redshift: Array,
+    cosmology: Cosmology,
+    concentration_params: ConcentrationParams,
+    profile_params: NFWProfileParams = DEFAULT_NFW_PROFILE_PARAMS,
+) -> Array:
+    """Normalized Fourier transform ``u(k|M,z)`` of the NFW profile.
+
+    Parameters
+    ----------
+    k:
+        Comoving wavenumber in ``h/Mpc``. Broadcasts against ``mass`` and
+        ``redshift``.
+    mass, redshift:
+        Halo mass in ``Msun/h`` and redshift.
+
+    Returns
+    -------
+    Array
+        Dimensionless ``u(k)`` with ``u(0) = 1``.
+
+    Notes
+    -----
+    This is the closed form for an NFW profile sharply truncated at
+    ``r_delta`` (Cooray & Sheth 2002, eq. 81). The optional smooth taper used by
+    :func:`nfw_density` is not included, so the two differ by the small amount
+    of mass the taper moves across ``r_delta``.
+    """
+
+    _, c, r_s, _ = nfw_scale_radius_and_density(
         mass, redshift, cosmology, concentration_params, profile_params
     )
-    r_safe = jnp.sqrt(r_perp**2 + (profile_params.r_softening_fraction * r_s) ** 2)
-    sigma = 2.0 * rho_s * r_s * _projected_nfw_kernel(r_safe / r_s)
-    if profile_params.smooth_truncation:
-        width = jnp.maximum(profile_params.truncation_width_fraction * r_delta, 1.0e-12)
-        return sigma * smooth_taper(r_safe, r_delta, width)
-    return jnp.where(r_safe <= r_delta, sigma, 0.0)
+    k = jnp.asarray(k)
+    positive = k > 0.0
+    y = jnp.where(positive, k, 1.0) * r_s
+    y_outer = (1.0 + c) * y
+    si_inner, ci_inner = _sine_cosine_integrals(y)
+    si_outer, ci_outer = _sine_cosine_integrals(y_outer)
+    u = (
+        jnp.sin(y) * (si_outer - si_inner)
+        - jnp.sin(c * y) / y_outer
+        + jnp.cos(y) * (ci_outer - ci_inner)
+    ) / nfw_shape_function(c)
+    return jnp.where(positive, u, 1.0)
 
 
 def _linear_interpolate(x_eval: Array, x_grid: Array, y_grid: Array) -> Array:
@@ -1,14 +1,27 @@
+import dataclasses
 from pathlib import Path
 
+import jax.numpy as jnp
 import numpy as np
 import pytest
 
-from geppetto.catalog import HaloCatalog, LightconeHaloCatalog
-from geppetto.cosmology import rho_mean_comoving
+from geppetto.catalog import HaloCatalog, LightconeHaloCatalog, LightconeSparseStencil
+from geppetto.concentration import duffy08_all_200c
+from geppetto.cosmology import Cosmology, rho_mean_comoving
 from geppetto.io import (
+    CompactPixelIndex,
     PinocchioCatalogError,
+    PinocchioMassMap,
+    StencilBucketPolicy,
+    build_lightcone_sparse_stencil_bruteforce,
+    build_lightcone_sparse_stencil_healpix,
     healpix_pixel_area_sr,
     healpix_pixel_unit_vectors,
+    iter_pinocchio_lightcone_chunks,
+    lightcone_sparse_stencil_cache_key,
+    nfw_adaptive_support_radius_mpc_h,
+    nfw_support_radius_mpc_h,
+    pad_lightcone_sparse_stencil,
     pinocchio_plc_angle_unit_vectors,
     read_pinocchio_binary_lightcone_catalog,
     read_pinocchio_binary_lightcone_light_catalog,
@@ -22,9 +35,16 @@ from geppetto.io import (
     read_pinocchio_nz,
     read_pinocchio_parameter_file,
     read_pinocchio_snapshot_catalog,
+    sort_lightcone_sparse_stencil_by_pixel,
+    stack_lightcone_sparse_stencil_by_segment,
+    validate_lightcone_sparse_stencil,
     validate_tabulated_projected_profile_params,
 )
-from geppetto.profiles import TabulatedProjectedProfileParams
+from geppetto.profiles import (
+    NFWProfileParams,
+    TabulatedProjectedProfileParams,
+    nfw_projected_surface_density,
+)
 
 
 @pytest.mark.parametrize(
@@ -203,6 +223,38 @@ def test_snapshot_reader_rejects_wrong_column_count(tmp_path):
         read_pinocchio_snapshot_catalog(path)
 
 
+def test_ascii_reader_streams_blocks_across_split_files(tmp_path, monkeypatch):
+    monkeypatch.setattr("geppetto.io._ASCII_BLOCK_BYTES", 16)
+    base = tmp_path / "pinocchio.demo.plc.out"
+    Path(f"{base}.0").write_text(
+        "# id z mass theta phi obsz\n"
+        "1 0.10 1.0e13 10.0 20.0 0.101\n"
+        "\n"
+        "2 0.20 2.0e13 11.0 21.0 0.201  # inline note\n",
+        encoding="utf-8",
+    )
+    Path(f"{base}.1").write_text(
+        "3 0.30 3.0e13 12.0 22.0 0.301\r\n   \n4 0.40 4.0e13 13.0 23.0 0.401",
+        encoding="utf-8",
+    )
+
+    catalog = read_pinocchio_lightcone_light_catalog(base, format="ascii")
+
+    assert catalog.group_ids.tolist() == [1, 2, 3, 4]
+    np.testing.assert_allclose(catalog.masses_msun_h, [1.0e13, 2.0e13, 3.0e13, 4.0e13])
+    np.testing.assert_allclose(catalog.observed_redshift, [0.101, 0.201, 0.301, 0.401])
+
+    Path(f"{base}.1").write_text(
+        "3 0.30 3.0e13 12.0 22.0 0.301 7\n4 0.40 4.0e13 13.0 23.0\n", encoding="utf-8"
+    )
+    with pytest.raises(PinocchioCatalogError, match="6 columns; found a row with 7"):
+        read_pinocchio_lightcone_light_catalog(base, format="ascii")
+
+    Path(f"{base}.1").write_text("3 0.30 3.0e13 12.0 22.0 abc\n", encoding="utf-8")
+    with pytest.raises(PinocchioCatalogError, match="Invalid numeric rows"):
+        read_pinocchio_lightcone_light_catalog(base, format="ascii")
+
+
 def test_read_pinocchio_binary_snapshot_catalog_and_auto_detect(tmp_path):
     path = tmp_path / "pinocchio.0.5000.demo.catalog.out"
     dtype = np.dtype(
@@ -383,6 +435,135 @@ def test_read_pinocchio_binary_lightcone_catalog_and_auto_detect(tmp_path):
     np.testing.assert_allclose(catalog.observed_redshift, [0.101, 0.199], rtol=1.0e-6)
 
 
+def test_binary_lightcone_reader_walks_blocks_across_split_files(tmp_path):
+    base = tmp_path / "pinocchio.demo.plc.out"
+    data = np.zeros(5, dtype=_PLC_RECORD_DTYPE)
+    data["name"] = np.arange(5) + 1
+    data["truez"] = np.linspace(0.1, 0.5, 5)
+    data["pos"] = np.arange(15, dtype=np.float64).reshape(5, 3) + 1.0
+    data["Mass"] = np.linspace(1.0e13, 5.0e13, 5)
+    _write_split_binary_plc(base, [[data[:2], data[:0], data[2:3]], [data[3:]]])
+
+    catalog = read_pinocchio_binary_lightcone_catalog(base)
+
+    assert catalog.group_ids.tolist() == [1, 2, 3, 4, 5]
+    np.testing.assert_array_equal(catalog.positions_mpc_h, data["pos"])
+    np.testing.assert_array_equal(catalog.true_redshift, data["truez"])
+    assert not isinstance(catalog.masses_msun_h, np.memmap)
+
+    truncated = Path(f"{base}.1")
+    _write_new_binary_plc_file(truncated, data[:2])
+    truncated.write_bytes(truncated.read_bytes()[:-12])
+    with pytest.raises(PinocchioCatalogError, match="Truncated"):
+        read_pinocchio_binary_lightcone_catalog(base)
+
+
+def test_binary_lightcone_reader_decodes_split_files_in_threads(tmp_path):
+    base = tmp_path / "pinocchio.demo.plc.out"
+    data = np.zeros(7, dtype=_PLC_RECORD_DTYPE)
+    data["name"] = np.arange(7) + 1
+    data["pos"] = np.arange(21, dtype=np.float64).reshape(7, 3)
+    data["Mass"] = np.linspace(1.0e13, 7.0e13, 7)
+    _write_split_binary_plc(base, [[data[:3]], [data[3:3]], [data[3:4]], [data[4:]]])
+
+    serial = read_pinocchio_binary_lightcone_catalog(base)
+    threaded = read_pinocchio_lightcone_catalog(base, format="binary", n_threads=3)
+
+    assert threaded.group_ids.tolist() == list(range(1, 8))
+    np.testing.assert_array_equal(threaded.positions_mpc_h, serial.positions_mpc_h)
+    np.testing.assert_array_equal(threaded.masses_msun_h, data["Mass"])
+    with pytest.raises(PinocchioCatalogError, match="n_threads must be positive"):
+        read_pinocchio_binary_lightcone_catalog(base, n_threads=0)
+
+    truncated = Path(f"{base}.2")
+    _write_new_binary_plc_file(truncated, data[3:4])
+    truncated.write_bytes(truncated.read_bytes()[:-12])
+    with pytest.raises(PinocchioCatalogError, match="Truncated"):
+        read_pinocchio_binary_lightcone_catalog(base, n_threads=4)
+
+
+def test_iter_pinocchio_lightcone_chunks_yields_fixed_size_chunks(tmp_path):
+    base = tmp_path / "pinocchio.demo.plc.out"
+    data = np.zeros(7, dtype=_PLC_RECORD_DTYPE)
+    data["name"] = np.arange(7) + 1
+    data["truez"] = np.linspace(0.1, 0.7, 7)
+    data["Mass"] = np.linspace(1.0e13, 7.0e13, 7)
+    _write_split_binary_plc(base, [[data[:3], data[3:4]], [data[4:]]])
+
+    chunks = list(
+        iter_pinocchio_lightcone_chunks(base, chunk_haloes=2, columns=["true_redshift"])
+    )
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 2, 1]
+    assert all(chunk.positions_mpc_h is None for chunk in chunks)
+    np.testing.assert_array_equal(
+        np.concatenate([chunk.masses_msun_h for chunk in chunks]), data["Mass"]
+    )
+
+    selected = list(iter_pinocchio_lightcone_chunks(base, chunk_haloes=3, z_range=(0.25, 0.55)))
+    assert [len(chunk) for chunk in selected] == [3]
+    assert selected[0].group_ids.tolist() == [3, 4, 5]
+    assert selected[0].true_redshift is not None
+
+    with pytest.raises(PinocchioCatalogError, match="chunk_haloes"):
+        next(iter_pinocchio_lightcone_chunks(base, chunk_haloes=0))
+
+
+def test_lightcone_readers_decode_only_requested_columns(tmp_path):
+    rows = [
+        "11 0.10 3 4 0 10 20 30 1.0e13 0.0 90.0 100 0.101",
+        "12 0.20 0 0 5 -1 -2 -3 2.0e13 90.00 0.0 -50 0.199",
+    ]
+    ascii_path = tmp_path / "ascii" / "pinocchio.demo.plc.out"
+    ascii_path.parent.mkdir()
+    ascii_path.write_text("\n".join(rows), encoding="utf-8")
+    table = np.loadtxt(rows)
+    dtype = np.dtype(
+        [
+            ("name", np.uint64),
+            ("truez", np.float32),
+            ("pos", np.float32, 3),
+            ("vel", np.float32, 3),
+            ("Mass", np.float32),
+            ("theta", np.float32),
+            ("phi", np.float32),
+            ("vlos", np.float32),
+            ("obsz", np.float32),
+        ]
+    )
+    records = np.zeros(2, dtype=dtype)
+    records["name"] = table[:, 0]
+    records["truez"] = table[:, 1]
+    records["pos"] = table[:, 2:5]
+    records["Mass"] = table[:, 8]
+    records["theta"] = table[:, 9]
+    records["phi"] = table[:, 10]
+    binary_path = tmp_path / "binary" / "pinocchio.demo.plc.out"
+    binary_path.parent.mkdir()
+    _write_new_binary_plc_file(binary_path, records)
+    columns = ["true_redshift", "positions_mpc_h", "theta_deg", "phi_deg"]
+
+    for path in (ascii_path, binary_path):
+        full = read_pinocchio_lightcone_catalog(path)
+        catalog = read_pinocchio_lightcone_catalog(path, columns=columns)
+
+        assert catalog.group_ids is None
+        assert catalog.velocities_km_s is None
+        assert catalog.observed_redshift is None
+        for name in ("masses_msun_h", *columns):
+            values = getattr(catalog, name)
+            assert values.dtype == np.float64
+            assert values.flags.c_contiguous
+            np.testing.assert_array_equal(values, getattr(full, name))
+        lightcone = catalog.to_lightcone_catalog()
+        np.testing.assert_allclose(np.asarray(lightcone.chi), [5.0, 5.0], rtol=1.0e-6)
+        with pytest.raises(PinocchioCatalogError, match="observed_redshift"):
+            catalog.to_lightcone_catalog(redshift="observed")
+
+    with pytest.raises(PinocchioCatalogError, match="Unknown PINOCCHIO PLC catalog columns: z"):
+        read_pinocchio_lightcone_catalog(binary_path, columns=["z"])
+
+
 def test_binary_lightcone_reader_rejects_light_output_without_positions(tmp_path):
     path = tmp_path / "pinocchio.demo.plc.out"
     path.write_bytes(np.array([4, 32, 4], dtype=np.int32).tobytes())
@@ -605,6 +786,358 @@ def test_healpix_pixel_unit_vectors_full_sky_and_validation():
         healpix_pixel_unit_vectors(1, np.array([12]))
 
 
+def _compact_mass_map(pixels, nside, ordering="RING"):
+    pixels = np.asarray(pixels, dtype=np.int64)
+    return PinocchioMassMap(
+        pixel=pixels,
+        temperature=np.zeros(pixels.shape[0]),
+        source=Path("compact.massmap.seg000.fits"),
+        header={},
+        nside=nside,
+        ordering=ordering,
+        index_scheme="EXPLICIT",
+        first_pixel=None,
+        last_pixel=None,
+        aperture_deg=None,
+        selection_type=None,
+        axis_vector=None,
+        filter_name=None,
+        filter_considered=None,
+        filter_excluded=None,
+        filter_included=None,
+        filter_excluded_fraction=None,
+    )
+
+
+@pytest.mark.parametrize(
+    ("pixels", "dense"),
+    [
+        (np.arange(100, 160), True),
+        (np.array([7, 3, 11, 5, 9, 3]), True),
+        (np.array([50_000, 12, 9_000_000, 77]), False),
+        (np.array([], dtype=np.int64), False),
+    ],
+)
+def test_compact_pixel_index_matches_dict_lookup(pixels, dense):
+    index = CompactPixelIndex.from_pixels(pixels)
+    queries = np.concatenate([pixels, [-1, 0, 8, 99, 160, 10_000_000]]).astype(np.int64)
+    pixel_to_row = {int(pixel): row for row, pixel in enumerate(pixels)}
+
+    expected = np.array([pixel_to_row.get(int(pixel), -1) for pixel in queries])
+
+    assert index.is_dense is dense
+    np.testing.assert_array_equal(index.rows(queries), expected)
+    assert index.rows(queries.reshape(2, -1)).shape == (2, queries.size // 2)
+
+
+def test_mass_map_pixel_index_uses_header_range_and_is_cached():
+    mass_map = _compact_mass_map(np.array([10, 12, 14, 11]), 4)
+    mass_map = dataclasses.replace(mass_map, first_pixel=8, last_pixel=15)
+
+    index = mass_map.pixel_index
+
+    assert index is mass_map.pixel_index
+    assert index.is_dense
+    assert index.first_pixel == 8
+    np.testing.assert_array_equal(index.rows([8, 10, 11, 14, 15, 16]), [-1, 0, 3, 2, -1, -1])
+
+
+@pytest.mark.parametrize("nside", [1, 4, 16])
+def test_healpix_ring_stencil_matches_bruteforce_pairs(nside):
+    pytest.importorskip("healpy")
+    rng = np.random.default_rng(nside)
+    npix = 12 * nside * nside
+    pixels = rng.permutation(npix)[: max(npix // 3, 1)]
+    unit_vector = rng.normal(size=(40, 3))
+    unit_vector /= np.linalg.norm(unit_vector, axis=1, keepdims=True)
+    unit_vector[0] = [0.0, 0.0, 1.0]
+    unit_vector[1] = healpix_pixel_unit_vectors(nside, pixels[:1])[0]
+    catalog = LightconeHaloCatalog(
+        unit_vector=unit_vector,
+        chi=rng.uniform(500.0, 2000.0, 40),
+        mass=np.ones(40),
+        redshift=np.ones(40),
+    )
+    rmax = rng.uniform(0.0, 400.0 / nside, 40)
+    mass_map = _compact_mass_map(pixels, nside)
+
+    stencil, diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, max_batch_pixels=64, collect_diagnostics=True
+    )
+    reference = build_lightcone_sparse_stencil_bruteforce(
+        healpix_pixel_unit_vectors(nside, pixels), catalog, rmax
+    )
+
+    def pairs(st):
+        return sorted(
+            zip(np.asarray(st.halo_id).tolist(), np.asarray(st.pix_id).tolist(), strict=True)
+        )
+
+    assert stencil.n_pix == pixels.shape[0]
+    assert pairs(stencil) == pairs(reference)
+    assert np.all(np.diff(np.asarray(stencil.halo_id)) >= 0)
+    order = np.lexsort((np.asarray(stencil.pix_id), np.asarray(stencil.halo_id)))
+    ref_order = np.lexsort((np.asarray(reference.pix_id), np.asarray(reference.halo_id)))
+    np.testing.assert_allclose(
+        np.asarray(stencil.r_perp)[order],
+        np.asarray(reference.r_perp)[ref_order],
+        rtol=1.0e-6,
+        atol=1.0e-4,
+    )
+    assert diag.query_mode == "ring"
+    assert diag.n_halos == 40
+    assert diag.n_query_pixels_total >= diag.n_inside_domain_total >= diag.n_kept_pairs_total
+    assert diag.n_kept_pairs_total == stencil.size
+
+
+def test_healpix_ring_stencil_process_shards_match_serial_build():
+    nside = 32
+    rng = np.random.default_rng(8)
+    pixels = rng.permutation(12 * nside * nside)[:4000]
+    unit_vector = rng.normal(size=(300, 3))
+    unit_vector /= np.linalg.norm(unit_vector, axis=1, keepdims=True)
+    catalog = LightconeHaloCatalog(
+        unit_vector=unit_vector,
+        chi=rng.uniform(500.0, 2000.0, 300),
+        mass=np.ones(300),
+        redshift=np.ones(300),
+    )
+    rmax = rng.uniform(0.0, 60.0, 300)
+    mass_map = _compact_mass_map(pixels, nside)
+
+    serial, serial_diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, collect_diagnostics=True
+    )
+    sharded, diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, n_workers=3, collect_diagnostics=True
+    )
+
+    np.testing.assert_array_equal(np.asarray(sharded.pix_id), np.asarray(serial.pix_id))
+    np.testing.assert_array_equal(np.asarray(sharded.halo_id), np.asarray(serial.halo_id))
+    np.testing.assert_array_equal(np.asarray(sharded.r_perp), np.asarray(serial.r_perp))
+    assert len(serial_diag.worker_elapsed_seconds) == 1
+    assert len(diag.worker_elapsed_seconds) == 3
+    assert sum(diag.worker_n_halos) == 300
+    assert diag.n_kept_pairs_total == serial_diag.n_kept_pairs_total
+    assert diag.n_query_pixels_total == serial_diag.n_query_pixels_total
+    assert diag.worker_load_imbalance >= 1.0
+
+
+def test_lightcone_sparse_stencil_save_load_roundtrip(tmp_path):
+    stencil = LightconeSparseStencil(
+        pix_id=np.array([0, 2, 1], dtype=np.int32),
+        halo_id=np.array([0, 0, 1], dtype=np.int32),
+        r_perp=np.array([0.5, 1.5, 0.0]),
+        n_pix=3,
+    )
+
+    stencil.save(tmp_path / "stencil")
+    mapped = LightconeSparseStencil.load(tmp_path / "stencil")
+    loaded = LightconeSparseStencil.load(tmp_path / "stencil", mmap=False)
+
+    assert isinstance(mapped.r_perp, np.memmap)
+    assert not isinstance(loaded.r_perp, np.memmap)
+    for result in (mapped, loaded):
+        assert result.n_pix == 3
+        np.testing.assert_array_equal(result.pix_id, stencil.pix_id)
+        np.testing.assert_array_equal(result.halo_id, stencil.halo_id)
+        np.testing.assert_array_equal(result.r_perp, stencil.r_perp)
+        assert result.pix_offsets is None
+
+    sorted_stencil = sort_lightcone_sparse_stencil_by_pixel(stencil)
+    sorted_stencil.save(tmp_path / "stencil")
+    reloaded = LightconeSparseStencil.load(tmp_path / "stencil")
+    np.testing.assert_array_equal(reloaded.pix_id, [0, 1, 2])
+    np.testing.assert_array_equal(reloaded.halo_id, [0, 1, 0])
+    np.testing.assert_array_equal(reloaded.pix_offsets, [0, 1, 2, 3])
+
+
+def test_pad_lightcone_sparse_stencil_buckets_shapes_and_keeps_csr_layout():
+    policy = StencilBucketPolicy(growth=2.0, min_pairs=2, min_pixels=2, min_halos=2)
+    catalog = LightconeHaloCatalog(
+        unit_vector=np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]),
+        chi=np.array([100.0, 200.0]),
+        mass=np.array([1.0e13, 2.0e13]),
+        redshift=np.array([0.1, 0.2]),
+    )
+    stencil = sort_lightcone_sparse_stencil_by_pixel(
+        LightconeSparseStencil(
+            pix_id=np.array([2, 0, 1], dtype=np.int32),
+            halo_id=np.array([0, 1, 1], dtype=np.int32),
+            r_perp=np.array([0.5, 1.0, 2.0]),
+            n_pix=3,
+        )
+    )
+
+    padded, padded_catalog = pad_lightcone_sparse_stencil(stencil, catalog, policy)
+
+    assert [policy.bucket(n, 2) for n in (1, 2, 3, 5, 9)] == [2, 2, 4, 8, 16]
+    assert (padded.size, padded.n_pix, padded_catalog.size) == (4, 4, 4)
+    np.testing.assert_array_equal(padded.pix_id, [0, 1, 2, 3])
+    np.testing.assert_array_equal(padded.halo_id, [1, 1, 0, 2])
+    np.testing.assert_array_equal(padded.pix_offsets, [0, 1, 2, 3, 4])
+    # Padded problems feed the jitted kernels, so halo columns come back as JAX arrays.
+    np.testing.assert_array_equal(padded_catalog.mass[:2], jnp.asarray(catalog.mass))
+    assert np.all(np.asarray(padded_catalog.chi) > 0.0)
+    validate_lightcone_sparse_stencil(padded, padded_catalog)
+    with pytest.raises(PinocchioCatalogError, match="growth"):
+        StencilBucketPolicy(growth=1.0)
+
+
+def test_stack_lightcone_sparse_stencil_by_segment_keys_pixels_per_segment():
+    stencil = LightconeSparseStencil(
+        pix_id=np.array([0, 2, 1, 2], dtype=np.int32),
+        halo_id=np.array([0, 0, 1, 2], dtype=np.int32),
+        r_perp=np.array([0.5, 1.5, 0.0, 0.2]),
+        n_pix=3,
+        point_pix_id=np.array([1], dtype=np.int32),
+        point_halo_id=np.array([3], dtype=np.int32),
+    )
+
+    stacked = stack_lightcone_sparse_stencil_by_segment(stencil, np.array([0, 1, 1, 0]), 2)
+
+    assert stacked.n_pix == 6
+    np.testing.assert_array_equal(stacked.pix_id, [0, 2, 4, 5])
+    np.testing.assert_array_equal(stacked.halo_id, stencil.halo_id)
+    np.testing.assert_array_equal(stacked.point_pix_id, [1])
+    validate_lightcone_sparse_stencil(sort_lightcone_sparse_stencil_by_pixel(stacked))
+    with pytest.raises(PinocchioCatalogError, match="out-of-range segment"):
+        stack_lightcone_sparse_stencil_by_segment(stencil, np.array([0, 1, 2, 0]), 2)
+
+
+def test_healpix_ring_stencil_cache_reuses_geometry_key(tmp_path):
+    nside = 16
+    rng = np.random.default_rng(10)
+    pixels = rng.permutation(12 * nside * nside)[:1500]
+    unit_vector = rng.normal(size=(50, 3))
+    unit_vector /= np.linalg.norm(unit_vector, axis=1, keepdims=True)
+    catalog = LightconeHaloCatalog(
+        unit_vector=unit_vector,
+        chi=rng.uniform(500.0, 2000.0, 50),
+        mass=np.ones(50),
+        redshift=np.ones(50),
+    )
+    rmax = rng.uniform(0.0, 80.0, 50)
+    mass_map = _compact_mass_map(pixels, nside)
+
+    built, built_diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, collect_diagnostics=True, cache_dir=tmp_path
+    )
+    cached, cached_diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, collect_diagnostics=True, cache_dir=tmp_path
+    )
+
+    key = lightcone_sparse_stencil_cache_key(mass_map, catalog, rmax)
+    assert [path.name for path in tmp_path.iterdir()] == [key]
+    assert not built_diag.cache_hit
+    assert cached_diag.cache_hit
+    assert cached_diag.n_kept_pairs_total == built_diag.n_kept_pairs_total
+    assert cached_diag.n_halos_with_kept_pairs == built_diag.n_halos_with_kept_pairs
+    assert isinstance(cached.pix_id, np.memmap)
+    np.testing.assert_array_equal(np.asarray(cached.pix_id), np.asarray(built.pix_id))
+    np.testing.assert_array_equal(np.asarray(cached.halo_id), np.asarray(built.halo_id))
+    np.testing.assert_array_equal(np.asarray(cached.r_perp), np.asarray(built.r_perp))
+    assert lightcone_sparse_stencil_cache_key(mass_map, catalog, rmax * 1.01) != key
+
+
+def test_healpix_ring_stencil_subpixel_threshold_deposits_unresolved_halos():
+    hp = pytest.importorskip("healpy")
+    nside = 8
+    rng = np.random.default_rng(14)
+    pixels = rng.permutation(12 * nside * nside)
+    unit_vector = rng.normal(size=(60, 3))
+    unit_vector /= np.linalg.norm(unit_vector, axis=1, keepdims=True)
+    unit_vector[:4] = [[0.0, 0.0, 1.0], [0.0, 0.0, -1.0], [1.0, 0.0, 0.0], [0.6, 0.0, 0.8]]
+    chi = rng.uniform(500.0, 2000.0, 60)
+    catalog = LightconeHaloCatalog(
+        unit_vector=unit_vector, chi=chi, mass=np.ones(60), redshift=np.ones(60)
+    )
+    pixel_size = np.sqrt(healpix_pixel_area_sr(nside))
+    rmax = chi * pixel_size * rng.uniform(0.05, 3.0, 60)
+    mass_map = _compact_mass_map(pixels, nside)
+
+    full = build_lightcone_sparse_stencil_healpix(mass_map, catalog, rmax)
+    split, diag = build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, collect_diagnostics=True, subpixel_threshold=1.0
+    )
+
+    alpha = 2.0 * np.arcsin(rmax / (2.0 * chi))
+    subpixel = np.flatnonzero(alpha < pixel_size)
+    full_halo_id = np.asarray(full.halo_id)
+    resolved_pairs = ~np.isin(full_halo_id, subpixel)
+    assert 0 < subpixel.size < 60
+    np.testing.assert_array_equal(np.asarray(split.halo_id), full_halo_id[resolved_pairs])
+    np.testing.assert_array_equal(np.asarray(split.pix_id), np.asarray(full.pix_id)[resolved_pairs])
+    np.testing.assert_array_equal(np.asarray(split.point_halo_id), subpixel)
+    np.testing.assert_array_equal(
+        pixels[np.asarray(split.point_pix_id)],
+        hp.vec2pix(nside, *unit_vector[subpixel].T),
+    )
+    assert diag.n_subpixel_halos == diag.n_subpixel_deposits == subpixel.size
+    assert diag.n_subpixel_pairs_avoided == full.size - split.size
+    assert diag.n_subpixel_query_pixels_avoided > 0
+    assert lightcone_sparse_stencil_cache_key(
+        mass_map, catalog, rmax, subpixel_threshold=1.0
+    ) != lightcone_sparse_stencil_cache_key(mass_map, catalog, rmax)
+    with pytest.raises(PinocchioCatalogError, match="subpixel_threshold"):
+        build_lightcone_sparse_stencil_healpix(mass_map, catalog, rmax, subpixel_threshold=-1.0)
+
+
+def test_nfw_adaptive_support_radius_meets_mass_loss_tolerance():
+    mass = np.array([1.0e12, 3.0e13, 1.0e15])
+    redshift = np.array([0.1, 0.5, 1.5])
+    params = duffy08_all_200c()
+    profile = NFWProfileParams(truncation_width_fraction=0.05, r_softening_fraction=0.0)
+
+    fixed = nfw_support_radius_mpc_h(mass, redshift, Cosmology(), params, profile)
+    loose = nfw_adaptive_support_radius_mpc_h(
+        mass, redshift, Cosmology(), params, profile, mass_loss_tolerance=1.0e-2
+    )
+    tight = nfw_adaptive_support_radius_mpc_h(
+        mass, redshift, Cosmology(), params, profile, mass_loss_tolerance=1.0e-4
+    )
+
+    assert np.all(loose < tight) and np.all(tight < fixed)
+    for i, rmax in enumerate(tight):
+        # Direct quadrature of the tapered projected mass outside ``rmax``.
+        r = np.geomspace(1.0e-6 * fixed[i], 2.0 * fixed[i], 40001)
+        sigma = np.asarray(
+            nfw_projected_surface_density(
+                r, mass[i : i + 1], redshift[i : i + 1], Cosmology(), params, profile
+            ),
+            dtype=np.float64,
+        )
+        dm = 2.0 * np.pi * r * sigma
+        cumulative = np.concatenate([[0.0], np.cumsum(0.5 * (dm[1:] + dm[:-1]) * np.diff(r))])
+        lost = 1.0 - np.interp(rmax, r, cumulative) / cumulative[-1]
+        np.testing.assert_allclose(lost, 1.0e-4, rtol=0.1)
+
+    hard = NFWProfileParams(smooth_truncation=False)
+    np.testing.assert_allclose(
+        nfw_adaptive_support_radius_mpc_h(mass, redshift, Cosmology(), params, hard),
+        nfw_support_radius_mpc_h(mass, redshift, Cosmology(), params, hard),
+    )
+    with pytest.raises(PinocchioCatalogError, match="mass_loss_tolerance"):
+        nfw_adaptive_support_radius_mpc_h(
+            mass, redshift, Cosmology(), params, profile, mass_loss_tolerance=1.0
+        )
+
+
+def test_healpix_ring_stencil_rejects_nested_maps():
+    catalog = LightconeHaloCatalog(
+        unit_vector=np.array([[0.0, 0.0, 1.0]]),
+        chi=np.array([1000.0]),
+        mass=np.ones(1),
+        redshift=np.ones(1),
+    )
+    with pytest.raises(PinocchioCatalogError, match="RING"):
+        build_lightcone_sparse_stencil_healpix(
+            _compact_mass_map([0], 1, ordering="NESTED"), catalog, 1.0
+        )
+    with pytest.raises(PinocchioCatalogError, match="n_workers"):
+        build_lightcone_sparse_stencil_healpix(_compact_mass_map([0], 1), catalog, 1.0, n_workers=0)
+
+
 def test_read_pinocchio_auxiliary_ascii_tables(tmp_path):
     sheets_path = tmp_path / "pinocchio.demo.sheets.out"
     sheets_path.write_text(
@@ -713,15 +1246,35 @@ def _write_new_binary_catalog_file(path, data):
     path.write_bytes(payload)
 
 
-def _write_new_binary_plc_file(path, data):
-    record_length = data.dtype.itemsize
-    payload = b"".join(
-        [
-            np.array([4, record_length, 4], dtype=np.int32).tobytes(),
+_PLC_RECORD_DTYPE = np.dtype(
+    [
+        ("name", np.uint64),
+        ("truez", np.float64),
+        ("pos", np.float64, 3),
+        ("vel", np.float64, 3),
+        ("Mass", np.float64),
+        ("theta", np.float64),
+        ("phi", np.float64),
+        ("vlos", np.float64),
+        ("obsz", np.float64),
+    ]
+)
+
+
+def _write_new_binary_plc_file(path, *blocks):
+    record_length = blocks[0].dtype.itemsize
+    payload = [np.array([4, record_length, 4], dtype=np.int32).tobytes()]
+    for data in blocks:
+        nbytes = np.array([record_length * len(data)], dtype=np.int32).tobytes()
+        payload += [
             np.array([4, len(data), 4], dtype=np.int32).tobytes(),
-            np.array([record_length * len(data)], dtype=np.int32).tobytes(),
+            nbytes,
             data.tobytes(),
-            np.array([record_length * len(data)], dtype=np.int32).tobytes(),
+            nbytes,
         ]
-    )
-    path.write_bytes(payload)
+    path.write_bytes(b"".join(payload))
+
+
+def _write_split_binary_plc(base, blocks_per_file):
+    for index, blocks in enumerate(blocks_per_file):
+        _write_new_binary_plc_file(Path(f"{base}.{index}"), *blocks)
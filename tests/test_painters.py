@@ -3,6 +3,7 @@ import jax.numpy as jnp
 import pytest
 
 from geppetto import (
+    BoxSparseStencil,
     ConcentrationParams,
     Cosmology,
     HaloCatalog,
@@ -10,9 +11,13 @@ from geppetto import (
     LightconeSparseStencil,
     NFWProfileParams,
     TabulatedProjectedProfileParams,
+    box_fft_binning_error,
     density_at_points,
     density_at_points_chunked,
+    one_halo_power_spectrum,
     paint_box_density_grid,
+    paint_box_density_grid_fft,
+    paint_box_density_grid_sparse,
     paint_lightcone_particle_count_map,
     paint_lightcone_particle_count_map_sparse,
     paint_lightcone_particle_count_map_tabulated_sparse,
@@ -22,10 +27,17 @@ from geppetto import (
 )
 from geppetto.io import (
     PinocchioCatalogError,
+    build_box_sparse_stencil,
     build_lightcone_sparse_stencil,
     build_lightcone_sparse_stencil_bruteforce,
+    nfw_support_radius_mpc_h,
+    sort_lightcone_sparse_stencil_by_pixel,
     validate_lightcone_sparse_stencil,
 )
+from geppetto.profiles import (
+    nfw_halo_parameters,
+    nfw_projected_enclosed_mass_from_halo_parameters,
+)
 
 
 def test_density_at_points_shape_and_grad():
@@ -64,6 +76,34 @@ def test_chunked_matches_unchunked():
     assert jnp.allclose(direct, chunked, rtol=1.0e-5, atol=1.0e-5)
 
 
+def test_point_tiled_chunking_matches_unchunked_and_respects_budget():
+    points = jnp.stack([jnp.linspace(40.0, 60.0, 11)] * 3, axis=-1)
+    catalog = HaloCatalog(
+        position=jnp.array([[50.0, 50.0, 50.0], [60.0, 60.0, 60.0], [10.0, 10.0, 10.0]]),
+        mass=jnp.array([1.0e14, 5.0e13, 2.0e13]),
+        redshift=jnp.array([0.0, 0.0, 0.0]),
+    )
+    direct = density_at_points(points, catalog, periodic_box_size=100.0)
+    tiled = density_at_points_chunked(
+        points, catalog, periodic_box_size=100.0, chunk_size=2, point_chunk_size=4
+    )
+    assert jnp.allclose(direct, tiled, rtol=1.0e-5, atol=1.0e-5)
+
+    # Room for two points against all three haloes per tile.
+    budget = 2 * 3 * 12 * 4
+    budgeted = density_at_points_chunked(
+        points, catalog, periodic_box_size=100.0, memory_budget_bytes=budget
+    )
+    assert jnp.allclose(direct, budgeted, rtol=1.0e-5, atol=1.0e-5)
+
+    grid = paint_box_density_grid(catalog, 100.0, 8)
+    grid_budgeted = paint_box_density_grid(catalog, 100.0, 8, memory_budget_bytes=budget)
+    assert jnp.allclose(grid, grid_budgeted, rtol=1.0e-5, atol=1.0e-5)
+
+    with pytest.raises(ValueError, match="memory_budget_bytes"):
+        density_at_points_chunked(points, catalog, memory_budget_bytes=0)
+
+
 def test_paint_box_density_grid_shape():
     catalog = HaloCatalog(
         position=jnp.array([[50.0, 50.0, 50.0]]),
@@ -75,6 +115,146 @@ def test_paint_box_density_grid_shape():
     assert jnp.all(jnp.isfinite(grid))
 
 
+def test_box_fft_painter_conserves_mass_and_is_linear_in_exact_bins():
+    catalog = HaloCatalog(
+        position=jnp.array([[2.0, 5.0, 5.0], [7.0, 6.0, 1.0]]),
+        mass=jnp.array([1.0e15, 3.0e14]),
+        redshift=jnp.array([0.0, 0.2]),
+    )
+    box_size, nmesh = 10.0, 16
+    grid = paint_box_density_grid_fft(catalog, box_size, nmesh, n_mass_bins=2, n_redshift_bins=2)
+    assert grid.shape == (nmesh, nmesh, nmesh)
+    cell_volume = (box_size / nmesh) ** 3
+    assert jnp.allclose(jnp.sum(grid) * cell_volume, jnp.sum(catalog.mass), rtol=1.0e-4)
+
+    # Each halo sits in its own bin, so the result is the sum of single-halo paints.
+    singles = sum(
+        paint_box_density_grid_fft(
+            HaloCatalog(
+                position=catalog.position[i : i + 1],
+                mass=catalog.mass[i : i + 1],
+                redshift=catalog.redshift[i : i + 1],
+            ),
+            box_size,
+            nmesh,
+            n_mass_bins=1,
+        )
+        for i in range(2)
+    )
+    assert jnp.allclose(grid, singles, rtol=1.0e-4, atol=1.0e-5 * jnp.max(grid))
+
+
+def test_box_fft_painter_tracks_direct_painter_and_is_differentiable():
+    catalog = HaloCatalog(
+        position=jnp.array([[5.0, 5.0, 5.0]]),
+        mass=jnp.array([1.0e15]),
+        redshift=jnp.array([0.0]),
+    )
+    errors = box_fft_binning_error(catalog, box_size=10.0, nmesh=48, n_mass_bins=1)
+    assert set(errors) == {"relative_l2_error", "max_abs_error_over_peak", "total_mass_relative_error"}
+    assert errors["relative_l2_error"] < 0.15
+    assert abs(errors["total_mass_relative_error"]) < 0.05
+
+    def objective(amplitude):
+        grid = paint_box_density_grid_fft(
+            catalog, 10.0, 16, concentration_params=ConcentrationParams(amplitude=amplitude)
+        )
+        return jnp.max(grid)
+
+    assert jnp.isfinite(jax.grad(objective)(5.71))
+
+
+def test_one_halo_power_spectrum_matches_painted_grid_and_chunks():
+    catalog = HaloCatalog(
+        position=jnp.array([[5.05, 5.1, 4.9]]),
+        mass=jnp.array([1.0e15]),
+        redshift=jnp.array([0.0]),
+    )
+    box_size, nmesh = 10.0, 32
+    delta = paint_box_density_grid_fft(catalog, box_size, nmesh, n_mass_bins=1, as_delta=True)
+    measured = box_size**3 * jnp.abs(jnp.fft.rfftn(delta)) ** 2 / nmesh**6
+    k_fund = 2.0 * jnp.pi / box_size
+    k = jnp.array([k_fund, 2.0 * k_fund, 3.0 * k_fund])
+    predicted = one_halo_power_spectrum(k, catalog, box_size)
+    assert jnp.allclose(predicted, measured[1:4, 0, 0], rtol=3.0e-2)
+
+    many = HaloCatalog(
+        position=jnp.zeros((5, 3)),
+        mass=jnp.array([1.0e12, 5.0e12, 2.0e13, 1.0e14, 8.0e14]),
+        redshift=jnp.array([0.0, 0.1, 0.3, 0.5, 1.0]),
+    )
+    direct = one_halo_power_spectrum(k, many, 100.0)
+    chunked = one_halo_power_spectrum(k, many, 100.0, chunk_size=2)
+    assert jnp.allclose(direct, chunked, rtol=1.0e-5)
+
+    @jax.jit
+    def objective(amplitude):
+        params = ConcentrationParams(amplitude=amplitude)
+        return jnp.sum(one_halo_power_spectrum(10.0 * k, many, 100.0, concentration_params=params, chunk_size=2))
+
+    assert jnp.isfinite(jax.grad(objective)(5.71))
+
+
+def test_box_sparse_matches_dense_when_stencil_contains_all_pairs():
+    catalog = HaloCatalog(
+        position=jnp.array([[50.0, 50.0, 50.0], [2.0, 97.0, 10.0]]),
+        mass=jnp.array([1.0e14, 5.0e13]),
+        redshift=jnp.array([0.0, 0.0]),
+    )
+    stencil = build_box_sparse_stencil(catalog, box_size=100.0, nmesh=8, rmax_mpc_h=1.0e3)
+    dense = paint_box_density_grid(catalog, box_size=100.0, nmesh=8, periodic=True)
+    sparse = paint_box_density_grid_sparse(stencil, catalog)
+    open_box = build_box_sparse_stencil(
+        catalog, box_size=100.0, nmesh=8, rmax_mpc_h=1.0e3, periodic=False
+    )
+
+    assert stencil.size == 2 * 8**3
+    assert open_box.size == 2 * 8**3
+    assert sparse.shape == (8, 8, 8)
+    assert jnp.allclose(sparse, dense, rtol=1.0e-4)
+    assert jnp.allclose(
+        paint_box_density_grid_sparse(open_box, catalog),
+        paint_box_density_grid(catalog, box_size=100.0, nmesh=8, periodic=False),
+        rtol=1.0e-4,
+    )
+
+
+def test_box_sparse_stencil_keeps_local_periodic_support_and_is_differentiable():
+    catalog = HaloCatalog(
+        position=jnp.array([[0.3, 0.3, 0.3], [12.0, 8.0, 10.0]]),
+        mass=jnp.array([1.0e14, 1.0e13]),
+        redshift=jnp.array([0.0, 0.0]),
+    )
+    rmax = nfw_support_radius_mpc_h(
+        catalog.mass, catalog.redshift, Cosmology(), ConcentrationParams()
+    )
+    stencil = build_box_sparse_stencil(catalog, box_size=20.0, nmesh=32, rmax_mpc_h=rmax)
+
+    assert isinstance(stencil, BoxSparseStencil)
+    assert 0 < stencil.size < 2 * 32**3
+    assert float(jnp.max(stencil.r)) <= float(rmax.max())
+    assert jnp.any(stencil.cell_id == 31 * 32 * 32 + 31 * 32 + 31)
+
+    direct = density_at_points(
+        jnp.array([[0.5 * 20.0 / 32, 0.5 * 20.0 / 32, 0.5 * 20.0 / 32]]),
+        catalog,
+        periodic_box_size=20.0,
+    )
+    grid = jax.jit(paint_box_density_grid_sparse)(stencil, catalog)
+    assert jnp.allclose(grid[0, 0, 0], direct[0], rtol=1.0e-4)
+
+    def objective(amplitude):
+        return jnp.sum(
+            paint_box_density_grid_sparse(
+                stencil,
+                catalog,
+                concentration_params=ConcentrationParams(amplitude=amplitude),
+            )
+        )
+
+    assert jnp.isfinite(jax.grad(objective)(5.71))
+
+
 def test_lightcone_surface_density_shape_and_grad():
     pixel_unit_vectors = jnp.array([[1.0, 0.0, 0.0], [0.999, 0.045, 0.0]])
     pixel_unit_vectors = pixel_unit_vectors / jnp.linalg.norm(pixel_unit_vectors, axis=1)[:, None]
@@ -187,6 +367,53 @@ def test_lightcone_sparse_painter_is_jit_safe():
     assert jnp.allclose(compiled, direct, rtol=1.0e-5, atol=1.0e-5)
 
 
+def test_lightcone_pixel_sorted_stencil_matches_scatter_and_gradients():
+    pixel_unit_vectors = jnp.array(
+        [[1.0, 0.0, 0.0], [0.999, 0.045, 0.0], [0.0, 1.0, 0.0], [0.03, 0.999, 0.0]]
+    )
+    pixel_unit_vectors = pixel_unit_vectors / jnp.linalg.norm(pixel_unit_vectors, axis=1)[:, None]
+    catalog = LightconeHaloCatalog(
+        unit_vector=jnp.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.7071, 0.7071, 0.0]]),
+        chi=jnp.array([1000.0, 1000.0, 900.0]),
+        mass=jnp.array([1.0e14, 5.0e13, 2.0e13]),
+        redshift=jnp.array([0.3, 0.35, 0.32]),
+    )
+    stencil = build_lightcone_sparse_stencil_bruteforce(
+        pixel_unit_vectors, catalog, rmax_mpc_h=1.0e6
+    )
+    sorted_stencil = sort_lightcone_sparse_stencil_by_pixel(stencil)
+    validate_lightcone_sparse_stencil(sorted_stencil, catalog)
+
+    def objective(stencil, amplitude):
+        return paint_lightcone_surface_density_sparse(
+            stencil, catalog, concentration_params=ConcentrationParams(amplitude=amplitude)
+        )
+
+    assert not stencil.is_pixel_sorted
+    assert sorted_stencil.is_pixel_sorted
+    assert sorted_stencil.pix_offsets.tolist() == [0, 3, 6, 9, 12]
+    assert sort_lightcone_sparse_stencil_by_pixel(sorted_stencil) is sorted_stencil
+    assert jnp.allclose(
+        jax.jit(objective)(sorted_stencil, 5.71), objective(stencil, 5.71), rtol=1.0e-5
+    )
+    assert jnp.allclose(
+        jax.jacfwd(objective, argnums=1)(sorted_stencil, 5.71),
+        jax.jacfwd(objective, argnums=1)(stencil, 5.71),
+        rtol=1.0e-5,
+    )
+
+    # The brute-force builder is already pixel-major, so reverse the pairs to unsort them.
+    unsorted_offsets = LightconeSparseStencil(
+        pix_id=stencil.pix_id[::-1],
+        halo_id=stencil.halo_id[::-1],
+        r_perp=stencil.r_perp[::-1],
+        n_pix=stencil.n_pix,
+        pix_offsets=sorted_stencil.pix_offsets,
+    )
+    with pytest.raises(PinocchioCatalogError, match="pix_offsets"):
+        validate_lightcone_sparse_stencil(unsorted_offsets, catalog)
+
+
 def test_lightcone_sparse_gradients_are_finite():
     pixel_unit_vectors = jnp.array([[1.0, 0.0, 0.0], [0.999, 0.045, 0.0]])
     pixel_unit_vectors = pixel_unit_vectors / jnp.linalg.norm(pixel_unit_vectors, axis=1)[:, None]
@@ -320,6 +547,69 @@ def test_validate_lightcone_sparse_stencil_rejects_invalid_inputs():
         )
 
 
+def test_lightcone_sparse_point_deposits_add_enclosed_halo_mass():
+    catalog = LightconeHaloCatalog(
+        unit_vector=jnp.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]),
+        chi=jnp.array([1000.0, 900.0]),
+        mass=jnp.array([1.0e14, 5.0e12]),
+        redshift=jnp.array([0.3, 0.35]),
+    )
+    pairs_only = LightconeSparseStencil(
+        pix_id=jnp.array([0, 1], dtype=jnp.int32),
+        halo_id=jnp.array([0, 0], dtype=jnp.int32),
+        r_perp=jnp.array([0.0, 0.4]),
+        n_pix=3,
+    )
+    stencil = LightconeSparseStencil(
+        pix_id=pairs_only.pix_id,
+        halo_id=pairs_only.halo_id,
+        r_perp=pairs_only.r_perp,
+        n_pix=3,
+        point_pix_id=jnp.array([2], dtype=jnp.int32),
+        point_halo_id=jnp.array([1], dtype=jnp.int32),
+    )
+    validate_lightcone_sparse_stencil(stencil, catalog)
+    pixel_area_sr = 1.0e-6
+    halo = nfw_halo_parameters(
+        catalog.mass, catalog.redshift, Cosmology(), ConcentrationParams(), NFWProfileParams()
+    )
+    enclosed = nfw_projected_enclosed_mass_from_halo_parameters(halo)[1]
+
+    base = paint_lightcone_surface_density_sparse(
+        pairs_only, catalog, pixel_area_sr=pixel_area_sr, return_mass_per_pixel=True
+    )
+    mass = paint_lightcone_surface_density_sparse(
+        stencil, catalog, pixel_area_sr=pixel_area_sr, return_mass_per_pixel=True
+    )
+    sigma = paint_lightcone_surface_density_sparse(stencil, catalog, pixel_area_sr=pixel_area_sr)
+    tabulated = paint_lightcone_surface_density_tabulated_sparse(
+        stencil,
+        catalog,
+        jnp.array([1.0, 1.0]),
+        TabulatedProjectedProfileParams(x=jnp.linspace(0.0, 1.0, 8), log_shape=jnp.zeros(8)),
+        pixel_area_sr=pixel_area_sr,
+        return_mass_per_pixel=True,
+    )
+
+    assert jnp.allclose(mass[:2], base[:2])
+    assert jnp.allclose(mass[2], enclosed, rtol=1.0e-6)
+    assert catalog.mass[1] < enclosed < 1.5 * catalog.mass[1]
+    assert jnp.allclose(sigma[2], enclosed / (900.0**2 * pixel_area_sr), rtol=1.0e-6)
+    assert jnp.allclose(tabulated[2], catalog.mass[1], rtol=1.0e-6)
+    with pytest.raises(ValueError, match="point deposits"):
+        paint_lightcone_surface_density_sparse(stencil, catalog)
+
+    def concentration_objective(amplitude):
+        return paint_lightcone_surface_density_sparse(
+            stencil,
+            catalog,
+            concentration_params=ConcentrationParams(amplitude=amplitude),
+            pixel_area_sr=pixel_area_sr,
+        )[2]
+
+    assert jnp.isfinite(jax.grad(concentration_objective)(5.71))
+
+
 def test_lightcone_tabulated_sparse_shape_mass_and_counts():
     pixel_unit_vectors = jnp.array(
         [[1.0, 0.0, 0.0], [0.999, 0.045, 0.0], [0.0, 1.0, 0.0]]
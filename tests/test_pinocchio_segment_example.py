@@ -4,6 +4,7 @@ import csv
 import importlib.util
 import subprocess
 import sys
+import threading
 from pathlib import Path
 from types import SimpleNamespace
 
@@ -137,8 +138,21 @@ def _workflow_args(**overrides) -> SimpleNamespace:
         "truncation_width_fraction": 0.05,
         "nfw_chunk_size": 1,
         "nfw_taper_radius_factor": 10.0,
+        "nfw_rmax_policy": "fixed",
+        "nfw_rmax_mass_tolerance": 1.0e-3,
+        "nfw_projected_kernel": "analytic",
         "nfw_dense_demo": False,
         "stencil_query_mode": "inclusive",
+        "stencil_workers": 1,
+        "stencil_cache_dir": None,
+        "stencil_layout": "halo",
+        "stencil_bucket_growth": None,
+        "stencil_subpixel_threshold": None,
+        "global_stencil": False,
+        "prefetch_depth": 0,
+        "workers": 1,
+        "jax_cache_dir": None,
+        "resume": False,
         "stencil_diagnostics": False,
         "stencil_compare_query_modes": False,
     }
@@ -146,6 +160,37 @@ def _workflow_args(**overrides) -> SimpleNamespace:
     return SimpleNamespace(**values)
 
 
+def _two_segment_workflow_case(tmp_path: Path, seed: int):
+    """Return a seeded 12-halo catalogue and two nested ``nside=2`` segment maps.
+
+    Empty ``run.massmap.seg00{0,1}.fits`` stubs are touched in ``tmp_path`` for
+    the workflow glob; ``read_mass_map`` serves the in-memory maps by path.
+    """
+
+    nside = 2
+    rng = np.random.default_rng(seed)
+    pixels = rng.permutation(12 * nside * nside)
+    unit_vector = rng.normal(size=(12, 3))
+    unit_vector /= np.linalg.norm(unit_vector, axis=1, keepdims=True)
+    catalog = _catalog(
+        unit_vector=unit_vector,
+        redshift=rng.uniform(0.1, 0.5, 12),
+        chi=rng.uniform(2.0, 4.0, 12),
+        mass=np.full(12, 1.0e14),
+    )
+    mass_maps = {
+        "seg000": _mass_map(pixels, nside=nside),
+        "seg001": _mass_map(pixels[:30], nside=nside),
+    }
+    for name in mass_maps:
+        (tmp_path / f"run.massmap.{name}.fits").touch()
+
+    def read_mass_map(path: Path) -> PinocchioMassMap:
+        return mass_maps[path.name.split(".")[-2]]
+
+    return catalog, mass_maps, read_mass_map
+
+
 def test_example_script_help_runs():
     result = subprocess.run(
         [sys.executable, str(EXAMPLE_PATH), "--help"],
@@ -655,10 +700,47 @@ def test_run_calibration_for_segment_saves_stencil_diagnostics(tmp_path, monkeyp
         assert "stencil_kept_over_query" in data
         assert "stencil_kept_over_inside" in data
         assert "stencil_build_seconds" in data
+        assert "stencil_worker_seconds" in data
+        assert "stencil_worker_load_imbalance" in data
         assert int(data["stencil_query_pixels_total"]) >= int(data["stencil_inside_domain_total"])
         assert int(data["stencil_inside_domain_total"]) >= int(data["stencil_kept_pairs_total"])
 
 
+def test_run_calibration_for_segment_compares_fixed_and_adaptive_rmax(tmp_path, monkeypatch):
+    pytest.importorskip("healpy")
+    module = _load_example_module()
+    catalog, _, mass_map, _ = _single_pixel_pipeline_case()
+    metadata = SimpleNamespace(particle_mass_msun_h=1.0e10, cosmology=Cosmology())
+    output_npz = tmp_path / "painted_nfw.seg000.npz"
+    monkeypatch.setattr(
+        module,
+        "read_pinocchio_mass_map_fits",
+        lambda path: mass_map,
+    )
+
+    module.run_calibration_for_segment(
+        segment_index=0,
+        mass_map_path=tmp_path / "pinocchio.example.massmap.seg000.fits",
+        output_npz=output_npz,
+        output_fits=None,
+        catalog=catalog,
+        sheets=_sheets(),
+        metadata=metadata,
+        particle_mass=metadata.particle_mass_msun_h,
+        args=_workflow_args(stencil_diagnostics=True, nfw_rmax_policy="adaptive"),
+        profile=False,
+        compute_map_derivatives=False,
+        inclusive_upper=False,
+    )
+
+    with np.load(output_npz) as data:
+        assert str(data["nfw_rmax_policy"]) == "adaptive"
+        assert float(data["rmax_adaptive_mean_mpc_h"]) < float(data["rmax_fixed_mean_mpc_h"])
+        assert int(data["rmax_adaptive_pairs_total"]) <= int(data["rmax_fixed_pairs_total"])
+        assert float(data["rmax_relative_sum_difference"]) < 5.0e-2
+        assert "rmax_adaptive_sum_particle_counts" in data
+
+
 def test_run_calibration_for_segment_saves_query_mode_comparison(tmp_path, monkeypatch):
     pytest.importorskip("healpy")
     module = _load_example_module()
@@ -942,6 +1024,133 @@ def test_concentration_map_derivative_sum_matches_internal_scalar_gradient():
     )
 
 
+def test_bucketed_concentration_derivatives_match_and_reuse_compiled_shapes():
+    module = _load_example_module()
+    metadata = SimpleNamespace(cosmology=Cosmology())
+    kwargs = {
+        "particle_mass_msun_h": 1.0e10,
+        "concentration_amplitude": 5.71,
+        "concentration_mass_slope": -0.084,
+        "concentration_redshift_slope": -0.47,
+        "concentration_mass_pivot": 2.0e12,
+        "truncation_width_fraction": 0.05,
+    }
+    policy = module.StencilBucketPolicy(min_pairs=16, min_pixels=8, min_halos=4)
+
+    def segment(n_pix, n_halo):
+        catalog = _catalog(
+            unit_vector=np.tile([[1.0, 0.0, 0.0]], (n_halo, 1)),
+            mass=np.geomspace(1.0e12, 1.0e14, n_halo),
+            redshift=np.linspace(0.1, 0.3, n_halo),
+            chi=np.linspace(500.0, 900.0, n_halo),
+        )
+        pix_id, halo_id = np.meshgrid(np.arange(n_pix), np.arange(n_halo))
+        stencil = LightconeSparseStencil(
+            pix_id=jnp.asarray(pix_id.ravel(), dtype=jnp.int32),
+            halo_id=jnp.asarray(halo_id.ravel(), dtype=jnp.int32),
+            r_perp=jnp.asarray(np.linspace(0.0, 2.0, n_pix * n_halo)),
+            n_pix=n_pix,
+        )
+        return stencil, catalog, _mass_map(np.arange(n_pix), nside=1)
+
+    for n_pix, n_halo in [(5, 2), (4, 3)]:
+        stencil, catalog, mass_map = segment(n_pix, n_halo)
+        misses = module.COMPILED_KERNELS.misses
+        hits = module.COMPILED_KERNELS.hits
+        exact = module.nfw_concentration_map_derivatives(
+            stencil, catalog, mass_map, metadata, **kwargs
+        )
+        bucketed = module.nfw_concentration_map_derivatives(
+            stencil, catalog, mass_map, metadata, bucket_policy=policy, **kwargs
+        )
+        for key in (
+            "d_nfw_particle_counts_d_concentration_amplitude",
+            "d_nfw_particle_counts_d_concentration_mass_slope",
+            "d_nfw_particle_counts_d_concentration_redshift_slope",
+        ):
+            assert bucketed[key].shape == (n_pix,)
+            np.testing.assert_allclose(bucketed[key], exact[key], rtol=1.0e-5, atol=1.0e-12)
+
+    # The exact-shape calls miss for both segments; the bucketed second segment
+    # shares (16 pairs, 8 pixels, 4 halos) with the first and hits.
+    assert module.COMPILED_KERNELS.misses == misses + 1
+    assert module.COMPILED_KERNELS.hits == hits + 1
+
+
+def test_accumulate_lightcone_particle_count_map_chunks_match_single_shot(tmp_path):
+    hp = pytest.importorskip("healpy")
+    module = _load_example_module()
+    nside = 4
+    halo_pixels = np.array([0, 1, 2, 3, 5, 6], dtype=np.int64)
+    catalog = _catalog(
+        unit_vector=np.stack(hp.pix2vec(nside, halo_pixels), axis=-1),
+        mass=np.geomspace(1.0e12, 1.0e14, halo_pixels.size),
+        redshift=np.linspace(0.1, 0.3, halo_pixels.size),
+        chi=np.linspace(300.0, 900.0, halo_pixels.size),
+    )
+    mass_map = _mass_map(np.arange(12, dtype=np.int64), nside=nside)
+    kwargs = {
+        "metadata": SimpleNamespace(cosmology=Cosmology()),
+        "particle_mass_msun_h": 1.0e10,
+        "concentration_params": module.ConcentrationParams(amplitude=5.71),
+        "profile_params": module.NFWProfileParams(truncation_width_fraction=0.05),
+        "compute_map_derivatives": True,
+    }
+    chunks = [
+        module.selected_lightcone_catalog(catalog, np.arange(halo_pixels.size) // 2 == i)
+        for i in range(3)
+    ]
+
+    # Chunks are float32 jnp catalogues, so the reference goes through the same selection.
+    reference = module.selected_lightcone_catalog(catalog, np.ones(halo_pixels.size, dtype=bool))
+    single = module.accumulate_lightcone_particle_count_map([reference], mass_map, **kwargs)
+    chunked = module.accumulate_lightcone_particle_count_map(
+        iter(chunks), mass_map, accumulator_path=tmp_path / "accumulator.npy", **kwargs
+    )
+
+    assert single["nfw_chunk_count"] == 1
+    assert chunked["nfw_chunk_count"] == 3
+    assert chunked["nfw_selected_halo_count"] == halo_pixels.size
+    assert chunked["nfw_sparse_pair_count"] == single["nfw_sparse_pair_count"]
+    assert chunked["nfw_sum_particle_counts"] > 0.0
+    stored = np.load(tmp_path / "accumulator.npy")
+    assert stored.shape == (4, 12)
+    for row, name in enumerate(("amplitude", "mass_slope", "redshift_slope"), start=1):
+        key = f"d_nfw_particle_counts_d_concentration_{name}"
+        np.testing.assert_allclose(chunked[key], single[key], rtol=1.0e-5, atol=1.0e-12)
+        np.testing.assert_array_equal(stored[row], chunked[key])
+    np.testing.assert_allclose(
+        chunked["nfw_particle_counts"], single["nfw_particle_counts"], rtol=1.0e-5
+    )
+    np.testing.assert_array_equal(stored[0], chunked["nfw_particle_counts"])
+
+
+def test_iter_segment_lightcone_chunks_streams_selected_haloes(tmp_path):
+    module = _load_example_module()
+    plc = tmp_path / "pinocchio.demo.plc.out"
+    plc.write_text(
+        "".join(
+            f"{i + 1} {z:.2f} {100.0 * (i + 1)} 0 0 0 0 0 1.0e13 0.0 {10.0 * i} 0 {z:.2f}\n"
+            for i, z in enumerate([0.05, 0.10, 0.15, 0.20, 0.25, 0.30])
+        ),
+        encoding="utf-8",
+    )
+    args = _workflow_args(
+        plc_catalog=plc, light_plc=False, catalog_format="ascii", redshift_mode="true"
+    )
+    bounds = {"z_lo": 0.10, "z_hi": 0.25, "chi_lo_mpc_h": 0.0, "chi_hi_mpc_h": 1.0e4}
+
+    chunks = list(module.iter_segment_lightcone_chunks(args, bounds, False, 2))
+    inclusive = list(module.iter_segment_lightcone_chunks(args, bounds, True, 2))
+
+    assert all(chunk.size <= 2 for chunk in chunks)
+    redshift = np.concatenate([np.asarray(chunk.redshift) for chunk in chunks])
+    np.testing.assert_allclose(redshift, [0.10, 0.15, 0.20], rtol=1.0e-6)
+    assert sum(chunk.size for chunk in inclusive) == 4
+    with pytest.raises(ValueError, match="full PLC"):
+        next(module.iter_segment_lightcone_chunks(_workflow_args(light_plc=True), bounds, False, 2))
+
+
 def test_nfw_map_concentration_derivatives_are_sparse_only():
     module = _load_example_module()
     catalog = _catalog(
@@ -989,6 +1198,54 @@ def test_nfw_map_concentration_derivative_profile_labels(capsys):
     assert "NFW map concentration derivatives to numpy" in captured.out
 
 
+def test_nfw_pipeline_prewarms_executables_and_reports_compile_separately(capsys):
+    module = _load_example_module()
+    catalog, mask, mass_map, metadata = _single_pixel_pipeline_case()
+    kwargs = {
+        "particle_mass_msun_h": 1.0e10,
+        "pipeline_mode": "derivatives-profile",
+        "compute_map_derivatives": True,
+        "profile": True,
+        "concentration_amplitude": 4.321,
+    }
+
+    first = module.run_nfw_calibration_pipeline(catalog, mask, mass_map, metadata, **kwargs)
+    first_out = capsys.readouterr().out
+    hits = module.COMPILED_KERNELS.hits
+    misses = module.COMPILED_KERNELS.misses
+    second = module.run_nfw_calibration_pipeline(catalog, mask, mass_map, metadata, **kwargs)
+    second_out = capsys.readouterr().out
+
+    assert "NFW particle map compile" in first_out
+    assert "NFW map concentration JVPs compile" in first_out
+    assert first_out.index("NFW map concentration JVPs compile") < first_out.index(
+        "[profile] NFW particle map  "
+    )
+    assert "compile" not in second_out.replace("compile cache", "")
+    assert module.COMPILED_KERNELS.misses == misses
+    assert module.COMPILED_KERNELS.hits == hits + 3
+    np.testing.assert_array_equal(first["nfw_particle_counts"], second["nfw_particle_counts"])
+
+
+def test_enable_persistent_compilation_cache_sets_jax_cache_dir(tmp_path):
+    module = _load_example_module()
+    options = (
+        "jax_compilation_cache_dir",
+        "jax_persistent_cache_min_compile_time_secs",
+        "jax_persistent_cache_min_entry_size_bytes",
+    )
+    previous = {
+        option: getattr(jax.config, option) for option in options if hasattr(jax.config, option)
+    }
+    try:
+        module.enable_persistent_compilation_cache(tmp_path / "xla")
+        assert jax.config.jax_compilation_cache_dir == str(tmp_path / "xla")
+        assert (tmp_path / "xla").is_dir()
+    finally:
+        for option, value in previous.items():
+            jax.config.update(option, value)
+
+
 def test_run_nfw_calibration_pipeline_paint_mode_outputs_map_without_derivatives():
     module = _load_example_module()
     catalog, mask, mass_map, metadata = _single_pixel_pipeline_case()
@@ -1185,7 +1442,269 @@ def test_run_segment_workflow_all_segments_names_outputs_and_sets_inclusive_boun
     assert calls[1]["output_npz"] == output_dir / "painted_nfw.seg001.npz"
     assert calls[1]["output_fits"] == output_dir / "painted_nfw.seg001.fits"
     assert manifest_calls[0][0] == output_dir / "painted_nfw_manifest.csv"
-    assert rows == manifest_calls[0][1]
+    assert [row["segment_index"] for row in manifest_calls[0][1]] == [0]
+    assert rows == manifest_calls[-1][1]
+
+
+def test_run_segment_workflow_resume_repaints_only_stale_segments(tmp_path, monkeypatch):
+    module = _load_example_module()
+    for name in ("seg000", "seg001"):
+        (tmp_path / f"run.massmap.{name}.fits").write_bytes(name.encode())
+    output_dir = tmp_path / "painted"
+    calls = []
+
+    def fake_segment_runner(**kwargs):
+        calls.append(kwargs["segment_index"])
+        kwargs["output_npz"].write_bytes(b"npz")
+        return {
+            "segment_index": kwargs["segment_index"],
+            "mass_map_path": str(kwargs["mass_map_path"]),
+            "output_npz": str(kwargs["output_npz"]),
+        }
+
+    monkeypatch.setattr(module, "run_calibration_for_segment", fake_segment_runner)
+
+    def run(**overrides):
+        calls.clear()
+        module.run_segment_workflow(
+            _workflow_args(
+                mass_map=None,
+                sheet_index=None,
+                output=None,
+                mass_map_glob=str(tmp_path / "*.fits"),
+                output_dir=output_dir,
+                resume=True,
+                **overrides,
+            ),
+            workflow="all",
+            catalog=_catalog(),
+            sheets=_sheets(),
+            metadata=SimpleNamespace(particle_mass_msun_h=1.0, cosmology=Cosmology()),
+            particle_mass=1.0,
+            profile=False,
+            compute_map_derivatives=False,
+        )
+        return list(calls)
+
+    assert run() == [0, 1]
+    assert run() == []
+    (tmp_path / "run.massmap.seg001.fits").write_bytes(b"changed")
+    assert run() == [1]
+    (output_dir / "painted_nfw.seg000.npz").unlink()
+    assert run() == [0]
+    assert run(concentration_amplitude=5.0) == [0, 1]
+    assert run(concentration_amplitude=5.0, prefetch_depth=1, stencil_workers=2) == []
+
+    with (output_dir / "painted_nfw_manifest.csv").open() as handle:
+        rows = list(csv.DictReader(handle))
+    assert [row["segment_index"] for row in rows] == ["0", "1"]
+    assert rows[0]["mass_map_sha256"] != rows[1]["mass_map_sha256"]
+    assert rows[0]["parameters_sha256"] == rows[1]["parameters_sha256"]
+    assert rows[0]["code_version"].startswith(module.geppetto_version)
+    assert not list(output_dir.glob(".*.tmp"))
+    with pytest.raises(ValueError, match="all-segments"):
+        module.validate_segment_workflow_args(_workflow_args(resume=True))
+
+
+def test_run_segment_workflow_global_stencil_matches_per_segment_maps(tmp_path, monkeypatch):
+    pytest.importorskip("healpy")
+    pytest.importorskip("astropy.io.fits")
+    module = _load_example_module()
+    catalog, _, read_mass_map = _two_segment_workflow_case(tmp_path, seed=16)
+    monkeypatch.setattr(module, "read_pinocchio_mass_map_fits", read_mass_map)
+    metadata = SimpleNamespace(particle_mass_msun_h=1.0e10, cosmology=Cosmology())
+
+    outputs = {}
+    for global_stencil in (False, True):
+        output_dir = tmp_path / f"painted_global{int(global_stencil)}"
+        module.run_segment_workflow(
+            _workflow_args(
+                mass_map=None,
+                sheet_index=None,
+                output=None,
+                mass_map_glob=str(tmp_path / "*.fits"),
+                output_dir=output_dir,
+                stencil_query_mode="ring",
+                global_stencil=global_stencil,
+            ),
+            workflow="all",
+            catalog=catalog,
+            sheets=_sheets(),
+            metadata=metadata,
+            particle_mass=1.0e10,
+            profile=False,
+            compute_map_derivatives=False,
+        )
+        outputs[global_stencil] = []
+        for segment in (0, 1):
+            with np.load(output_dir / f"painted_nfw.seg{segment:03d}.npz") as data:
+                outputs[global_stencil].append(
+                    (
+                        data["nfw_particle_counts"],
+                        int(data["nfw_selected_halo_count"]),
+                        str(data["nfw_paint_mode"]),
+                    )
+                )
+
+    for (counts, n_halo, _), (global_counts, global_n_halo, mode) in zip(
+        outputs[False], outputs[True], strict=True
+    ):
+        assert mode == "sparse-global"
+        assert global_n_halo == n_halo
+        np.testing.assert_allclose(global_counts, counts, rtol=1.0e-5, atol=1.0e-6)
+    assert np.sum(outputs[True][0][0]) > 0.0
+    with pytest.raises(ValueError, match="all-segments"):
+        module.validate_segment_workflow_args(_workflow_args(global_stencil=True))
+    all_segments = {
+        "mass_map": None,
+        "sheet_index": None,
+        "output": None,
+        "mass_map_glob": str(tmp_path / "*.fits"),
+        "output_dir": tmp_path,
+        "global_stencil": True,
+    }
+    for overrides in ({"stencil_diagnostics": True}, {"stencil_query_mode": "inclusive"}):
+        with pytest.raises(ValueError, match="ring stencil"):
+            module.validate_segment_workflow_args(_workflow_args(**all_segments, **overrides))
+    assert (
+        module.validate_segment_workflow_args(
+            _workflow_args(**all_segments, stencil_query_mode="ring")
+        )
+        == "all"
+    )
+
+
+def test_run_segment_workflow_prefetch_pipeline_matches_serial_outputs(tmp_path, monkeypatch):
+    pytest.importorskip("healpy")
+    pytest.importorskip("astropy.io.fits")
+    module = _load_example_module()
+    catalog, _, read_mass_map = _two_segment_workflow_case(tmp_path, seed=17)
+    read_threads = []
+
+    def fake_read(path):
+        read_threads.append(threading.current_thread().name)
+        return read_mass_map(path)
+
+    monkeypatch.setattr(module, "read_pinocchio_mass_map_fits", fake_read)
+    metadata = SimpleNamespace(particle_mass_msun_h=1.0e10, cosmology=Cosmology())
+
+    outputs = {}
+    for prefetch_depth in (0, 2):
+        read_threads.clear()
+        output_dir = tmp_path / f"painted_prefetch{prefetch_depth}"
+        module.run_segment_workflow(
+            _workflow_args(
+                mass_map=None,
+                sheet_index=None,
+                output=None,
+                mass_map_glob=str(tmp_path / "*.fits"),
+                output_dir=output_dir,
+                prefetch_depth=prefetch_depth,
+            ),
+            workflow="all",
+            catalog=catalog,
+            sheets=_sheets(),
+            metadata=metadata,
+            particle_mass=1.0e10,
+            profile=False,
+            compute_map_derivatives=False,
+        )
+        assert len(read_threads) == 2
+        if prefetch_depth:
+            assert all(name.startswith("segment-read") for name in read_threads)
+        outputs[prefetch_depth] = []
+        for segment in (0, 1):
+            with np.load(output_dir / f"painted_nfw.seg{segment:03d}.npz") as data:
+                outputs[prefetch_depth].append(np.asarray(data["nfw_particle_counts"]))
+
+    for serial, pipelined in zip(outputs[0], outputs[2], strict=True):
+        np.testing.assert_array_equal(pipelined, serial)
+    with pytest.raises(ValueError, match="prefetch-depth"):
+        module.validate_segment_workflow_args(_workflow_args(prefetch_depth=-1))
+
+
+def test_shared_lightcone_catalog_roundtrip_is_read_only():
+    module = _load_example_module()
+    catalog = _catalog()
+    handles, specs = module.share_lightcone_catalog(catalog)
+    try:
+        attached_handles, attached = module.attach_lightcone_catalog(specs)
+        for field in LightconeHaloCatalog._fields:
+            column = getattr(attached, field)
+            np.testing.assert_array_equal(column, getattr(catalog, field))
+            assert not column.flags.writeable
+        del attached, column
+        for handle in attached_handles:
+            handle.close()
+    finally:
+        for handle in handles:
+            handle.close()
+            handle.unlink()
+
+    cpu_sets = module.segment_worker_cpu_sets(2)
+    assert len(cpu_sets) == 2
+    assert not set(cpu_sets[0]) & set(cpu_sets[1])
+
+
+def test_run_segment_workflow_workers_match_serial_manifest(tmp_path, monkeypatch):
+    pytest.importorskip("healpy")
+    fits = pytest.importorskip("astropy.io.fits")
+    module = _load_example_module()
+    # Spawned workers import the example module by name from the parent's sys.path.
+    monkeypatch.syspath_prepend(str(EXAMPLE_PATH.parent))
+    catalog, mass_maps, _ = _two_segment_workflow_case(tmp_path, seed=18)
+    # Workers cannot see a monkeypatched reader, so replace the stubs with real FITS maps.
+    for name, mass_map in mass_maps.items():
+        table = fits.BinTableHDU.from_columns(
+            [
+                fits.Column(name="PIXEL", format="1J", array=mass_map.pixel.astype(np.int32)),
+                fits.Column(
+                    name="TEMPERATURE",
+                    format="1D",
+                    array=np.ones(mass_map.pixel.size, dtype=np.float64),
+                ),
+            ],
+            name="HEALPIX",
+        )
+        table.header["ORDERING"] = "RING"
+        table.header["NSIDE"] = mass_map.nside
+        table.header["INDXSCHM"] = "EXPLICIT"
+        fits.HDUList([fits.PrimaryHDU(), table]).writeto(
+            tmp_path / f"run.massmap.{name}.fits", overwrite=True
+        )
+    metadata = SimpleNamespace(particle_mass_msun_h=1.0e10, cosmology=Cosmology())
+
+    manifests = {}
+    for workers in (1, 2):
+        output_dir = tmp_path / f"painted_workers{workers}"
+        module.run_segment_workflow(
+            _workflow_args(
+                mass_map=None,
+                sheet_index=None,
+                output=None,
+                mass_map_glob=str(tmp_path / "*.fits"),
+                output_dir=output_dir,
+                workers=workers,
+            ),
+            workflow="all",
+            catalog=catalog,
+            sheets=_sheets(),
+            metadata=metadata,
+            particle_mass=1.0e10,
+            profile=False,
+            compute_map_derivatives=False,
+        )
+        with (output_dir / "painted_nfw_manifest.csv").open() as handle:
+            manifests[workers] = list(csv.DictReader(handle))
+
+    assert [row["segment_index"] for row in manifests[2]] == ["0", "1"]
+    for serial, parallel in zip(manifests[1], manifests[2], strict=True):
+        assert parallel["nfw_sparse_pair_count"] == serial["nfw_sparse_pair_count"]
+        assert float(parallel["nfw_sum_particle_counts"]) == pytest.approx(
+            float(serial["nfw_sum_particle_counts"])
+        )
+    with pytest.raises(ValueError, match="all-segments"):
+        module.validate_segment_workflow_args(_workflow_args(workers=2))
 
 
 def test_run_segment_workflow_single_segment_uses_last_segment_flag(monkeypatch):
@@ -1352,6 +1871,44 @@ def test_center_query_mode_has_no_more_query_pixels_than_inclusive():
     assert center_diag.n_query_pixels_total <= inclusive_diag.n_query_pixels_total
 
 
+def test_ring_query_mode_matches_inclusive_local_builder():
+    hp = pytest.importorskip("healpy")
+    module = _load_example_module()
+
+    nside = 8
+    pixels = np.arange(0, 12 * nside * nside, 3, dtype=np.int64)
+    unit_vector = np.stack(hp.pix2vec(nside, np.array([0, 100, 401, 700])), axis=-1)
+    catalog = _catalog(
+        unit_vector=unit_vector,
+        mass=np.array([1.0e13, 2.0e13, 3.0e13, 4.0e13]),
+        redshift=np.array([0.2, 0.25, 0.3, 0.35]),
+        chi=np.array([100.0, 120.0, 140.0, 160.0]),
+    )
+    mass_map = _mass_map(pixels, temperature=np.zeros(pixels.shape[0]), nside=nside)
+    rmax = np.array([20.0, 30.0, 15.0, 40.0])
+
+    ring, ring_diag = module.build_lightcone_sparse_stencil_healpix(
+        mass_map, catalog, rmax, collect_diagnostics=True
+    )
+    inclusive = module.build_lightcone_sparse_stencil_for_mass_map_local(
+        mass_map, catalog, rmax, query_mode="inclusive"
+    )
+
+    def pairs(stencil):
+        return sorted(
+            zip(
+                np.asarray(stencil.halo_id).tolist(),
+                np.asarray(stencil.pix_id).tolist(),
+                strict=True,
+            )
+        )
+
+    assert ring.size > 0
+    assert pairs(ring) == pairs(inclusive)
+    assert isinstance(ring_diag, module.StencilBuildDiagnostics)
+    assert ring_diag.query_mode == "ring"
+
+
 def test_inclusive_and_center_maps_are_finite_and_match_when_pairs_match():
     hp = pytest.importorskip("healpy")
     module = _load_example_module()
@@ -1,13 +1,23 @@
 import jax
 import jax.numpy as jnp
+import numpy as np
+import pytest
 
 from geppetto.concentration import ConcentrationParams, concentration_power_law, duffy08_all_200c
 from geppetto.cosmology import Cosmology
 from geppetto.profiles import (
     NFWProfileParams,
     TabulatedProjectedProfileParams,
+    _projected_nfw_kernel_lookup,
+    _projected_nfw_kernel_numpy,
     nfw_density,
+    nfw_density_from_halo_parameters,
+    nfw_fourier_transform,
+    nfw_halo_parameters,
+    nfw_projected_enclosed_mass_from_halo_parameters,
     nfw_projected_surface_density,
+    nfw_projected_surface_density_from_halo_parameters,
+    nfw_scale_radius_and_density,
     tabulated_projected_surface_density,
 )
 
@@ -51,6 +61,102 @@ def test_projected_nfw_surface_density_is_finite():
     assert jnp.all(jnp.isfinite(sigma))
 
 
+def test_gathered_halo_parameters_match_per_pair_profiles():
+    mass = jnp.array([1.0e13, 1.0e14, 5.0e14])
+    redshift = jnp.array([0.1, 0.3, 0.8])
+    halo_id = jnp.array([0, 0, 1, 2, 2, 2])
+    r = jnp.array([0.01, 0.3, 0.2, 0.05, 0.9, 2.5])
+    params = duffy08_all_200c()
+    profile = NFWProfileParams(truncation_width_fraction=0.1)
+
+    halo = nfw_halo_parameters(mass, redshift, Cosmology(), params, profile)
+    pair_halo = type(halo)(*(field[halo_id] for field in halo))
+    sigma = nfw_projected_surface_density_from_halo_parameters(r, pair_halo, profile)
+    rho = nfw_density_from_halo_parameters(r, pair_halo, profile)
+
+    expected_sigma = nfw_projected_surface_density(
+        r, mass[halo_id], redshift[halo_id], Cosmology(), params, profile
+    )
+    expected_rho = nfw_density(r, mass[halo_id], redshift[halo_id], Cosmology(), params, profile)
+    assert jnp.allclose(sigma, expected_sigma, rtol=1.0e-6)
+    assert jnp.allclose(rho, expected_rho, rtol=1.0e-6)
+
+
+def test_projected_enclosed_mass_matches_hard_truncated_surface_density_integral():
+    mass = jnp.array([1.0e12, 1.0e14])
+    redshift = jnp.array([0.2, 1.0])
+    profile = NFWProfileParams(smooth_truncation=False, r_softening_fraction=0.0)
+    halo = nfw_halo_parameters(mass, redshift, Cosmology(), duffy08_all_200c(), profile)
+
+    enclosed = nfw_projected_enclosed_mass_from_halo_parameters(halo)
+    for i in range(2):
+        # Integrate 2 pi R Sigma(R) on a log grid up to just inside r_delta.
+        log_r = np.linspace(
+            np.log(1.0e-6 * float(halo.r_s[i])), np.log(0.999999 * float(halo.r_delta[i])), 20001
+        )
+        r = np.exp(log_r)
+        single = type(halo)(*(field[i] for field in halo))
+        sigma = np.asarray(
+            nfw_projected_surface_density_from_halo_parameters(jnp.asarray(r), single, profile),
+            dtype=np.float64,
+        )
+        integrand = 2.0 * np.pi * r * r * sigma
+        integral = np.sum(0.5 * (integrand[1:] + integrand[:-1]) * np.diff(log_r))
+        np.testing.assert_allclose(float(enclosed[i]), integral, rtol=2.0e-3)
+
+
+def test_tabulated_projected_kernel_mode_matches_closed_form():
+    r_perp = jnp.logspace(-4.0, 1.0, 200)
+    mass = jnp.array(1.0e14)
+    redshift = jnp.array(0.3)
+    params = duffy08_all_200c()
+    analytic = nfw_projected_surface_density(r_perp, mass, redshift, Cosmology(), params)
+    table_profile = NFWProfileParams(projected_kernel="table")
+    table = nfw_projected_surface_density(r_perp, mass, redshift, Cosmology(), params, table_profile)
+    assert jnp.allclose(table, analytic, rtol=1.0e-4)
+
+    x = np.logspace(-8.0, 6.0, 2001)
+    reference, _ = _projected_nfw_kernel_numpy(x)
+    lookup = np.asarray(_projected_nfw_kernel_lookup(jnp.asarray(x, dtype=jnp.float32)))
+    assert np.max(np.abs(lookup / reference - 1.0)) < 1.0e-5
+
+    def total(amplitude, profile):
+        concentration = ConcentrationParams(amplitude=amplitude)
+        return jnp.sum(nfw_projected_surface_density(r_perp, mass, redshift, Cosmology(), concentration, profile))
+
+    grad_table = jax.grad(total)(5.71, table_profile)
+    grad_analytic = jax.grad(total)(5.71, NFWProfileParams())
+    assert jnp.allclose(grad_table, grad_analytic, rtol=1.0e-4)
+
+    with pytest.raises(ValueError, match="projected_kernel"):
+        nfw_projected_surface_density(
+            r_perp, mass, redshift, Cosmology(), params, NFWProfileParams(projected_kernel="spline")
+        )
+
+
+def test_nfw_fourier_transform_matches_truncated_profile_integral():
+    mass = jnp.array(1.0e14)
+    redshift = jnp.array(0.3)
+    r_delta, _, r_s, rho_s = (
+        float(v) for v in nfw_scale_radius_and_density(mass, redshift, Cosmology(), duffy08_all_200c())
+    )
+    r = np.linspace(1.0e-7, r_delta, 200001)
+    rho = rho_s / ((r / r_s) * (1.0 + r / r_s) ** 2)
+    k = np.array([0.0, 0.5, 5.0, 20.0, 100.0])
+    expected = []
+    for k_i in k:
+        integrand = r**2 * rho * np.sinc(k_i * r / np.pi)
+        integral = np.sum(0.5 * (integrand[1:] + integrand[:-1]) * np.diff(r))
+        expected.append(4.0 * np.pi * integral / 1.0e14)
+    u = nfw_fourier_transform(jnp.asarray(k), mass, redshift, Cosmology(), duffy08_all_200c())
+    assert np.allclose(np.asarray(u), expected, rtol=2.0e-4, atol=1.0e-6)
+
+    grad = jax.grad(
+        lambda a: nfw_fourier_transform(5.0, mass, redshift, Cosmology(), ConcentrationParams(amplitude=a))
+    )(5.71)
+    assert jnp.isfinite(grad)
+
+
 def test_tabulated_projected_surface_density_shape_support_and_normalization():
     x_grid = jnp.linspace(0.0, 1.0, 8)
     params = TabulatedProjectedProfileParams(